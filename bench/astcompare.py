@@ -0,0 +1,61 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''Compare ASTs of the benchmarks by their structure.'''
+
+import os
+import sys
+
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+import testAST
+
+
+def dump(node):
+    '''
+    Return a nested tuple of the class names and the attributes of an AST.
+
+    Two ASTs with the same structure, values and comments result in equal
+    tuples, so the tuples can be compared with ==.
+
+    Arguments:
+    node -- a Node, a list of nodes or an attribute value
+    '''
+    if isinstance(node, (list, tuple)):
+        return tuple(dump(n) for n in node)
+    if isinstance(node, testAST.Node):
+        names = set(getattr(node, '__dict__', ()))
+        for cls in type(node).__mro__:
+            names.update(cls.__dict__.get('__slots__', ()))
+        return (type(node).__name__,
+                tuple((name, dump(getattr(node, name)))
+                      for name in sorted(names)
+                      if hasattr(node, name) and not name.startswith('_')))
+    return node
@@ -0,0 +1,171 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Check and benchmark of the AST cache.
+
+Uses a temporary cache directory. Checks that the cached ASTs of all files
+in itl/ are equal to the parsed ones, also while several processes share a
+cache which is too small for all files, that the directory is scanned once
+while it is below the cap and that the cap is restored by the next scan,
+and that a loaded AST shares its literal nodes like a parsed one, and exits
+with status 1 otherwise.
+Then prints the parse time and the load time of every file.
+
+Usage: python3 bench_astcache.py
+'''
+
+import concurrent.futures
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from synthetic import ITL_DIR
+from astcompare import dump
+import astcache
+import dslparser
+
+# repetitions of the measurements, the best time is reported
+REPEAT = 3
+
+PROCESSES = 4
+
+
+class CountingCache(astcache.ASTCache):
+
+    '''An ASTCache which counts the scans of its directory.'''
+
+    scans = 0
+
+    def evict(self):
+        self.scans += 1
+        astcache.ASTCache.evict(self)
+
+
+def literalNodes(ast):
+    '''Return the number of distinct literal nodes of the tests of an AST.'''
+    return len(set(id(literal) for testcase in ast.testcases
+                   for test in testcase.iterTests()
+                   for outputs in (test.inputs, test.tightestOutputs,
+                                   test.accurateOutputs)
+                   if outputs is not None
+                   for literal in outputs.literals))
+
+
+def sharedRun(directory, maxSize, files):
+    '''Return the dumps of the files loaded through a shared cache.'''
+    cache = astcache.ASTCache(directory, maxSize)
+    return [dump(cache.parse(path)) for path in files]
+
+
+def main():
+    files = sorted(os.path.join(ITL_DIR, f) for f in os.listdir(ITL_DIR)
+                   if f.endswith('.itl'))
+    directory = tempfile.mkdtemp()
+    try:
+        cache = CountingCache(directory)
+        expected = [dump(dslparser.parse(path)) for path in files]
+        failed = False
+
+        # sequential: one miss and one hit per file
+        for path, ast in zip(files, expected):
+            for i in range(2):
+                if dump(cache.parse(path)) != ast:
+                    failed = True
+                    print('MISMATCH in', path)
+            # the flyweight table is cleared between the files in main
+            dslparser.clearFlyweights()
+            parsed = literalNodes(dslparser.parse(path))
+            dslparser.clearFlyweights()
+            loaded = literalNodes(cache.parse(path))
+            if loaded != parsed:
+                failed = True
+                print('%s: %d literal nodes loaded, %d parsed' % (
+                    path, loaded, parsed))
+        if cache.scans != 1:
+            failed = True
+            print('directory scanned %d times below the cap' % cache.scans)
+
+        # concurrent: the cap only holds some entries, so the processes
+        # evict the entries of each other
+        shutil.rmtree(directory)
+        maxSize = 1024 * 1024
+        with concurrent.futures.ProcessPoolExecutor(PROCESSES) as pool:
+            futures = [pool.submit(sharedRun, directory, maxSize,
+                                   files[i:] + files[:i])
+                       for i in range(PROCESSES)]
+            for i, future in enumerate(futures):
+                if future.result() != expected[i:] + expected[:i]:
+                    failed = True
+                    print('MISMATCH in process', i)
+        # a process counts the entries of the others when it scans the
+        # directory, so it may be beyond the cap until the next scan
+        size = sum(os.path.getsize(os.path.join(directory, name))
+                   for name in os.listdir(directory))
+        cache = astcache.ASTCache(directory, maxSize)
+        cache.evict()
+        if size > PROCESSES * maxSize or cache.size > maxSize:
+            failed = True
+            print('cache size %d beyond the cap %d' % (size, maxSize))
+        print('%d files checked, %d processes' % (len(files), PROCESSES))
+        if failed:
+            sys.exit(1)
+
+        # timings
+        cache = astcache.ASTCache(directory)
+        print('\n%-34s %10s %10s %8s %10s' % ('file', 'parse [ms]',
+                                              'load [ms]', 'speedup',
+                                              'size [kB]'))
+        totalParse = totalLoad = 0.0
+        for path in files:
+            tParse = tLoad = None
+            with open(path, 'rb') as f:
+                key = cache.key(f.read())
+            cache.parse(path)
+            for i in range(REPEAT):
+                start = time.perf_counter()
+                dslparser.parse(path)
+                t = time.perf_counter() - start
+                tParse = t if tParse is None else min(tParse, t)
+                start = time.perf_counter()
+                cache.parse(path)
+                t = time.perf_counter() - start
+                tLoad = t if tLoad is None else min(tLoad, t)
+            totalParse += tParse
+            totalLoad += tLoad
+            print('%-34s %10.2f %10.2f %8.1f %10d' % (os.path.basename(path),
+                  tParse * 1000, tLoad * 1000, tParse / tLoad,
+                  os.path.getsize(cache.path(key)) // 1024))
+        print('%-34s %10.2f %10.2f %8.1f' % ('total', totalParse * 1000,
+              totalLoad * 1000, totalParse / totalLoad))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Differential check and benchmark of the parser backends.
+
+First checks that the recursive descent parser builds the same AST as the
+LALR parser for all files in itl/ and a synthetic file and that both reject
+the same malformed input, and exits with status 1 otherwise. Then compares
+the parse throughput of the backends on a synthetic file.
+
+Usage: python3 bench_backends.py [numTests]
+'''
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import ITL_DIR, writeSyntheticFile
+from astcompare import dump
+import dslparser
+
+DEFAULT_SIZE = 20000
+
+# repetitions of the throughput measurement, the best time is reported
+REPEAT = 3
+
+# (backend, scanner) pairs of the throughput measurement
+CONFIGURATIONS = [('lalr', 'ply'), ('lalr', 'fast'), ('rd', 'ply'),
+                  ('rd', 'fast')]
+
+MALFORMED = [
+    'testcase t { add [1.0,2.0] ; }',
+    'testcase t { add [1.0,2.0] = [1.0 2.0]; }',
+    'testcase t { add [1.0,2.0]_foo = [1.0,2.0]; }',
+    'testcase t { [1.0,2.0] = [1.0,2.0]; }',
+    'testcase t { add = [nai]_com; }',
+    'testcase t { add < [1.0,2.0]; }',
+    'testcase t. { add = true; }',
+    'testcase t { add = true; } }',
+    'testcase t { }',
+    '// only a comment',
+]
+
+
+def parseResult(path, backend):
+    '''Return the dump of the AST or the error of the parser.'''
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            return dump(dslparser.parse(path, scanner='fast',
+                                        backend=backend))
+    except Exception as e:
+        return ('error', type(e).__name__, out.getvalue())
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    fd, synthetic = tempfile.mkstemp(suffix='.itl')
+    os.close(fd)
+    try:
+        writeSyntheticFile(synthetic, size, 1000)
+
+        # differential check
+        files = sorted(os.path.join(ITL_DIR, f) for f in os.listdir(ITL_DIR)
+                       if f.endswith('.itl'))
+        failed = False
+        for path in files + [synthetic]:
+            if parseResult(path, 'lalr') != parseResult(path, 'rd'):
+                failed = True
+                print('MISMATCH in', path)
+        for text in MALFORMED:
+            with open(synthetic + '.bad', 'w') as f:
+                f.write(text)
+            expected = parseResult(synthetic + '.bad', 'lalr')
+            actual = parseResult(synthetic + '.bad', 'rd')
+            # p_error crashes at the end of the input without a message,
+            # only the rejection is compared there
+            if expected[0] != 'error' or actual[0] != 'error':
+                failed = True
+                print('NOT REJECTED', repr(text))
+            elif expected[2] and expected[2] != actual[2]:
+                failed = True
+                print('MISMATCH for', repr(text))
+        os.remove(synthetic + '.bad')
+        print('%d files and %d malformed inputs checked' %
+              (len(files) + 1, len(MALFORMED)))
+        if failed:
+            sys.exit(1)
+
+        # throughput
+        print('\n%-8s %-8s %10s %14s' % ('backend', 'scanner', 'parse [s]',
+                                         'tests/s'))
+        for backend, scanner in CONFIGURATIONS:
+            best = None
+            for i in range(REPEAT):
+                start = time.perf_counter()
+                dslparser.parse(synthetic, scanner=scanner, backend=backend)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print('%-8s %-8s %10.3f %14.0f' % (backend, scanner, best,
+                                               size / best))
+    finally:
+        os.remove(synthetic)
+
+if __name__ == '__main__':
+    main()
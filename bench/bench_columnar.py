@@ -0,0 +1,162 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the columnar store.
+
+First checks that the ColumnStore of every file in itl/ results in the same
+C++ output and source map as its DSLNode, with and without a source map and
+for a visitor which visits the views like nodes, and exits with status 1
+otherwise. Then builds the DSLNode and the ColumnStore of a synthetic file
+with numTests tests and reports the memory held by each, the peak memory
+while it is built, and the time to build it and to translate it without a
+source map. The times are measured without tracemalloc.
+
+Usage: python3 bench_columnar.py [numTests]
+'''
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from synthetic import SRC_DIR, ITL_DIR, writeSyntheticFile
+import columnar
+import dslparser
+import lang
+import testAST
+
+DEFAULT_TESTS = 200000
+
+# the specification of the C++ output
+SPEC = ('cpp/lang.yaml', 'cpp/test/BOOST/test.yaml',
+        'cpp/arith/libieeep1788/arith.yaml')
+
+
+class NodeVisitor(testAST.ASTVisitor):
+
+    '''A visitor which overrides visitTestNode, so it visits the views.'''
+
+    def visitTestNode(self, node):
+        return testAST.ASTVisitor.visitTestNode(self, node)
+
+
+def visitor(sourceMap=True, visitorClass=testAST.ASTVisitor):
+    '''Return a visitor for the C++ output.'''
+    specs = []
+    for path in SPEC:
+        with open(os.path.join(SRC_DIR, 'plugins', path)) as f:
+            specs.append(yaml.safe_load(f))
+    return visitorClass(lang.OutputSpecification(*specs),
+                        'plugins.cpp.callbacks', sourceMap)
+
+
+def translate(ast, sourceMap=True, visitorClass=testAST.ASTVisitor):
+    '''Return the translation and the source map of an AST or a store.'''
+    v = visitor(sourceMap, visitorClass)
+    content = ast.accept(v)
+    return content, repr(vars(v.sourceMap)) if sourceMap else None
+
+
+def check():
+    '''Return the number of files whose store translates differently.'''
+    errors = 0
+    for name in sorted(os.listdir(ITL_DIR)):
+        if not name.endswith('.itl'):
+            continue
+        path = os.path.join(ITL_DIR, name)
+        ast = dslparser.parse(path, scanner='fast', backend='rd')
+        for store in (columnar.fromAST(ast),
+                      columnar.parse(path, scanner='fast', backend='rd')):
+            for sourceMap, visitorClass in (
+                    (True, testAST.ASTVisitor), (False, testAST.ASTVisitor),
+                    (True, NodeVisitor)):
+                if (translate(store, sourceMap, visitorClass) !=
+                        translate(ast, sourceMap, visitorClass)):
+                    print('%s: translations differ, %s' % (
+                        name, visitorClass.__name__))
+                    errors += 1
+    return errors
+
+
+def measure(build):
+    '''
+    Return the memory held by the result of build, the peak memory while
+    it is built, the time to build and the time to translate it.
+    '''
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    result.accept(visitor(False))
+    translated = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the result is held until the memory is measured
+    del result
+    return held, peak, built, translated
+
+
+def main():
+    errors = check()
+    print('columnar: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    numTests = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TESTS
+    tmpDir = tempfile.mkdtemp(prefix='itf1788-bench-')
+    path = os.path.join(tmpDir, 'synthetic.itl')
+    writeSyntheticFile(path, numTests, 1000)
+    try:
+        print('%d tests' % numTests)
+        print('%-10s %10s %10s %10s %14s' % ('', 'held [MB]', 'peak [MB]',
+                                             'build [s]', 'translate [s]'))
+        for name, build in (
+                ('DSLNode', lambda: dslparser.parse(path, scanner='fast',
+                                                    backend='rd')),
+                ('columns', lambda: columnar.parse(path, scanner='fast',
+                                                   backend='rd'))):
+            held, peak, built, translated = measure(build)
+            print('%-10s %10.1f %10.1f %10.2f %14.2f'
+                  % (name, held / 1e6, peak / 1e6, built, translated))
+    finally:
+        os.remove(path)
+        os.rmdir(tmpDir)
+
+
+if __name__ == '__main__':
+    main()
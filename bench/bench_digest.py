@@ -0,0 +1,137 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the structural digests of the nodes.
+
+First checks that the digests of the testcases of all files in itl/ are the
+same in processes with different hash seeds, that comments and positions
+do not change the digest while the text, the type suffix and the
+decoration of a literal do, and that the views of the columnar store equal
+their nodes. Exits with status 1 otherwise. Then reports the time to
+compute the digests of the corpus, the time of a second, cached pass and
+the number of distinct tests found by a set of the tests.
+
+Usage: python3 bench_digest.py
+'''
+
+import os
+import subprocess
+import sys
+import time
+
+from synthetic import SRC_DIR, ITL_DIR
+import columnar
+import dslparser
+
+SNIPPET = '''
+import os
+import dslparser
+for name in sorted(os.listdir(%r)):
+    if name.endswith('.itl'):
+        ast = dslparser.parse(os.path.join(%r, name))
+        for testcase in ast.testcases:
+            print(name, testcase.name.val, testcase.digest().hex())
+''' % (ITL_DIR, ITL_DIR)
+
+BASE = 'testcase t { add [1.0,2.0] [1.0,2.0] = [2.0,4.0] <= [1.0,5.0]; }'
+
+# variants of BASE with the same digest
+SAME = [
+    '// file comment\ntestcase t {\n    // test comment\n'
+    '    add [1.0,2.0] [1.0,2.0] = [2.0,4.0] <= [1.0,5.0];\n}',
+    '\n\n\ntestcase t { add [1.0,2.0]   [1.0,2.0] = [2.0,4.0]  '
+    '<= [1.0,5.0];\n }',
+]
+
+# variants of BASE with another digest
+DIFFERENT = [
+    'testcase t { add [1.0,2.00] [1.0,2.0] = [2.0,4.0] <= [1.0,5.0]; }',
+    'testcase t { add [1.0F,2.0F] [1.0F,2.0F] = [2.0F,4.0F] '
+    '<= [1.0F,5.0F]; }',
+    'testcase t { add [1.0,2.0]_com [1.0,2.0] = [2.0,4.0] <= [1.0,5.0]; }',
+    'testcase t { add [1.0,2.0] [1.0,2.0] = [2.0,4.0]; }',
+    'testcase u { add [1.0,2.0] [1.0,2.0] = [2.0,4.0] <= [1.0,5.0]; }',
+]
+
+
+def digests(seed):
+    '''Return the digests of the corpus computed with a hash seed.'''
+    env = dict(os.environ, PYTHONHASHSEED=str(seed))
+    return subprocess.check_output([sys.executable, '-c', SNIPPET],
+                                   cwd=SRC_DIR, env=env)
+
+
+def check():
+    '''Return the number of failed checks.'''
+    errors = 0
+    if digests(1) != digests(2):
+        print('digests differ between processes')
+        errors += 1
+    base = dslparser.parseString(BASE, 'base.itl')
+    for i, text in enumerate(SAME):
+        if dslparser.parseString(text, 'same.itl') != base:
+            print('variant %d differs' % i)
+            errors += 1
+    for i, text in enumerate(DIFFERENT):
+        if dslparser.parseString(text, 'other.itl') == base:
+            print('variant %d equals' % i)
+            errors += 1
+    for name in sorted(os.listdir(ITL_DIR)):
+        if name.endswith('.itl'):
+            ast = dslparser.parse(os.path.join(ITL_DIR, name))
+            if columnar.fromAST(ast) != ast:
+                print('%s: columnar store differs' % name)
+                errors += 1
+    return errors
+
+
+def main():
+    errors = check()
+    print('digest: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    asts = [dslparser.parse(os.path.join(ITL_DIR, name))
+            for name in sorted(os.listdir(ITL_DIR)) if name.endswith('.itl')]
+    tests = [test for ast in asts for testcase in ast.testcases
+             for test in testcase.iterTests()]
+    start = time.perf_counter()
+    for ast in asts:
+        ast.digest()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    distinct = len(set(tests))
+    cached = time.perf_counter() - start
+    print('%d tests, %d distinct' % (len(tests), distinct))
+    print('digests of the corpus:   %.3f s' % first)
+    print('set of the tests, cached: %.3f s' % cached)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Micro-benchmark of the dispatch of Node.accept.
+
+Parses all files in itl/ and walks all their nodes with a visitor which
+only visits the children, once with the visitTable dispatch of Node.accept
+and once with the former lookup of 'visit' + class name on every visit.
+Then translates the corpus to C++ with both. A subclass of the walking
+visitor, like a plugin visitor, overrides one visit method and checks that
+the table dispatches to the override.
+
+Usage: python3 bench_dispatch.py
+'''
+
+import os
+import sys
+import time
+
+import yaml
+
+from synthetic import SRC_DIR, ITL_DIR
+import dslparser
+import lang
+import testAST
+
+# repetitions of the measurement, the best time is reported
+REPEAT = 5
+
+# the specification of the C++ output
+SPEC = ('cpp/lang.yaml', 'cpp/test/BOOST/test.yaml',
+        'cpp/arith/libieeep1788/arith.yaml')
+
+
+def legacyAccept(self, visitor):
+    '''Node.accept as it was, with a lookup by name on every visit.'''
+    visitFnc = getattr(visitor, 'visit' + self.__class__.__name__)
+    return visitFnc(self)
+
+
+class Walker(testAST.ASTVisitor):
+
+    '''A visitor which visits the children of every node.'''
+
+    def __init__(self):
+        testAST.ASTVisitor.__init__(self, None, None)
+        self.visits = 0
+
+    def walk(self, node):
+        self.visits += 1
+        for name in node.fields():
+            value = getattr(node, name)
+            if isinstance(value, testAST.Node):
+                value.accept(self)
+            elif isinstance(value, list):
+                for v in value:
+                    if isinstance(v, testAST.Node):
+                        v.accept(self)
+
+
+for nodeClass in testAST._nodeClasses():
+    setattr(Walker, 'visit' + nodeClass.__name__, Walker.walk)
+
+
+class TestCounter(Walker):
+
+    '''A subclass which overrides a visit method, like a plugin visitor.'''
+
+    def __init__(self):
+        Walker.__init__(self)
+        self.tests = 0
+
+    def visitTestNode(self, node):
+        self.tests += 1
+        return Walker.walk(self, node)
+
+
+def visitor():
+    '''Return an ASTVisitor for the C++ output.'''
+    specs = []
+    for path in SPEC:
+        with open(os.path.join(SRC_DIR, 'plugins', path)) as f:
+            specs.append(yaml.safe_load(f))
+    return testAST.ASTVisitor(lang.OutputSpecification(*specs),
+                              'plugins.cpp.callbacks')
+
+
+def best(function):
+    '''Return the best time of REPEAT calls of function.'''
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def measure(asts, accept):
+    '''Return the times to walk and to translate asts with accept.'''
+    tableAccept = testAST.Node.accept
+    testAST.Node.accept = accept
+    try:
+        walk = best(lambda: [ast.accept(Walker()) for ast in asts])
+        translate = best(lambda: [ast.accept(visitor()) for ast in asts])
+    finally:
+        testAST.Node.accept = tableAccept
+    return walk, translate
+
+
+def main():
+    asts = [dslparser.parse(os.path.join(ITL_DIR, name), scanner='fast',
+                            backend='rd')
+            for name in sorted(os.listdir(ITL_DIR)) if name.endswith('.itl')]
+
+    walker = Walker()
+    counter = TestCounter()
+    legacyCounter = TestCounter()
+    for ast in asts:
+        ast.accept(walker)
+        ast.accept(counter)
+        legacyAccept(ast, legacyCounter)
+    if counter.tests == 0 or counter.tests != legacyCounter.tests:
+        print('dispatch: override of visitTestNode not called')
+        sys.exit(1)
+    print('dispatch: 0 errors')
+    print('%d files, %d visits per walk, %d tests'
+          % (len(asts), walker.visits, counter.tests))
+
+    legacy = measure(asts, legacyAccept)
+    table = measure(asts, testAST.Node.accept)
+    print('%-10s %10s %14s' % ('', 'walk [s]', 'translate [s]'))
+    for name, (walk, translate) in (('by name', legacy),
+                                    ('table', table)):
+        print('%-10s %10.3f %14.3f' % (name, walk, translate))
+    print('dispatch overhead saved: %.0f ns per visit'
+          % ((legacy[0] - table[0]) / walker.visits * 1e9))
+
+
+if __name__ == '__main__':
+    main()
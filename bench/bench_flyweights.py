@@ -0,0 +1,188 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the shared literal nodes.
+
+First checks that the ASTs of all files in itl/ have the same structure and
+the same C++ output with and without shared literals, also with a small
+flyweight table which is full again and again, and that the table stays
+within its bound. Exits with status 1 otherwise. Then parses
+libieeep1788_tests_elem.itl and a synthetic file with numTests tests with
+and without shared literals and reports the deduplication ratio, the peak
+memory, and the hit rate and time of a cache of the C++ translations of the
+literals keyed by node, as a downstream consumer of the AST would keep it.
+
+Usage: python3 bench_flyweights.py [numTests]
+'''
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+from synthetic import SRC_DIR, ITL_DIR, writeSyntheticFile
+from astcompare import dump
+import dslparser
+import lang
+import testAST
+
+DEFAULT_TESTS = 100000
+
+# the bound of the flyweight table in the check
+SMALL_TABLE = 16
+
+# the specification of the C++ output
+SPEC = ('cpp/lang.yaml', 'cpp/test/BOOST/test.yaml',
+        'cpp/arith/libieeep1788/arith.yaml')
+
+
+def visitor():
+    '''Return an ASTVisitor for the C++ output.'''
+    specs = []
+    for path in SPEC:
+        with open(os.path.join(SRC_DIR, 'plugins', path)) as f:
+            specs.append(yaml.safe_load(f))
+    return testAST.ASTVisitor(lang.OutputSpecification(*specs),
+                              'plugins.cpp.callbacks')
+
+
+def parse(path, share):
+    '''Parse path with or without shared literals.'''
+    dslparser.SHARE_LITERALS = share
+    dslparser.clearFlyweights()
+    try:
+        return dslparser.parse(path, scanner='fast', backend='rd')
+    finally:
+        dslparser.SHARE_LITERALS = True
+
+
+def literalNodes(ast):
+    '''Yield the literal nodes of the tests of an AST.'''
+    for testcase in ast.testcases:
+        for test in testcase.iterTests():
+            for outputs in (test.inputs, test.tightestOutputs,
+                            test.accurateOutputs):
+                if outputs is not None:
+                    yield from outputs.literals
+
+
+def check():
+    '''Return the number of files which differ with shared literals.'''
+    errors = 0
+    for name in sorted(os.listdir(ITL_DIR)):
+        if not name.endswith('.itl'):
+            continue
+        path = os.path.join(ITL_DIR, name)
+        shared = parse(path, True)
+        own = parse(path, False)
+        if dump(shared) != dump(own):
+            print('%s: ASTs differ' % name)
+            errors += 1
+        elif shared.accept(visitor()) != own.accept(visitor()):
+            print('%s: translations differ' % name)
+            errors += 1
+        maxFlyweights = dslparser.MAX_FLYWEIGHTS
+        dslparser.MAX_FLYWEIGHTS = SMALL_TABLE
+        try:
+            bounded = parse(path, True)
+        finally:
+            dslparser.MAX_FLYWEIGHTS = maxFlyweights
+        if dump(bounded) != dump(own):
+            print('%s: ASTs differ with a small table' % name)
+            errors += 1
+        if len(dslparser._flyweights) > SMALL_TABLE:
+            print('%s: %d nodes in the table' % (
+                name, len(dslparser._flyweights)))
+            errors += 1
+    return errors
+
+
+def translate(ast):
+    '''
+    Translate the literals of an AST with a cache keyed by node.
+
+    Return a tuple (lookups, hits, seconds).
+    '''
+    v = visitor()
+    cache = {}
+    lookups = 0
+    start = time.perf_counter()
+    for node in literalNodes(ast):
+        lookups += 1
+        if id(node) not in cache:
+            cache[id(node)] = node.accept(v)
+    elapsed = time.perf_counter() - start
+    return lookups, lookups - len(cache), elapsed
+
+
+def measure(path, share):
+    '''Return the peak memory of a parse and the result of translate.'''
+    tracemalloc.start()
+    ast = parse(path, share)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stats = dslparser.flyweightStats()
+    return (peak, stats) + translate(ast)
+
+
+def main():
+    errors = check()
+    print('flyweights: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    numTests = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TESTS
+    tmpDir = tempfile.mkdtemp(prefix='itf1788-bench-')
+    synthetic = os.path.join(tmpDir, 'synthetic.itl')
+    writeSyntheticFile(synthetic, numTests, 1000)
+    try:
+        print('%-30s %-7s %8s %12s %10s %12s' % ('', 'shared', 'dedup',
+                                                 'peak [MB]', 'cache hits',
+                                                 'translate [s]'))
+        for name, path in (
+                ('libieeep1788_tests_elem.itl',
+                 os.path.join(ITL_DIR, 'libieeep1788_tests_elem.itl')),
+                ('synthetic, %d tests' % numTests, synthetic)):
+            for share in (False, True):
+                peak, (shared, nodes), lookups, hits, elapsed = measure(
+                    path, share)
+                dedup = '%.1f' % (shared / nodes) if nodes else '-'
+                print('%-30s %-7s %8s %12.1f %9.1f%% %12.3f'
+                      % (name, share, dedup, peak / 1e6,
+                         100.0 * hits / lookups, elapsed))
+    finally:
+        os.remove(synthetic)
+        os.rmdir(tmpDir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the generators of tests.
+
+First checks that a testcase with generators over literal sets and the
+testcase which lists their tests one by one result in the same tests and
+the same C++ output for all scanners and backends, and exits with status 1
+otherwise. Then compares the size, the parse and translation time and the
+peak memory of a generator over the cartesian product of three sets of
+numValues literals with the listed tests.
+
+Usage: python3 bench_generators.py [numValues]
+'''
+
+import itertools
+import os
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+from synthetic import SRC_DIR
+from astcompare import dump
+import dslparser
+import lang
+import testAST
+
+DEFAULT_VALUES = 16
+
+# the specification of the C++ output
+SPEC = ('cpp/lang.yaml', 'cpp/test/BOOST/test.yaml',
+        'cpp/arith/libieeep1788/arith.yaml')
+
+
+def generatorText(values):
+    '''Return a testcase with a generator over three copies of values.'''
+    count = len(values) ** 3
+    outputs = ' '.join('[%d.0,%d.0]' % (i, i + 1) for i in range(count))
+    return ('testcase generated {\n'
+            '    // the cartesian product\n'
+            '    set values = %s;\n'
+            '    fma {values} {values} {values} = %s;\n'
+            '    neg [1.0,2.0] = [-2.0,-1.0];\n'
+            '}\n' % (' '.join(values), outputs))
+
+
+def listedText(values):
+    '''Return the testcase of generatorText with the tests listed.'''
+    lines = ['testcase generated {\n', '    // the cartesian product\n']
+    for i, inputs in enumerate(itertools.product(values, repeat=3)):
+        lines.append('    fma %s = [%d.0,%d.0];\n' % (' '.join(inputs),
+                                                        i, i + 1))
+    lines.append('    neg [1.0,2.0] = [-2.0,-1.0];\n}\n')
+    return ''.join(lines)
+
+
+def visitor():
+    '''Return an ASTVisitor for the C++ output.'''
+    specs = []
+    for path in SPEC:
+        with open(os.path.join(SRC_DIR, 'plugins', path)) as f:
+            specs.append(yaml.safe_load(f))
+    return testAST.ASTVisitor(lang.OutputSpecification(*specs),
+                              'plugins.cpp.callbacks')
+
+
+def tests(testcase):
+    '''Return the dumps of the tests of a testcase without positions.'''
+    return [tuple(item for item in dump(test)[1] if item[0] != 'position')
+            for test in testcase.iterTests()]
+
+
+def check():
+    '''Return the number of differences of generators and listed tests.'''
+    errors = 0
+    values = ['[empty]', '[entire]', '[1.0,2.0]_com', '[-infinity,0.0]']
+    for scanner in ('ply', 'fast'):
+        for backend in ('lalr', 'rd'):
+            parser = dslparser.Parser(scanner=scanner, backend=backend)
+            generated = parser.parseString(generatorText(values), 'g.itl')
+            listed = parser.parseString(listedText(values), 'l.itl')
+            if tests(generated.testcases[0]) != tests(listed.testcases[0]):
+                print('%s %s: tests differ' % (scanner, backend))
+                errors += 1
+            if generated.accept(visitor()) != listed.accept(visitor()):
+                print('%s %s: translations differ' % (scanner, backend))
+                errors += 1
+    return errors
+
+
+def measure(text):
+    '''Return the time and the peak memory to parse and translate text.'''
+    parser = dslparser.Parser()
+    tracemalloc.start()
+    start = time.perf_counter()
+    parser.parseString(text, 'bench.itl').accept(visitor())
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    errors = check()
+    print('generators: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    numValues = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_VALUES
+    values = ['[%d.0,%d.5]' % (i, i + 1) for i in range(numValues)]
+    print('%d tests of fma over 3 sets of %d intervals'
+          % (numValues ** 3, numValues))
+    for name, text in (('listed', listedText(values)),
+                       ('generator', generatorText(values))):
+        elapsed, peak = measure(text)
+        print('%-10s %9d bytes  parse and translate %.3f s  '
+              'peak memory %.1f MB' % (name, len(text), elapsed, peak / 1e6))
+
+
+if __name__ == '__main__':
+    main()
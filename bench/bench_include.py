@@ -0,0 +1,191 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the include directive.
+
+First checks that all scanners and backends, the streaming, parallel and
+incremental parsers build the same AST for files with include directives,
+that IncludeResolver parses every included file once, shares its testcases
+and keeps only the included files, and that include cycles raise an IOError. Exits with status
+1 otherwise. Then compares the time to parse numFiles files which contain a
+copy of a common fragment with numFiles files which include it.
+
+Usage: python3 bench_include.py [numFiles]
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from synthetic import writeSyntheticFile
+from astcompare import dump
+import astcache
+import dslparser
+
+DEFAULT_FILES = 20
+
+# number of tests of the common fragment
+FRAGMENT_TESTS = 5000
+
+# the own testcase of every file
+OWN_TESTCASE = 'testcase own_%d {\n    neg [1.0, 2.0] = [-2.0, -1.0];\n}\n'
+
+
+def write(path, text):
+    '''Write text to path.'''
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def parsers(path):
+    '''Yield the name and the AST of every way to parse the file.'''
+    for scanner in dslparser.SCANNERS:
+        for backend in dslparser.BACKENDS:
+            yield scanner + '/' + backend, dslparser.parse(
+                path, scanner=scanner, backend=backend)
+    nodes = list(dslparser.iterparse(path))
+    ast = dslparser.DSLNode(nodes[1:])
+    ast.appendComment(nodes[0])
+    ast.setFileName(os.path.basename(path))
+    yield 'iterparse', ast
+    yield 'parallel', dslparser.parallelParse(path, jobs=2)
+
+
+def checkIncremental(path, directory):
+    '''Return True if the cache reuses the moved blocks correctly.'''
+    cache = astcache.ASTCache(os.path.join(directory, 'cache'))
+    cache.parse(path)
+    with open(path) as f:
+        text = f.read()
+    # move the blocks behind the first include down
+    write(path, text.replace('include', '\n\ninclude', 1))
+    result = dump(cache.parse(path)) == dump(dslparser.parse(path))
+    write(path, text)
+    return result
+
+
+def check(directory):
+    '''Return the number of failed checks.'''
+    errors = 0
+    os.mkdir(os.path.join(directory, 'common'))
+    writeSyntheticFile(os.path.join(directory, 'common', 'fragment.itl'),
+                       100, 10)
+    write(os.path.join(directory, 'a.itl'),
+          '/* a */\ninclude "common/fragment.itl"\n' + OWN_TESTCASE % 1 +
+          '// again\ninclude "common/fragment.itl" ' + OWN_TESTCASE % 2)
+    write(os.path.join(directory, 'b.itl'),
+          'include "common/fragment.itl"\ninclude "a.itl"\n')
+
+    path = os.path.join(directory, 'a.itl')
+    expected = dump(dslparser.parse(path))
+    for name, ast in parsers(path):
+        if dump(ast) != expected:
+            print('MISMATCH of the AST with includes for', name)
+            errors += 1
+    if not checkIncremental(path, directory):
+        print('MISMATCH of the AST with includes for the cache')
+        errors += 1
+
+    calls = []
+
+    def parse(testFilePath):
+        calls.append(testFilePath)
+        return dslparser.parse(testFilePath)
+
+    resolver = dslparser.IncludeResolver(parse)
+    # a.itl is included by b.itl, so it is parsed once
+    b = resolver.parse(os.path.join(directory, 'b.itl'))
+    a = resolver.parse(os.path.join(directory, 'a.itl'))
+    if len(calls) != 3:
+        print('MISMATCH: %d parses of 3 files' % len(calls))
+        errors += 1
+    if os.path.realpath(os.path.join(directory, 'b.itl')) in resolver.asts:
+        print('MISMATCH: the AST of a file which is not included is kept')
+        errors += 1
+    if (len(a.testcases) != 22 or len(b.testcases) != 32 or
+            a.testcases[0] is not b.testcases[0] or
+            b.testcases[10] is not a.testcases[0]):
+        print('MISMATCH: the included testcases are not shared')
+        errors += 1
+
+    write(os.path.join(directory, 'c.itl'), 'include "d.itl"\n')
+    write(os.path.join(directory, 'd.itl'), 'include "common/../c.itl"\n')
+    try:
+        dslparser.IncludeResolver().parse(os.path.join(directory, 'c.itl'))
+        print('MISMATCH: no error for an include cycle')
+        errors += 1
+    except IOError as e:
+        print(e)
+    return errors
+
+
+def bench(directory, numFiles):
+    '''Print the parse time of copied and of included fragments.'''
+    fragment = os.path.join(directory, 'fragment.itl')
+    writeSyntheticFile(fragment, FRAGMENT_TESTS, 100)
+    with open(fragment) as f:
+        text = f.read()
+    copies = []
+    includes = []
+    for i in range(numFiles):
+        copies.append(os.path.join(directory, 'copy%d.itl' % i))
+        write(copies[-1], text + OWN_TESTCASE % i)
+        includes.append(os.path.join(directory, 'include%d.itl' % i))
+        write(includes[-1], 'include "fragment.itl"\n' + OWN_TESTCASE % i)
+
+    for name, paths in [('copies', copies), ('includes', includes)]:
+        start = time.perf_counter()
+        resolver = dslparser.IncludeResolver()
+        tests = sum(len(testcase.tests) for path in paths
+                    for testcase in resolver.parse(path).testcases)
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(path) for path in paths)
+        if name == 'includes':
+            size += os.path.getsize(fragment)
+        print('%-9s %8d tests %10d bytes %8.2f s' % (name, tests, size,
+                                                    elapsed))
+
+
+def main():
+    numFiles = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FILES
+    directory = tempfile.mkdtemp()
+    try:
+        errors = check(directory)
+        print('includes: %d errors' % errors)
+        if errors:
+            sys.exit(1)
+        bench(directory, numFiles)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
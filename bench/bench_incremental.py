@@ -0,0 +1,127 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Benchmark of the incremental re-parse of an edited ITL file.
+
+Copies libieeep1788_tests_elem.itl into a temporary directory, fills a
+temporary AST cache with it and then edits one test at a time. For every
+edit the time to a new AST is measured for a full parse and for the
+incremental parse of the cache, and the ASTs are compared. Also edits the
+second of two testcases on one line, the positions of its nodes start
+after the first testcase. Exits with status 1 on a mismatch.
+
+Usage: python3 bench_incremental.py [file]
+'''
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from synthetic import ITL_DIR
+from astcompare import dump
+import astcache
+import dslparser
+
+# number of edits, every edit changes another test
+EDITS = 5
+
+# two testcases on one line and the same line with an edit of the second
+ONE_LINE = ('testcase a { add [1.0,2.0] [3.0,4.0] = [4.0,6.0]; } '
+            'testcase b { add [1.0,2.0] [3.0,4.0] = [4.0,6.0]; }\n')
+ONE_LINE_EDITED = ONE_LINE.replace('[4.0,6.0]; }\n', '[4.0,7.0]; }\n')
+
+
+def checkOneLine(directory):
+    """
+    Return if the incremental parse of an edit of the second testcase of a
+    line gives the same AST as a full parse.
+    """
+    path = os.path.join(directory, 'one_line.itl')
+    cache = astcache.ASTCache(os.path.join(directory, 'cache_one_line'))
+    with open(path, 'w') as f:
+        f.write(ONE_LINE)
+    cache.parse(path)
+    with open(path, 'w') as f:
+        f.write(ONE_LINE_EDITED)
+    return dump(cache.parse(path)) == dump(dslparser.parse(path))
+
+
+def main():
+    source = (sys.argv[1] if len(sys.argv) > 1 else
+              os.path.join(ITL_DIR, 'libieeep1788_tests_elem.itl'))
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, os.path.basename(source))
+        shutil.copy(source, path)
+        cache = astcache.ASTCache(os.path.join(directory, 'cache'))
+        cache.parse(path)
+
+        with open(path) as f:
+            lines = f.readlines()
+        # tests with tightest but without accurate outputs
+        candidates = [i for i, line in enumerate(lines)
+                      if line.rstrip().endswith(';') and ' = ' in line and
+                      '<=' not in line and '//' not in line]
+
+        failed = False
+        totalFull = totalIncremental = 0.0
+        print('%6s %12s %18s' % ('line', 'full [ms]', 'incremental [ms]'))
+        for k in range(EDITS):
+            i = candidates[(k + 1) * len(candidates) // (EDITS + 1)]
+            lines[i] = lines[i].rstrip()[:-1] + ' <= [entire];\n'
+            with open(path, 'w') as f:
+                f.writelines(lines)
+
+            start = time.perf_counter()
+            expected = dslparser.parse(path)
+            tFull = time.perf_counter() - start
+            start = time.perf_counter()
+            actual = cache.parse(path)
+            tIncremental = time.perf_counter() - start
+            totalFull += tFull
+            totalIncremental += tIncremental
+
+            if dump(expected) != dump(actual):
+                failed = True
+                print('MISMATCH after editing line', i + 1)
+            print('%6d %12.2f %18.2f' % (i + 1, tFull * 1000,
+                                         tIncremental * 1000))
+        print('%6s %12.2f %18.2f' % ('total', totalFull * 1000,
+                                     totalIncremental * 1000))
+        if not checkOneLine(directory):
+            failed = True
+            print('MISMATCH after editing the second testcase of a line')
+        if failed:
+            sys.exit(1)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Check and benchmark of the input adapters.
+
+Packs the files in itl/ as gzip, xz and bzip2 files and as tar and zip
+archives in a temporary directory and checks that every adapter of
+itlinput yields the same ASTs as parsing the plain files, also with
+dslparser.iterparse on the streams, and that the members of the archives
+keep their relative paths. Exits with status 1 otherwise and prints the
+time per input format.
+
+Usage: python3 bench_inputs.py
+'''
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+
+from synthetic import ITL_DIR
+from astcompare import dump
+import dslparser
+import itlinput
+
+
+def checkPaths(directory):
+    """
+    Return if the members of the same name in different directories of an
+    archive are yielded with different names and if a member outside of the
+    archive is refused.
+    """
+    ok = True
+    members = ['a/x.itl', 'b/x.itl', './c/x.itl.gz']
+    names = ['a/x.itl', 'b/x.itl', 'c/x.itl']
+    text = b'testcase t { add [1,2] [3,4] = [4,6]; }\n'
+    tarPath = os.path.join(directory, 'paths.tar')
+    zipPath = os.path.join(directory, 'paths.zip')
+    with tarfile.open(tarPath, 'w:') as tar, \
+            zipfile.ZipFile(zipPath, 'w') as archive:
+        for member in members:
+            data = gzip.compress(text) if member.endswith('.gz') else text
+            info = tarfile.TarInfo(member)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+            archive.writestr(member, data)
+    for path in (tarPath, zipPath):
+        actual = [f for f, stream in itlinput.iterInputs(path)]
+        if actual != names:
+            ok = False
+            print('WRONG NAMES', actual, 'in', os.path.basename(path))
+    path = os.path.join(directory, 'outside.zip')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('a/../../x.itl', text)
+    try:
+        list(itlinput.iterInputs(path))
+        ok = False
+        print('MEMBER OUTSIDE OF THE ARCHIVE ACCEPTED')
+    except IOError:
+        pass
+    return ok
+
+
+def main():
+    files = sorted(f for f in os.listdir(ITL_DIR) if f.endswith('.itl'))
+    expected = dict((f, dump(dslparser.parse(os.path.join(ITL_DIR, f))))
+                    for f in files)
+    directory = tempfile.mkdtemp()
+    try:
+        inputs = []
+        for suffix, compress in (('.gz', gzip.compress),
+                                 ('.xz', lzma.compress),
+                                 ('.bz2', bz2.compress)):
+            paths = []
+            for f in files:
+                with open(os.path.join(ITL_DIR, f), 'rb') as src:
+                    data = compress(src.read())
+                paths.append(os.path.join(directory, f + suffix))
+                with open(paths[-1], 'wb') as dst:
+                    dst.write(data)
+            inputs.append((suffix, paths))
+        for mode, suffix in (('w:', '.tar'), ('w:gz', '.tar.gz'),
+                             ('w:xz', '.tar.xz')):
+            path = os.path.join(directory, 'itl' + suffix)
+            with tarfile.open(path, mode) as tar:
+                for f in files:
+                    tar.add(os.path.join(ITL_DIR, f), 'itl/' + f)
+            inputs.append((suffix, [path]))
+        path = os.path.join(directory, 'itl.zip')
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for f in files:
+                archive.write(os.path.join(ITL_DIR, f), 'itl/' + f)
+        inputs.append(('.zip', [path]))
+
+        failed = not checkPaths(directory)
+        print('%-8s %10s' % ('input', 'parse [s]'))
+        for name, paths in [('.itl', [os.path.join(ITL_DIR, f)
+                                      for f in files])] + inputs:
+            start = time.perf_counter()
+            actual = {}
+            for path in paths:
+                for f, stream in itlinput.iterInputs(path):
+                    # the members of the archives are in itl/
+                    if path.endswith(itlinput.TAR_SUFFIXES +
+                                     itlinput.ZIP_SUFFIXES):
+                        if not f.startswith('itl/'):
+                            failed = True
+                            print('WRONG NAME', f, 'in', name)
+                        f = os.path.basename(f)
+                    actual[f] = dump(dslparser.parseStream(stream, f))
+            elapsed = time.perf_counter() - start
+            if actual != expected:
+                failed = True
+                print('MISMATCH for', name)
+            print('%-8s %10.3f' % (name, elapsed))
+
+        # the streams can be parsed incrementally as well
+        for f, stream in itlinput.iterInputs(inputs[0][1][0]):
+            nodes = list(dslparser.iterparse(stream))
+            ast = dslparser.parse(os.path.join(ITL_DIR, f))
+            if dump(nodes) != dump(ast.comments + ast.testcases):
+                failed = True
+                print('MISMATCH of iterparse for', f)
+        if failed:
+            sys.exit(1)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
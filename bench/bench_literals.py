@@ -0,0 +1,155 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Conformance check and benchmark of the numeric literal decoding.
+
+First checks that literals.decode rounds random decimal and hexadecimal
+literals to the same float and double bits as the struct module and exits
+with status 1 otherwise, also if the table holds more than
+literals.TABLE_SIZE literals. Then parses all files in itl/ and reports
+how many literals share a decoded value and the time to decode them with
+and without the memoized table.
+
+Usage: python3 bench_literals.py
+'''
+
+import os
+import random
+import struct
+import sys
+import time
+
+from synthetic import ITL_DIR
+import dslparser
+import literals
+import testAST
+
+# number of random literals of the conformance check
+SAMPLES = 20000
+
+# repetitions of the measurement, the best time is reported
+REPEAT = 5
+
+
+def structBits(value, fmt):
+    '''Return the bits of value packed by struct in format fmt.'''
+    code, intCode = {'float': ('>f', '>I'), 'double': ('>d', '>Q')}[fmt]
+    try:
+        return struct.unpack(intCode, struct.pack(code, value))[0]
+    except OverflowError:
+        return struct.unpack(intCode, struct.pack(code,
+                                                  value * float('inf')))[0]
+
+
+def samples(rnd):
+    '''Yield random literal strings and the double they denote.'''
+    for _ in range(SAMPLES):
+        value = struct.unpack('>d', struct.pack('>Q',
+                                                rnd.getrandbits(64)))[0]
+        if value != value or value in (float('inf'), float('-inf')):
+            continue
+        yield repr(value), value
+        yield value.hex(), value
+        yield '%.6e' % value, float('%.6e' % value)
+
+
+def check():
+    '''Return the number of mismatches against struct.'''
+    rnd = random.Random(1788)
+    errors = 0
+    for text, value in samples(rnd):
+        literal = literals.decode(text)
+        for fmt in ('float', 'double'):
+            if literal.bits(fmt) != structBits(value, fmt):
+                print('mismatch %s %s: %x != %x' % (
+                    text, fmt, literal.bits(fmt), structBits(value, fmt)))
+                errors += 1
+    # the table is bounded
+    for i in range(literals.TABLE_SIZE + 100):
+        literals.decode(str(i))
+    if literals.tableSize() > literals.TABLE_SIZE:
+        print('table holds %d literals' % literals.tableSize())
+        errors += 1
+    literals.clearTable()
+    return errors
+
+
+def collect(node, result):
+    '''Append the texts of all number literals below node to result.'''
+    if isinstance(node, (testAST.FloatingPointNode,
+                         testAST.IntegerLiteralNode)):
+        result.append(node.val)
+    for name in node.fields():
+        child = getattr(node, name)
+        for item in child if isinstance(child, list) else [child]:
+            if isinstance(item, testAST.Node):
+                collect(item, result)
+
+
+def best(function):
+    '''Return the best time of REPEAT calls of function.'''
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def decodeAll(texts, memoized):
+    '''Decode texts to double bits with or without the table.'''
+    literals.clearTable()
+    for text in texts:
+        literal = literals.decode(text) if memoized \
+            else literals.Literal(text)
+        literal.bits('double')
+
+
+def main():
+    errors = check()
+    print('conformance: %d mismatches' % errors)
+    if errors:
+        sys.exit(1)
+
+    texts = []
+    for name in sorted(os.listdir(ITL_DIR)):
+        if name.endswith('.itl'):
+            collect(dslparser.parse(os.path.join(ITL_DIR, name)), texts)
+    print('literals in itl/: %d, distinct: %d' % (len(texts),
+                                                  literals.tableSize()))
+    if not texts:
+        sys.exit(1)
+    print('decode without table: %.3f s' % best(
+        lambda: decodeAll(texts, False)))
+    print('decode with table:    %.3f s' % best(
+        lambda: decodeAll(texts, True)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Memory benchmark of the AST nodes.
+
+Parses libieeep1788_tests_elem.itl and a synthetic file with numTests tests
+in a fresh interpreter each and reports the peak RSS and the number of
+nodes, once with the node classes of testAST, which use __slots__, and
+once with copies of them which keep their attributes in an instance
+dictionary like the nodes did before.
+
+Usage: python3 bench_memory.py [numTests]
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from synthetic import SRC_DIR, ITL_DIR, writeSyntheticFile
+
+DEFAULT_TESTS = 1000000
+
+SNIPPET = '''
+import resource
+import sys
+import testAST
+
+def withDict(cls, copies):
+    """Return a copy of a Node class and its bases without __slots__."""
+    if cls is object:
+        return object
+    if cls not in copies:
+        namespace = dict((name, value) for name, value in cls.__dict__.items()
+                         if name not in cls.__dict__.get('__slots__', ()) and
+                         name != '__slots__')
+        copies[cls] = type(cls.__name__,
+                           tuple(withDict(b, copies) for b in cls.__bases__),
+                           namespace)
+    return copies[cls]
+
+if sys.argv[2] == 'dict':
+    copies = {}
+    node = testAST.Node
+    for name, cls in list(vars(testAST).items()):
+        if isinstance(cls, type) and issubclass(cls, node):
+            setattr(testAST, name, withDict(cls, copies))
+
+import dslparser
+
+def count(node):
+    if isinstance(node, list):
+        return sum(count(n) for n in node)
+    if not isinstance(node, testAST.Node):
+        return 0
+    names = node.fields() if sys.argv[2] == 'slots' else vars(node)
+    return 1 + sum(count(getattr(node, name)) for name in names)
+
+ast = dslparser.parse(sys.argv[1], scanner='fast', backend='rd')
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(peak, count(ast))
+'''
+
+
+def run(path, mode):
+    '''Parse path in a new interpreter and return the peak RSS and nodes.'''
+    out = subprocess.check_output([sys.executable, '-c', SNIPPET, path, mode],
+                                  cwd=SRC_DIR)
+    peak, nodes = out.split()
+    # ru_maxrss is in kilobytes on Linux
+    return int(peak) * 1024, int(nodes)
+
+
+def main():
+    numTests = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TESTS
+    tmpDir = tempfile.mkdtemp(prefix='itf1788-bench-')
+    synthetic = os.path.join(tmpDir, 'synthetic.itl')
+    writeSyntheticFile(synthetic, numTests, 1000)
+    try:
+        print('%-32s %10s %12s %12s %8s' % ('', 'nodes', 'dict [MB]',
+                                            'slots [MB]', 'ratio'))
+        for name, path in (
+                ('libieeep1788_tests_elem.itl',
+                 os.path.join(ITL_DIR, 'libieeep1788_tests_elem.itl')),
+                ('synthetic, %d tests' % numTests, synthetic)):
+            before, nodes = run(path, 'dict')
+            after, slotNodes = run(path, 'slots')
+            assert nodes == slotNodes
+            print('%-32s %10d %12.1f %12.1f %8.2f'
+                  % (name, nodes, before / 1e6, after / 1e6, after / before))
+    finally:
+        os.remove(synthetic)
+        os.rmdir(tmpDir)
+
+
+if __name__ == '__main__':
+    main()
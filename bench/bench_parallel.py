@@ -0,0 +1,119 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Check and benchmark of the parallel parsing of a single file.
+
+First checks that dslparser.parallelParse builds the same AST as the
+sequential parser for all files in itl/ and a synthetic file, also with one
+pool for all files, and that the first syntax error is reported with the
+same line number, also if the text after the last testcase has an error as
+well, and exits with status 1 otherwise. Then prints the parse time of the synthetic file for a growing
+number of processes.
+
+Usage: python3 bench_parallel.py [numTests]
+'''
+
+import concurrent.futures
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import ITL_DIR, writeSyntheticFile
+from astcompare import dump
+import dslparser
+
+DEFAULT_SIZE = 50000
+
+JOBS = [1, 2, 4, 8]
+
+
+def errorMessage(path, jobs, pool=None):
+    '''Return the message printed for the syntax error in the file.'''
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            dslparser.parse(path, jobs=jobs, pool=pool)
+    except IOError:
+        return out.getvalue()
+    return None
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    fd, synthetic = tempfile.mkstemp(suffix='.itl')
+    os.close(fd)
+    try:
+        writeSyntheticFile(synthetic, size, 500)
+
+        # same ASTs
+        files = sorted(os.path.join(ITL_DIR, f) for f in os.listdir(ITL_DIR)
+                       if f.endswith('.itl'))
+        failed = False
+        with concurrent.futures.ProcessPoolExecutor(4) as pool:
+            for path in files + [synthetic]:
+                expected = dump(dslparser.parse(path))
+                if expected != dump(dslparser.parse(path, jobs=4)) or \
+                        expected != dump(dslparser.parse(path, jobs=4,
+                                                         pool=pool)):
+                    failed = True
+                    print('MISMATCH in', path)
+
+            # same error line, the error is in the last testcase, then in
+            # the last testcase and after it
+            with open(synthetic) as f:
+                lines = f.readlines()
+            lines[-4] = lines[-4].replace('[', '{', 1)
+            for trailer in ('', 'neg [1.0, 2.0] = [-2.0, -1.0];\n'):
+                with open(synthetic + '.bad', 'w') as f:
+                    f.writelines(lines + [trailer])
+                expected = errorMessage(synthetic + '.bad', 1)
+                actual = errorMessage(synthetic + '.bad', 4)
+                shared = errorMessage(synthetic + '.bad', 4, pool)
+                os.remove(synthetic + '.bad')
+                if expected is None or not expected == actual == shared:
+                    failed = True
+                    print('MISMATCH of the error: %r %r %r' % (
+                        expected, actual, shared))
+        print('%d files and 2 syntax errors checked, %d CPUs\n' %
+              (len(files) + 1, os.cpu_count()))
+        if failed:
+            sys.exit(1)
+
+        print('%6s %10s' % ('jobs', 'parse [s]'))
+        for jobs in JOBS:
+            start = time.perf_counter()
+            dslparser.parse(synthetic, jobs=jobs)
+            print('%6d %10.3f' % (jobs, time.perf_counter() - start))
+    finally:
+        os.remove(synthetic)
+
+if __name__ == '__main__':
+    main()
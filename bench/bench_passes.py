@@ -0,0 +1,200 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the pass pipeline.
+
+First checks on all files in itl/ that a pipeline keeps the same tests as
+its passes chained one iterator per pass, that the shards of the tests are
+disjoint and cover all tests, that dedupe keeps the distinct tests and that
+limit stops reading. Then checks the same on a file which mixes a testcase
+and a template, the passes see the tests of every type of the template.
+Exits with status 1 otherwise. Then applies the
+pipeline to a synthetic file with numTests tests, fused and chained, and
+reports the times and the report of the pipeline.
+
+Usage: python3 bench_passes.py [numTests]
+'''
+
+from collections import Counter
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import ITL_DIR, writeSyntheticFile
+import dslparser
+import passes
+
+DEFAULT_TESTS = 200000
+
+# the pipeline of the measurement
+SPECS = ['filter:[a-z]+', 'sample:0.9', 'dedupe', 'shard:0/2',
+         'limit:1000000']
+
+SHARDS = 4
+
+# a testcase and a template with the same test, the instance of the template
+# for double repeats the test of the testcase
+MIXED = """
+testcase plain {
+    add [1.0, 2.0] [1.0, 2.0] = [2.0, 4.0];
+}
+
+testcase generic [float, double, long_double] {
+    add [1.0, 2.0] [1.0, 2.0] = [2.0, 4.0];
+    neg [1.0, 2.0] = [-2.0, -1.0];
+}
+"""
+
+
+class Chained(passes.Pipeline):
+
+    '''
+    A pipeline without fusion, every pass is an iterator of its own which
+    counts its tests.
+    '''
+
+    def run(self, tests):
+        tests = iter(tests)
+        for i in range(len(self.passes)):
+            tests = self._counted(i, tests)
+        return tests
+
+
+def tests(ast):
+    '''Return the tests of an AST as a list.'''
+    return [test for testcase in ast.testcases for test in testcase.tests]
+
+
+def check():
+    '''Return the number of failed checks.'''
+    errors = 0
+    for name in sorted(os.listdir(ITL_DIR)):
+        if not name.endswith('.itl'):
+            continue
+        ast = dslparser.parse(os.path.join(ITL_DIR, name))
+        fused = ast.applyPasses(passes.Pipeline.fromSpecs(SPECS))
+        chained = ast.applyPasses(Chained.fromSpecs(SPECS))
+        if fused != chained:
+            print('%s: fused and chained passes differ' % name)
+            errors += 1
+        every = tests(ast.applyPasses(passes.Pipeline([])))
+        shards = [tests(ast.applyPasses(
+            passes.Pipeline.fromSpecs(['shard:%d/%d' % (i, SHARDS)])))
+            for i in range(SHARDS)]
+        if Counter(t for shard in shards for t in shard) != Counter(every) \
+                or len(set().union(*shards)) != sum(map(len, map(set,
+                                                                 shards))):
+            print('%s: shards do not partition the tests' % name)
+            errors += 1
+        deduped = tests(ast.applyPasses(passes.Pipeline([passes.Dedupe()])))
+        if len(deduped) != len(set(every)):
+            print('%s: dedupe keeps %d tests' % (name, len(deduped)))
+            errors += 1
+        limit = passes.Pipeline.fromSpecs(['limit:3'])
+        if tests(ast.applyPasses(limit)) != every[:3] \
+                or limit.stats[0].read != min(3, len(every)):
+            print('%s: limit reads %d tests' % (name, limit.stats[0].read))
+            errors += 1
+    return errors + checkMixed()
+
+
+def instances(ast):
+    '''Return the tests of an AST with its templates instantiated.'''
+    return [test for testcase in ast.testcases
+            for dataType in getattr(testcase, 'types', [None])
+            for test in (testcase.instantiate(dataType).tests if dataType
+                         else testcase.tests)]
+
+
+def checkMixed():
+    '''Return the number of failed checks of MIXED.'''
+    errors = 0
+    ast = dslparser.Parser().parseString(MIXED, 'mixed.itl')
+    every = instances(ast)
+    if len(every) != 7 or len(set(every)) != 6:
+        print('mixed: %d tests, %d distinct' % (len(every), len(set(every))))
+        return 1
+    if instances(ast.applyPasses(passes.Pipeline([]))) != every:
+        print('mixed: the instances differ from the template')
+        errors += 1
+    deduped = instances(ast.applyPasses(passes.Pipeline([passes.Dedupe()])))
+    if deduped != every[:3] + every[4:]:
+        print('mixed: dedupe keeps %d tests' % len(deduped))
+        errors += 1
+    shards = [instances(ast.applyPasses(
+        passes.Pipeline.fromSpecs(['shard:%d/%d' % (i, SHARDS)])))
+        for i in range(SHARDS)]
+    if Counter(t for shard in shards for t in shard) != Counter(every):
+        print('mixed: shards do not partition the tests')
+        errors += 1
+    for count in range(len(every) + 1):
+        limit = passes.Pipeline.fromSpecs(['limit:%d' % count])
+        if instances(ast.applyPasses(limit)) != every[:count]:
+            print('mixed: limit:%d keeps other tests' % count)
+            errors += 1
+    return errors
+
+
+def measure(ast, pipeline):
+    '''Return the time to apply a pipeline to an AST.'''
+    start = time.perf_counter()
+    ast.applyPasses(pipeline)
+    return time.perf_counter() - start
+
+
+def main():
+    errors = check()
+    print('passes: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    numTests = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TESTS
+    tmpDir = tempfile.mkdtemp(prefix='itf1788-bench-')
+    path = os.path.join(tmpDir, 'synthetic.itl')
+    writeSyntheticFile(path, numTests, 1000)
+    try:
+        ast = dslparser.parse(path, scanner='fast', backend='rd')
+    finally:
+        os.remove(path)
+        os.rmdir(tmpDir)
+    # the digests are computed by the first run
+    ast.applyPasses(passes.Pipeline.fromSpecs(SPECS))
+
+    print('%d tests, passes %s' % (numTests, ' '.join(SPECS)))
+    print('chained: %.3f s' % measure(ast, Chained.fromSpecs(SPECS)))
+    print('fused:   %.3f s' % measure(ast, passes.Pipeline.fromSpecs(SPECS)))
+    profiled = passes.Pipeline.fromSpecs(SPECS, profile=True)
+    print('fused, profiled: %.3f s' % measure(ast, profiled))
+    for line in profiled.report():
+        print('   ', line)
+
+
+if __name__ == '__main__':
+    main()
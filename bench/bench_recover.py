@@ -0,0 +1,147 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Check and benchmark of the error recovering parser.
+
+Checks that dslparser.recoverParse builds the same AST as dslparser.parse
+without any diagnostic for all files in itl/. Then breaks one test in
+every other testcase of a synthetic file and checks that every error is
+reported at its line and that the AST holds exactly the other testcases,
+and that an unterminated string or comment with numTests quotes or comment
+starts in its body is reported once by both scanners. Exits with status 1
+if a check fails. Finally prints the parse times.
+
+Usage: python3 bench_recover.py [numTests]
+'''
+
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import ITL_DIR, writeSyntheticFile
+from astcompare import dump
+import dslparser
+
+DEFAULT_SIZE = 20000
+
+TESTS_PER_TESTCASE = 100
+
+# replacements which break a test, used round robin
+BREAKS = [(';', ''), ('[', '{'), (' = ', ' @ = '), (']', ']_foo')]
+
+# unterminated strings and comments, every quote or comment start in their
+# body would start another one if the lexer resumed in the body
+UNTERMINATED = [
+    ('string', 'unterminated string', lambda n: 'x "' + '\\"' * n),
+    ('comment', 'unterminated comment', lambda n: 'x /*' + '"/*' * n),
+]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    failed = False
+
+    files = sorted(os.path.join(ITL_DIR, f) for f in os.listdir(ITL_DIR)
+                   if f.endswith('.itl'))
+    for path in files:
+        ast, diagnostics = dslparser.recoverParse(path)
+        if diagnostics or dump(ast) != dump(dslparser.parse(path)):
+            failed = True
+            print('MISMATCH in', path)
+
+    fd, path = tempfile.mkstemp(suffix='.itl')
+    os.close(fd)
+    try:
+        writeSyntheticFile(path, size, TESTS_PER_TESTCASE)
+        with open(path) as f:
+            lines = f.readlines()
+        start = time.perf_counter()
+        dslparser.parse(path)
+        tParse = time.perf_counter() - start
+
+        # break the first test of every other testcase
+        headers = [i for i, line in enumerate(lines)
+                   if line.startswith('testcase')]
+        broken = []
+        for k, i in enumerate(headers[1::2]):
+            i += 1
+            while not lines[i].rstrip().endswith(';'):
+                i += 1
+            old, new = BREAKS[k % len(BREAKS)]
+            lines[i] = lines[i].replace(old, new, 1)
+            broken.append(i + 1)
+        with open(path, 'w') as f:
+            f.writelines(lines)
+
+        start = time.perf_counter()
+        ast, diagnostics = dslparser.recoverParse(path)
+        tRecover = time.perf_counter() - start
+
+        # a missing ';' is reported at the next line
+        reported = sorted(set(d.line for d in diagnostics))
+        if any(line not in (b, b + 1) for line, b in zip(reported, broken)):
+            failed = True
+            print('MISMATCH of the error lines')
+        if len(reported) != len(broken):
+            failed = True
+            print('%d errors reported, %d expected' % (len(reported),
+                                                        len(broken)))
+        expected = ['synthetic_%d' % i for i in range(0, len(headers), 2)]
+        if [t.name.val for t in ast.testcases] != expected:
+            failed = True
+            print('MISMATCH of the testcases')
+        print('%d files and %d errors checked' % (len(files), len(broken)))
+        for diagnostic in diagnostics[:4]:
+            print('  ' + str(diagnostic))
+
+        # the unexpected 'x' and the unterminated string or comment
+        times = []
+        for name, message, make in UNTERMINATED:
+            for scanner in dslparser.SCANNERS:
+                start = time.perf_counter()
+                ast, diagnostics = dslparser.recoverParseString(
+                    make(size), 'unterminated.itl', scanner=scanner)
+                times.append((name, scanner, time.perf_counter() - start))
+                messages = [d.message for d in diagnostics]
+                if len(messages) != 2 or messages[1] != message:
+                    failed = True
+                    print('%d errors reported for an unterminated %s, '
+                          'scanner %s' % (len(messages), name, scanner))
+        if failed:
+            sys.exit(1)
+
+        print('\nparse of the valid file: %.3f s' % tParse)
+        print('recovering parse:        %.3f s' % tRecover)
+        for name, scanner, t in times:
+            print('unterminated %-7s %-5s %.3f s' % (name, scanner, t))
+    finally:
+        os.remove(path)
+
+if __name__ == '__main__':
+    main()
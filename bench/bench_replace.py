@@ -0,0 +1,185 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the compiled templates of ASTVisitor.replaceToken.
+
+First checks that CompiledTemplate substitutes like
+string.Template.safe_substitute, as does replaceToken for texts which are
+not compiled, and that replaceTokenList gives the same text as before, for
+random template strings with escaped, braced, unknown and ill-formed
+placeholders. Then checks that all files in itl/ are translated to C++ and
+Octave as with the former replaceToken and replaceTokenList. Exits with
+status 1 otherwise. Then reports the time to translate the corpus with
+both.
+
+Usage: python3 bench_replace.py
+'''
+
+import os
+import random
+import string
+import sys
+import time
+
+import yaml
+
+from synthetic import SRC_DIR, ITL_DIR
+import dslparser
+import lang
+import testAST
+
+# repetitions of the measurement, the best time is reported
+REPEAT = 3
+
+# random template strings are built from these pieces
+PIECES = ['$ARG1', '${ARG1}', '$ARG10', '$ARG2', '${ARG2}x', '$$', '$$ARG1',
+          '$', '$1', '${', '${ARG1', '$ARG1_', 'a', ' ', '(', ')', '\n',
+          '}', '$arg1']
+
+# the specifications of the outputs and their callbacks
+SPECS = [(('cpp/lang.yaml', 'cpp/test/BOOST/test.yaml',
+           'cpp/arith/libieeep1788/arith.yaml'), 'plugins.cpp.callbacks'),
+         (('octave/lang.yaml', 'octave/test/native/test.yaml',
+           'octave/arith/P1788/arith.yaml'), 'plugins.octave.callbacks')]
+
+
+def legacyReplaceToken(self, text, token, replacement):
+    '''ASTVisitor.replaceToken as it was, with a Template per call.'''
+    tmp = string.Template(text)
+    if not isinstance(replacement, testAST.Node):
+        tmp = tmp.safe_substitute({token: replacement})
+    else:
+        tmp = tmp.safe_substitute({token: replacement.accept(self)})
+    return tmp
+
+
+def legacyReplaceTokenList(self, text, token, repl_list, delim='\n'):
+    '''ASTVisitor.replaceTokenList as it was, one replacement at a time.'''
+    if len(repl_list) == 0:
+        return self.replaceToken(text, token, '')
+
+    tmp = text
+    for i in range(0, len(repl_list) - 1):
+        if not isinstance(repl_list[i], testAST.Node):
+            sub = repl_list[i] + delim + '$' + token
+        else:
+            sub = repl_list[i].accept(self) + delim + '$' + token
+        tmp = self.replaceToken(tmp, token, sub)
+    tmp = self.replaceToken(tmp, token, repl_list[-1])
+    return str(tmp)
+
+
+def check():
+    '''Return the number of failed checks.'''
+    errors = 0
+    rnd = random.Random(1788)
+    # a visitor without a specification, its texts are not compiled
+    visitor = testAST.ASTVisitor(None, None)
+    for _ in range(20000):
+        text = ''.join(rnd.choice(PIECES) for _ in range(rnd.randint(0, 8)))
+        token = rnd.choice(['ARG1', 'ARG2', 'ARG10'])
+        replacement = rnd.choice(['x', '$ARG1', '$$', '\\1', ''])
+        expected = string.Template(text).safe_substitute({token: replacement})
+        if testAST.CompiledTemplate(text).substitute(token, replacement) \
+                != expected \
+                or visitor.replaceToken(text, token, replacement) != expected:
+            print('%r: %r differs' % (text, token))
+            errors += 1
+        replacements = [rnd.choice(['x', 'ARG1', '$ARG1', '$$', '\\1', ''])
+                        for _ in range(rnd.randint(0, 3))]
+        delim = rnd.choice(['\n', '$', ''])
+        if visitor.replaceTokenList(text, token, replacements, delim) \
+                != legacyReplaceTokenList(visitor, text, token, replacements,
+                                          delim):
+            print('%r: list %r of %r differs' % (text, replacements, token))
+            errors += 1
+    asts = corpus()
+    for paths, cbPath in SPECS:
+        if translate(asts, paths, cbPath, True)[0] \
+                != translate(asts, paths, cbPath)[0]:
+            print('%s: translations differ' % paths[0])
+            errors += 1
+    return errors
+
+
+def corpus():
+    '''Return the ASTs of the files in itl/.'''
+    return [dslparser.parse(os.path.join(ITL_DIR, name), scanner='fast',
+                            backend='rd')
+            for name in sorted(os.listdir(ITL_DIR)) if name.endswith('.itl')]
+
+
+def translate(asts, paths, cbPath, legacy=False):
+    '''
+    Return the translations of asts and the best time, with the former
+    replaceToken and replaceTokenList if legacy is set.
+    '''
+    specs = []
+    for path in paths:
+        with open(os.path.join(SRC_DIR, 'plugins', path)) as f:
+            specs.append(yaml.safe_load(f))
+    out = lang.OutputSpecification(*specs)
+    methods = (testAST.ASTVisitor.replaceToken,
+               testAST.ASTVisitor.replaceTokenList)
+    if legacy:
+        testAST.ASTVisitor.replaceToken = legacyReplaceToken
+        testAST.ASTVisitor.replaceTokenList = legacyReplaceTokenList
+    try:
+        times = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            result = [ast.accept(testAST.ASTVisitor(out, cbPath))
+                      for ast in asts]
+            times.append(time.perf_counter() - start)
+    finally:
+        (testAST.ASTVisitor.replaceToken,
+         testAST.ASTVisitor.replaceTokenList) = methods
+    return result, min(times)
+
+
+def main():
+    # the callbacks of the plugins are imported relative to the source
+    # directory
+    os.chdir(SRC_DIR)
+    errors = check()
+    print('replace: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    asts = corpus()
+    print('%-10s %14s %14s' % ('', 'former [s]', 'compiled [s]'))
+    for paths, cbPath in SPECS:
+        legacy = translate(asts, paths, cbPath, True)[1]
+        compiled = translate(asts, paths, cbPath)[1]
+        print('%-10s %14.3f %14.3f' % (paths[0].split('/')[0], legacy,
+                                       compiled))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Scaling benchmark of the ITL parser.
+
+Parses synthetic ITL files with a growing number of tests in a single
+testcase and prints the parse time per test, with parse, with iterparse and
+for splitTestcases alone when the file is read line by line. For a linear
+parser the time per test stays constant.
+
+Usage: python3 bench_scaling.py [numTests ...]
+'''
+
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import writeSyntheticFile
+import dslparser
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def timed(function):
+    '''Return the result of function and the time of the call.'''
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def split(path):
+    '''Return the blocks of a file read line by line.'''
+    with open(path) as f:
+        return list(dslparser.splitTestcases(f))
+
+
+def iterparse(path):
+    '''Return the testcases of iterparse.'''
+    return [node for node in dslparser.iterparse(path)
+            if isinstance(node, dslparser.TestcaseNode)]
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or DEFAULT_SIZES
+    # build the parser before the first measurement
+    dslparser.parse(os.path.join(os.path.dirname(__file__), '..', 'itl',
+                                 'abs_rev.itl'))
+
+    print('%10s %12s %14s %14s %14s' % ('tests', 'parse [s]',
+                                        'per test [us]', 'iterparse [us]',
+                                        'split [us]'))
+    for n in sizes:
+        fd, path = tempfile.mkstemp(suffix='.itl')
+        os.close(fd)
+        try:
+            writeSyntheticFile(path, n)
+            ast, elapsed = timed(lambda: dslparser.parse(path))
+            assert sum(len(tc.tests) for tc in ast.testcases) == n
+            del ast
+            testcases, iterElapsed = timed(lambda: iterparse(path))
+            assert sum(len(tc.tests) for tc in testcases) == n
+            del testcases
+            blocks, splitElapsed = timed(lambda: split(path))
+            with open(path) as f:
+                assert ''.join(text for text, _ in blocks).strip() \
+                    == f.read().strip()
+        finally:
+            os.remove(path)
+        print('%10d %12.3f %14.2f %14.2f %14.2f'
+              % (n, elapsed, elapsed / n * 1e6, iterElapsed / n * 1e6,
+                 splitElapsed / n * 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Conformance check and benchmark of the fast scanner.
+
+First checks that dslparser.Scanner emits the same tokens (type, value,
+line number and position) as the PLY lexer for all files in itl/ and exits
+with status 1 otherwise. Then compares the tokenizing throughput of both
+and the time and result of both for pathological input, which would make
+the regexes rescan the input without the guards of the lexers.
+
+Usage: python3 bench_scanner.py
+'''
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+from synthetic import ITL_DIR
+import dslparser
+import ply.lex as lex
+
+PATHOLOGICAL = [
+    ('unterminated string', lambda n: '"' + '\\"' * (n // 2)),
+    ('zero run', lambda n: '0' * n),
+    ('digit run', lambda n: '1' * n + '.'),
+    ('hex digit run', lambda n: '0x' + 'f' * n + 'p'),
+    ('unterminated comments', lambda n: '/*' * (n // 2)),
+]
+
+
+# repetitions of the throughput measurement, the best time is reported
+REPEAT = 5
+
+
+def tokenize(lexer, data):
+    '''Return the tokens of data as a list of tuples.'''
+    lexer.lineno = 1
+    lexer.input(data)
+    return [(t.type, t.value, t.lineno, t.lexpos)
+            for t in iter(lexer.token, None)]
+
+
+def timed(lexer, data):
+    '''Return the time to tokenize data and a short description.'''
+    start = time.perf_counter()
+    try:
+        # the PLY lexer prints an error for every illegal character
+        with contextlib.redirect_stdout(io.StringIO()):
+            lexer.lineno = 1
+            lexer.input(data)
+            n = len(list(iter(lexer.token, None)))
+        result = '%d tokens' % n
+    except IOError as e:
+        result = str(e)
+    return time.perf_counter() - start, result
+
+
+def main():
+    plyLexer = lex.lex(module=dslparser)
+    scanner = dslparser.Scanner()
+
+    # conformance
+    files = sorted(os.path.join(ITL_DIR, f) for f in os.listdir(ITL_DIR)
+                   if f.endswith('.itl'))
+    failed = False
+    totalPly = totalFast = 0.0
+    print('%-34s %8s %10s %10s %8s' % ('file', 'tokens', 'ply [ms]',
+                                       'fast [ms]', 'speedup'))
+    for path in files:
+        data = open(path).read()
+        expected = tokenize(plyLexer, data)
+        actual = tokenize(scanner, data)
+        tPly = min(timed(plyLexer, data)[0] for i in range(REPEAT))
+        tFast = min(timed(scanner, data)[0] for i in range(REPEAT))
+        totalPly += tPly
+        totalFast += tFast
+        if expected != actual:
+            failed = True
+            print('MISMATCH in', path)
+        print('%-34s %8d %10.2f %10.2f %8.2f' % (os.path.basename(path),
+              len(expected), tPly * 1000, tFast * 1000, tPly / tFast))
+    print('%-34s %8s %10.2f %10.2f %8.2f\n' % ('total', '', totalPly * 1000,
+          totalFast * 1000, totalPly / totalFast))
+    if failed:
+        sys.exit(1)
+
+    # pathological input
+    print('%-22s %8s %10s %10s  %s' % ('input', 'size', 'ply [ms]',
+                                       'fast [ms]', 'ply / fast result'))
+    for name, make in PATHOLOGICAL:
+        for n in (1000, 10000, 100000, 1000000):
+            data = make(n)
+            tPly, resultPly = timed(plyLexer, data)
+            tFast, resultFast = timed(scanner, data)
+            print('%-22s %8d %10.2f %10.2f  %s' % (name, n, tPly * 1000,
+                                                   tFast * 1000, resultPly))
+            if resultFast != resultPly:
+                print('%-22s %8s %10s %10s  %s' % ('', '', '', '',
+                                                   resultFast))
+
+if __name__ == '__main__':
+    main()
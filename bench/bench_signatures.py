@@ -0,0 +1,117 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Benchmark of the signatures of the tests.
+
+Translates all files in itl/ for every specification of the plugins, once
+with the signatures computed by the parser and once with a visitor which
+computes the signature of every test again on every visit, as the visitor
+did before. Checks that both give the same output and exits with status 1
+otherwise, then reports the times per specification.
+
+Usage: python3 bench_signatures.py
+'''
+
+import os
+import sys
+import time
+
+import yaml
+
+from synthetic import SRC_DIR, ITL_DIR
+import discovery
+import dslparser
+import lang
+import testAST
+
+# repetitions of the measurement, the best time is reported
+REPEAT = 3
+
+
+class PerSpecVisitor(testAST.ASTVisitor):
+
+    '''A visitor which computes the signature of a test on every visit.'''
+
+    def visitTestNode(self, node):
+        node.annotate()
+        return testAST.ASTVisitor.visitTestNode(self, node)
+
+
+def translate(asts, spec, visitorClass):
+    '''Return the translations of asts and the best time.'''
+    language, testLib, arithLib = spec
+    dicts = []
+    for path in (os.path.join(language, 'lang.yaml'),
+                 os.path.join(language, 'test', testLib, 'test.yaml'),
+                 os.path.join(language, 'arith', arithLib, 'arith.yaml')):
+        with open(os.path.join(SRC_DIR, 'plugins', path)) as f:
+            dicts.append(yaml.safe_load(f))
+    out = lang.OutputSpecification(*dicts)
+    cbPath = discovery.getCbPath(language)
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = [ast.accept(visitorClass(out, cbPath)) for ast in asts]
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    # the plugins are found relative to the source directory
+    os.chdir(SRC_DIR)
+    asts = [dslparser.parse(os.path.join(ITL_DIR, name))
+            for name in sorted(os.listdir(ITL_DIR)) if name.endswith('.itl')]
+    numTests = sum(len(testcase.tests) for ast in asts
+                   for testcase in ast.testcases)
+
+    specs = discovery.getSpecList()
+    print('%d tests, %d specifications' % (numTests, len(specs)))
+    print('%-36s %12s %12s' % ('', 'per spec [s]', 'parsed [s]'))
+    errors = 0
+    total = [0.0, 0.0]
+    for spec in specs:
+        perSpec, perSpecTime = translate(asts, spec, PerSpecVisitor)
+        parsed, parsedTime = translate(asts, spec, testAST.ASTVisitor)
+        if perSpec != parsed:
+            print('%s: translations differ' % (spec,))
+            errors += 1
+        total[0] += perSpecTime
+        total[1] += parsedTime
+        print('%-36s %12.3f %12.3f' % (', '.join(spec), perSpecTime,
+                                       parsedTime))
+    print('%-36s %12.3f %12.3f' % ('total', total[0], total[1]))
+    print('signatures computed: %d per spec, %d parsed'
+          % (numTests * len(specs), numTests))
+    print('signatures: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
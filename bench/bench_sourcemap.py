@@ -0,0 +1,165 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check of the source positions and benchmark of the source map lookup.
+
+First checks that every TestNode and TestcaseNode of the files in itl/
+points at its operation name or 'testcase' keyword, for all scanners and
+backends and for the incremental, streaming and parallel parsers. The
+incremental check moves the blocks of a file by inserting lines, so the
+cached positions have to be shifted. Exits with status 1 on a mismatch.
+Then times the lookup of lines in a source map with numRanges tests.
+
+Usage: python3 bench_sourcemap.py [numRanges]
+'''
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from synthetic import ITL_DIR
+from astcompare import dump
+import astcache
+import dslparser
+import sourcemap
+
+DEFAULT_SIZE = 1000000
+
+LOOKUPS = 100000
+
+
+def checkPositions(path, ast, lines):
+    '''Return the number of nodes of ast with a wrong position.'''
+    errors = 0
+    for testcase in ast.testcases:
+        nodes = [(testcase, 'testcase')]
+        nodes += [(test, test.opName.ident.val) for test in testcase.tests]
+        for node, word in nodes:
+            line, column = node.position
+            if not lines[line - 1][column - 1:].startswith(word):
+                print('%s:%d:%d: expected %s' % (path, line, column, word))
+                errors += 1
+    return errors
+
+
+def parsers(path):
+    '''Yield the name and the AST of every way to parse the file.'''
+    for scanner in dslparser.SCANNERS:
+        for backend in dslparser.BACKENDS:
+            yield scanner + '/' + backend, dslparser.parse(
+                path, scanner=scanner, backend=backend)
+    yield 'iterparse', dslparser.DSLNode(
+        [node for node in dslparser.iterparse(path)
+         if isinstance(node, dslparser.TestcaseNode)])
+    yield 'parallel', dslparser.parallelParse(path, jobs=2)
+    ast, diagnostics = dslparser.recoverParse(path)
+    yield 'recover', ast
+
+
+def checkShift(source, directory):
+    '''Return True if the cache shifts the positions of moved blocks.'''
+    path = os.path.join(directory, os.path.basename(source))
+    shutil.copy(source, path)
+    cache = astcache.ASTCache(os.path.join(directory, 'cache'))
+    cache.parse(path)
+
+    with open(path) as f:
+        lines = f.readlines()
+    # insert lines in front of a testcase in the middle of the file
+    starts = [i for i, line in enumerate(lines)
+              if line.startswith('testcase')]
+    i = starts[len(starts) // 2]
+    lines[i:i] = ['\n', '// moved\n', '\n']
+    with open(path, 'w') as f:
+        f.writelines(lines)
+    return dump(cache.parse(path)) == dump(dslparser.parse(path))
+
+
+def benchLookup(numRanges):
+    '''Print the time of LOOKUPS lookups in a map of numRanges tests.'''
+    sourceMap = sourcemap.SourceMap('synthetic.cpp')
+    line = 1
+    testsPerTestcase = 100
+    for i in range(0, numRanges, testsPerTestcase):
+        first = line
+        for j in range(min(testsPerTestcase, numRanges - i)):
+            line += 1
+            sourceMap.addTest(line, line + 2, 'synthetic.itl',
+                              (i + j + 2, 1))
+            line += 3
+        sourceMap.addTestcase(first, line, 'synthetic.itl', (i + 1, 1),
+                              'tc%d' % i)
+        line += 2
+
+    rnd = random.Random(1788)
+    queries = [rnd.randint(1, line) for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for query in queries:
+        sourceMap.lookup(query)
+    elapsed = time.perf_counter() - start
+    print('%d lookups in a map of %d tests: %.3f s, %.2f us per lookup' %
+          (LOOKUPS, numRanges, elapsed, elapsed / LOOKUPS * 1e6))
+
+
+def main():
+    numRanges = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    errors = 0
+    for name in sorted(os.listdir(ITL_DIR)):
+        if not name.endswith('.itl'):
+            continue
+        path = os.path.join(ITL_DIR, name)
+        with open(path) as f:
+            lines = f.read().split('\n')
+        for parser, ast in parsers(path):
+            count = checkPositions(path, ast, lines)
+            if count:
+                print('%s: %d wrong positions with %s' % (name, count,
+                                                          parser))
+            errors += count
+
+    directory = tempfile.mkdtemp()
+    try:
+        if not checkShift(os.path.join(ITL_DIR, 'libieeep1788_tests_elem.itl'),
+                          directory):
+            print('MISMATCH of the shifted positions of the cached blocks')
+            errors += 1
+    finally:
+        shutil.rmtree(directory)
+    print('positions: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    benchLookup(numRanges)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Startup benchmark of the dslparser module.
+
+Measures the time to import dslparser and to parse a small ITL file in a
+fresh interpreter, once with an empty table cache (cold) and once with the
+cached parser tables of a previous run (warm).
+
+Usage: python3 bench_startup.py [repetitions]
+'''
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+ITL_FILE = os.path.join(BENCH_DIR, '..', 'itl', 'abs_rev.itl')
+
+SNIPPET = '''
+import time
+t0 = time.perf_counter()
+import dslparser
+t1 = time.perf_counter()
+dslparser.parse(%r)
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+''' % ITL_FILE
+
+
+def run(cacheDir):
+    '''Run the snippet in a new interpreter and return the timings.'''
+    env = dict(os.environ, ITF1788_CACHE_DIR=cacheDir)
+    out = subprocess.check_output([sys.executable, '-c', SNIPPET],
+                                  cwd=SRC_DIR, env=env)
+    return [float(v) for v in out.split()]
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    cacheDir = tempfile.mkdtemp(prefix='itf1788-bench-')
+    try:
+        cold = []
+        warm = []
+        for i in range(repetitions):
+            shutil.rmtree(cacheDir, ignore_errors=True)
+            cold.append(run(cacheDir))
+            warm.append(run(cacheDir))
+    finally:
+        shutil.rmtree(cacheDir, ignore_errors=True)
+
+    print('%-6s %12s %12s %12s' % ('', 'import [ms]', 'parse [ms]',
+                                   'total [ms]'))
+    for name, runs in (('cold', cold), ('warm', warm)):
+        imp = median([r[0] for r in runs]) * 1000
+        first = median([r[1] for r in runs]) * 1000
+        print('%-6s %12.2f %12.2f %12.2f' % (name, imp, first, imp + first))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+'''
+Check and benchmark of the testcase templates.
+
+First turns every testcase of the files in itl/ into a template for float,
+double and long_double and checks for every type that the instance equals
+the testcase parsed from a copy with suffixed literals, that the arith_
+keys of the template for the type are the ones of the instance and that
+invalid type lists are rejected. Exits with status 1 otherwise. Then compares the size and the parse time of a synthetic file
+of templates with the file of the copies for all types.
+
+Usage: python3 bench_templates.py [numTests]
+'''
+
+import os
+import re
+import sys
+import time
+
+from synthetic import ITL_DIR, TESTS
+from astcompare import dump
+import dslparser
+import testAST
+
+DEFAULT_TESTS = 20000
+
+TESTS_PER_TESTCASE = 50
+
+TYPES = ['float', 'double', 'long_double']
+
+# repetitions of the measurement, the best time is reported
+REPEAT = 3
+
+_testcaseHead = re.compile(r'(testcase\s+[a-zA-Z][a-zA-Z0-9_.\s]*?)\s*\{')
+
+# tokens of the literals which take the type parameter
+_TYPED_TOKENS = ('FLOAT', 'INF', 'NAI', 'EMPTY', 'ENTIRE')
+
+
+def template(text):
+    '''Return text with every testcase turned into a template of TYPES.'''
+    return _testcaseHead.sub(
+        lambda m: m.group(1) + ' [' + ', '.join(TYPES) + '] {', text)
+
+
+def instanceText(text, dataType):
+    '''
+    Return text with the testcase names and the unsuffixed literals changed
+    like the instances of the templates for dataType.
+    '''
+    lexer = dslparser.Parser().lexer
+    lexer.input(text)
+    suffix = testAST.TYPE_SUFFIXES[dataType]
+    ends = [tok.lexpos + len(tok.value) for tok in iter(lexer.token, None)
+            if tok.type in _TYPED_TOKENS and tok.value[-1] not in 'FLfl']
+    parts = []
+    prev = 0
+    for end in ends:
+        parts.append(text[prev:end] + suffix)
+        prev = end
+    parts.append(text[prev:])
+    return _testcaseHead.sub(lambda m: m.group(1) + '_' + dataType + ' {',
+                             ''.join(parts))
+
+
+def check():
+    '''Return the number of errors of the templates.'''
+    errors = 0
+    for name in sorted(os.listdir(ITL_DIR)):
+        if not name.endswith('.itl'):
+            continue
+        with open(os.path.join(ITL_DIR, name)) as f:
+            text = f.read()
+        for backend in ('lalr', 'rd'):
+            parser = dslparser.Parser(backend=backend)
+            ast = parser.parseString(template(text), name)
+            for dataType in TYPES:
+                ref = parser.parseString(instanceText(text, dataType),
+                                         name)
+                got = [t.instantiate(dataType) for t in ast.testcases]
+                if dump(got) != dump(ref.testcases):
+                    print('%s %s %s: instance differs' % (name, backend,
+                                                          dataType))
+                    errors += 1
+                if any(sorted(testAST._arithKeys(t, dataType)) !=
+                       sorted(testAST._arithKeys(i))
+                       for t, i in zip(ast.testcases, got)):
+                    print('%s %s %s: keys differ from the instance' % (
+                        name, backend, dataType))
+                    errors += 1
+    for types in ('quad', 'float, float'):
+        text = 'testcase t [%s] {\n    neg [1.0, 2.0] = [-2.0, -1.0];\n}\n'
+        for backend in ('lalr', 'rd'):
+            parser = dslparser.Parser(backend=backend)
+            try:
+                parser.parseString(text % types, 't.itl')
+            except IOError:
+                continue
+            print('%s: [%s] accepted' % (backend, types))
+            errors += 1
+    return errors
+
+
+def synthetic(numTests, templates):
+    '''Return the text of a file with numTests tests for all TYPES.'''
+    lines = []
+    for i in range(numTests):
+        if i % TESTS_PER_TESTCASE == 0:
+            if i:
+                lines.append('}\n')
+            lines.append('testcase synthetic_%d {\n' % i)
+        lines.append('    ' + TESTS[i % len(TESTS)] + '\n')
+    lines.append('}\n')
+    text = ''.join(lines)
+    if templates:
+        return template(text)
+    return ''.join(instanceText(text, dataType) for dataType in TYPES)
+
+
+def best(function):
+    '''Return the best time of REPEAT calls of function.'''
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    errors = check()
+    print('templates of itl/: %d errors' % errors)
+    if errors:
+        sys.exit(1)
+
+    numTests = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TESTS
+    parser = dslparser.Parser()
+    copies = synthetic(numTests, False)
+    templates = synthetic(numTests, True)
+
+    def instantiate():
+        for testcase in parser.parseString(templates, 't.itl').testcases:
+            for dataType in TYPES:
+                testcase.instantiate(dataType)
+
+    print('%d tests for %d types' % (numTests, len(TYPES)))
+    print('copies:    %8d bytes  parse %.3f s' % (
+        len(copies), best(lambda: parser.parseString(copies, 'c.itl'))))
+    print('templates: %8d bytes  parse %.3f s  parse and instantiate %.3f s'
+          % (len(templates),
+             best(lambda: parser.parseString(templates, 't.itl')),
+             best(instantiate)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''
+Concurrency check and benchmark of dslparser.Parser.
+
+Parses all files in itl/ in a thread pool, every thread with its own
+Parser, and checks that the ASTs are the same as the ones of a sequential
+run. Exits with status 1 otherwise. Then prints the time of both runs.
+
+Usage: python3 bench_threads.py [numThreads]
+'''
+
+import concurrent.futures
+import os
+import sys
+import time
+
+from synthetic import ITL_DIR
+from astcompare import dump
+import dslparser
+
+DEFAULT_THREADS = 4
+
+# every file is parsed this many times to keep the threads busy
+ROUNDS = 4
+
+
+def main():
+    numThreads = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_THREADS
+    files = sorted(os.path.join(ITL_DIR, f) for f in os.listdir(ITL_DIR)
+                   if f.endswith('.itl')) * ROUNDS
+
+    start = time.perf_counter()
+    expected = [dump(dslparser.parse(path)) for path in files]
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(numThreads) as pool:
+        actual = list(pool.map(lambda path: dump(dslparser.parse(path)),
+                               files))
+    threaded = time.perf_counter() - start
+
+    if expected != actual:
+        print('MISMATCH between the sequential and the threaded run')
+        sys.exit(1)
+    print('%d files checked' % len(files))
+    print('sequential: %.3f s' % sequential)
+    print('%d threads:  %.3f s' % (numThreads, threaded))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+'''Generate synthetic ITL files for the benchmarks.'''
+
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.normpath(os.path.join(BENCH_DIR, '..', 'src'))
+ITL_DIR = os.path.normpath(os.path.join(BENCH_DIR, '..', 'itl'))
+
+# the benchmarks import the modules of the generator directly
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# test lines in the style of the libieeep1788 tests, used round robin
+TESTS = [
+    'add [-1.0,1.0] [0.5,2.0] = [-0.5,3.0];',
+    'pos [entire]_def = [entire]_def;',
+    'sqr [-infinity,-0X1.8P+1] = [0X1.2P+3,infinity];',
+    'neg [empty] = [empty];',
+    'mul [-2.0,-1.0]_com [3.0,4.0]_dac = [-8.0,-3.0]_dac;',
+    'isEmpty [1.0,2.0] = false;',
+    'exp [0.0,1.0] = [1.0,0X2.B7E151628AED4P+0] <= [1.0,3.0];',
+    'overlap [1.0,2.0] [3.0,4.0] = before;',
+]
+
+
+def writeSyntheticFile(path, numTests, testsPerTestcase=None):
+    '''
+    Write an ITL file with numTests tests to path.
+
+    Arguments:
+    path -- path of the file to write
+    numTests -- total number of tests
+    testsPerTestcase -- maximal number of tests in a testcase, all tests are
+                        put into one testcase if None
+    '''
+    if testsPerTestcase is None:
+        testsPerTestcase = numTests
+    with open(path, 'w') as f:
+        f.write('/*\nSynthetic benchmark file with %d tests\n*/\n\n'
+                % numTests)
+        written = 0
+        testcase = 0
+        while written < numTests:
+            f.write('testcase synthetic_%d {\n' % testcase)
+            count = min(testsPerTestcase, numTests - written)
+            for i in range(written, written + count):
+                if i % 100 == 0:
+                    f.write('    // test %d\n' % i)
+                f.write('    ' + TESTS[i % len(TESTS)] + '\n')
+            f.write('}\n\n')
+            written += count
+            testcase += 1
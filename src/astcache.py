@@ -0,0 +1,426 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+"""Persistent cache of the ASTs of ITL files, keyed on their contents."""
+
+import gc
+import hashlib
+import io
+import os
+import pickle
+
+import dslparser
+import literals
+import testAST
+
+# bump to invalidate all cached ASTs, e.g. if the pickling of nodes changes
+AST_CACHE_VERSION = 3
+
+# directory of the cached ASTs
+AST_CACHE_DIR = os.path.join(dslparser.CACHE_DIR, 'ast')
+
+# default size cap of the cache directory in bytes
+MAX_SIZE = 256 * 1024 * 1024
+
+# file name suffix of the cache entries
+SUFFIX = '.ast'
+
+
+def versionTag():
+    """
+    Return a hash of the code which builds and defines the AST.
+
+    The tag is part of every key, so a change of the parser or of the node
+    classes never returns an AST built by the old code.
+    """
+    h = hashlib.sha256()
+    h.update(repr((AST_CACHE_VERSION, pickle.HIGHEST_PROTOCOL)).encode())
+    for module in (dslparser, literals, testAST):
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+# the classes of the literal nodes which the parser shares, see
+# dslparser.share
+_LITERAL_CLASSES = frozenset([
+    testAST.NotAnIntervalNode, testAST.EmptyIntervalNode,
+    testAST.EntireIntervalNode, testAST.InfSupIntervalNode,
+    testAST.DecorationLiteralNode, testAST.FloatingPointNode,
+    testAST.InfinityLiteralNode, testAST.IntegerLiteralNode,
+    testAST.StringLiteralNode, testAST.BooleanLiteralNode,
+    testAST.OverlapLiteralNode])
+
+
+class _Pickler(pickle.Pickler):
+
+    """
+    Pickler of the blocks of an entry.
+
+    The literal nodes are loaded through dslparser.share, so a cached AST
+    shares its literal nodes like a parsed one, also with the ASTs of the
+    other files in the flyweight table.
+    """
+
+    def reducer_override(self, obj):
+        """Reduce a literal node to a call of _loadLiteral."""
+        cls = type(obj)
+        if cls in _LITERAL_CLASSES:
+            return _loadLiteral, (cls, tuple((name, getattr(obj, name))
+                                             for name in obj.fields()))
+        return NotImplemented
+
+
+def _loadLiteral(cls, items):
+    """
+    Return the shared node of a pickled literal.
+
+    Arguments:
+    cls -- the class of the literal node
+    items -- a tuple of the (name, value) pairs of the attributes of the node
+    """
+    node = cls.__new__(cls)
+    for name, value in items:
+        setattr(node, name, value)
+    return dslparser.share(node)
+
+
+def dumps(block):
+    """
+    Return the pickle of a block of an entry.
+
+    Arguments:
+    block -- a TestcaseNode object or the IncludeNode of an include directive
+    """
+    f = io.BytesIO()
+    _Pickler(f, pickle.HIGHEST_PROTOCOL).dump(block)
+    return f.getvalue()
+
+
+def shiftLines(block, delta):
+    """
+    Move the positions of a testcase and its tests by a number of lines.
+
+    Arguments:
+    block -- a TestcaseNode object or the IncludeNode of an include directive
+    delta -- the number of lines, negative to move them up
+    """
+    if not delta:
+        return
+    nodes = [block]
+    if isinstance(block, testAST.TestcaseNode):
+        nodes += block.tests
+    for node in nodes:
+        if node.position is not None:
+            line, column = node.position
+            node.setPosition(line + delta, column)
+
+
+class ASTCache(object):
+
+    """
+    A directory of pickled DSLNode objects with a size cap.
+
+    Every entry is a file named by the SHA-256 of the version tag and the
+    contents of an ITL file. The modification time of an entry is its last
+    use: a hit touches the file and the least recently used entries are
+    removed when the directory grows beyond the cap.
+
+    Entries are written under a temporary name and renamed, so several
+    processes can share the directory: a reader sees a complete entry or
+    none, and an entry removed by another process is a miss.
+
+    An entry is a tuple (comment, blocks) of the comment of the file and a
+    list of (hash, pickle, line) tuples, one per testcase block: the SHA-256
+    of the start column and the text of the block, its pickled TestcaseNode
+    and the line number of the block. The literal nodes of a block are
+    shared when it is loaded, see dumps. For every path the cache keeps the
+    key of the last parsed version, so if the file is edited, only the
+    blocks with a new hash are parsed again. The positions of a block which
+    moved to another line are shifted when it is loaded.
+    """
+
+    def __init__(self, directory=AST_CACHE_DIR, maxSize=MAX_SIZE,
+                 incremental=True):
+        """
+        Initialize the cache, the directory is created on the first put.
+
+        Arguments:
+        directory -- path of the cache directory
+        maxSize -- size cap of the directory in bytes
+        incremental -- reuse the unchanged testcases of an edited file
+        """
+        self.directory = directory
+        self.maxSize = maxSize
+        self.incremental = incremental
+        self.tag = versionTag().encode()
+        # the estimated size of the directory, see put
+        self.size = None
+
+    def key(self, contents):
+        """
+        Return the key of the contents of an ITL file.
+
+        Arguments:
+        contents -- the contents of the file as bytes
+        """
+        h = hashlib.sha256(self.tag)
+        h.update(contents)
+        return h.hexdigest()
+
+    def path(self, key):
+        """
+        Return the path of the entry of a key.
+
+        Arguments:
+        key -- a key as returned by key
+        """
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def fileKey(self, testFilePath):
+        """
+        Return the key of the last parsed version of an ITL file.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        """
+        h = hashlib.sha256(self.tag)
+        h.update(b'file:' + os.path.abspath(testFilePath).encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached object of a key or None.
+
+        Arguments:
+        key -- a key as returned by key or fileKey
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return pickle.loads(data)
+        except Exception:
+            # a missing or corrupt entry is a miss, it is replaced by the
+            # next put
+            return None
+
+    def put(self, key, obj):
+        """
+        Store an object and evict old entries if the cache is too large.
+
+        The directory is scanned on the first put only, afterwards its size
+        is estimated from the entries written by this object. It is scanned
+        again when the estimate exceeds the size cap, so the entries of
+        other processes are counted then.
+
+        Errors of the file system are ignored, the cache is optional.
+
+        Arguments:
+        key -- a key as returned by key or fileKey
+        obj -- an entry or the key of an entry
+        """
+        path = self.path(key)
+        tmpPath = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmpPath, 'wb') as f:
+                pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+                written = f.tell()
+            try:
+                replaced = os.stat(path).st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmpPath, path)
+        except OSError:
+            return
+        if self.size is None:
+            self.evict()
+            return
+        self.size += written - replaced
+        if self.size > self.maxSize:
+            self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries beyond the size cap and set
+        the size of the directory.
+        """
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                # removed by another process
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+            total += stat.st_size
+        entries.sort()
+        for mtime, size, name in entries:
+            if total <= self.maxSize:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+        self.size = total
+
+    def parse(self, testFilePath, scanner='ply', backend='lalr', jobs=1,
+              pool=None):
+        """
+        Return the AST of the test file, from the cache if possible.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        scanner -- the scanner to use, see dslparser.SCANNERS
+        backend -- the parser to use, see dslparser.BACKENDS
+        jobs -- number of processes, see dslparser.parse
+        pool -- the process pool of a parallel parse, see dslparser.parse
+        """
+        with open(testFilePath, 'rb') as f:
+            data = f.read()
+        key = self.key(data)
+        entry = self.get(key)
+        if entry is not None:
+            return self.load(entry, testFilePath)
+
+        # the blocks of the last parsed version of the file
+        previous = {}
+        if self.incremental:
+            fileKey = self.fileKey(testFilePath)
+            oldKey = self.get(fileKey)
+            old = self.get(oldKey) if oldKey is not None else None
+            if old is not None:
+                previous = dict((h, (blob, line))
+                                for h, blob, line in old[1])
+
+        ast, entry = self.parseEntry(testFilePath, data, previous, scanner,
+                                     backend, jobs, pool)
+        self.put(key, entry)
+        if self.incremental:
+            self.put(fileKey, key)
+        return ast
+
+    def parseEntry(self, testFilePath, data, previous, scanner, backend,
+                   jobs, pool=None):
+        """
+        Return the AST of the test file and its entry.
+
+        Only the blocks which are not in previous are parsed. The file is
+        parsed as a whole if previous is empty.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        data -- the contents of the file as bytes
+        previous -- maps the hash of a block to a tuple of its pickled
+                    TestcaseNode and its line number
+        scanner -- the scanner to use, see dslparser.SCANNERS
+        backend -- the parser to use, see dslparser.BACKENDS
+        jobs -- number of processes for a parse of the whole file
+        pool -- the process pool of a parse of the whole file
+        """
+        spans = dslparser.scanTestcases(data)
+        # the column is part of the hash, only the lines are shifted
+        hashes = []
+        columns = []
+        for name, start, end, line in spans:
+            columns.append(dslparser.offsetColumn(data, start))
+            h = hashlib.sha256(b'%d:' % columns[-1])
+            h.update(data[start:end])
+            hashes.append(h.digest())
+
+        if not previous or not spans:
+            ast = dslparser.parse(testFilePath, scanner=scanner,
+                                  backend=backend, jobs=jobs, pool=pool)
+        else:
+            p = dslparser.threadParser(scanner, backend)
+            comment = p.parseHead(data, spans)
+            testcases = []
+            enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for (name, start, end, line), h, column in zip(
+                        spans, hashes, columns):
+                    if h in previous:
+                        blob, oldLine = previous[h]
+                        testcase = pickle.loads(blob)
+                        shiftLines(testcase, line - oldLine)
+                        testcases.append(testcase)
+                    else:
+                        testcases.append(p.parseBlock(
+                            data[start:end].decode(), line, column))
+            finally:
+                if enabled:
+                    gc.enable()
+            p.parseTail(data, spans)
+            ast = testAST.DSLNode(testcases)
+            if comment is not None:
+                ast.appendComment(comment)
+            ast.setFileName(testFilePath.split('/')[-1])
+
+        comment = ast.comments[0] if ast.comments else None
+        blocks = []
+        for (name, start, end, line), h, testcase in zip(spans, hashes,
+                                                          ast.testcases):
+            blob, oldLine = previous.get(h, (None, None))
+            if blob is None or oldLine != line:
+                blob = dumps(testcase)
+            blocks.append((h, blob, line))
+        return ast, (comment, blocks)
+
+    def load(self, entry, testFilePath):
+        """
+        Return the AST of an entry.
+
+        Arguments:
+        entry -- the entry as returned by get
+        testFilePath -- path to the file as a string
+        """
+        comment, blocks = entry
+        # the collector would traverse the new nodes repeatedly
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            ast = testAST.DSLNode([pickle.loads(blob)
+                                   for h, blob, line in blocks])
+        finally:
+            if enabled:
+                gc.enable()
+        if comment is not None:
+            ast.appendComment(comment)
+        # equal contents may be cached under another file name
+        ast.setFileName(testFilePath.split('/')[-1])
+        return ast
@@ -0,0 +1,695 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+"""
+A columnar store of the tests of an ITL file for very large corpora.
+
+The tests are kept in arrays of integers instead of a graph of TestNode,
+InputsNode and literal nodes. Every distinct literal is stored once in a
+pool, the tests refer to it by its index, and all strings are kept once in
+a string table. The store is read through views, which look like the nodes
+to an ASTVisitor, so it is translated like a DSLNode:
+
+    store = columnar.parse('big.itl')
+    content, warnings = store.accept(visitor)
+
+An ASTVisitor translates the tests from the columns, without a view or a
+node per test, and every distinct literal once, see translateTest. The
+attributes of a view build the nodes of its test when they are read, for
+the other visitors and for digest. The literal nodes are built once per
+distinct literal and shared by all tests.
+"""
+
+from array import array
+import os
+
+import dslparser
+from testAST import *
+
+# codes of the kinds of the literals in the pool
+FLOAT = 1
+INTEGER = 2
+INFINITY = 3
+STRING = 4
+BOOLEAN = 5
+OVERLAP = 6
+NAI = 7
+EMPTY = 8
+ENTIRE = 9
+INF_SUP = 10
+
+# the literal classes whose value is the string of their val attribute
+_VAL_KINDS = {StringLiteralNode: STRING, BooleanLiteralNode: BOOLEAN,
+              OverlapLiteralNode: OVERLAP}
+_VAL_CLASSES = dict((kind, cls) for cls, kind in _VAL_KINDS.items())
+
+# the special intervals, their value is the string of their type
+_SPECIAL_KINDS = {NotAnIntervalNode: NAI, EmptyIntervalNode: EMPTY,
+                  EntireIntervalNode: ENTIRE}
+_SPECIAL_CLASSES = dict((kind, cls) for cls, kind in _SPECIAL_KINDS.items())
+
+# the decorations by their code, 0 stands for no decoration
+DECORATIONS = (None, 'trv', 'def', 'dac', 'com', 'ill')
+_DECORATION_CODES = dict((d, i) for i, d in enumerate(DECORATIONS))
+
+
+class ColumnStore(Node):
+
+    """
+    The testcases and tests of an ITL file in columns.
+
+    Tests -- one entry per test in ops, signatures, lines and columns, three
+    entries per test in starts. ops holds the string of the operation name,
+    signatures the string of the signature, see TestNode.annotate, lines and
+    columns the position or 0 if the test has none. starts holds the offsets
+    of the inputs, the tightest and the accurate outputs in refs, each range
+    ends where the next one starts, the last one at the end of refs. An
+    empty range stands for missing inputs or outputs, the parser never
+    builds empty ones. refs holds the pool indices of the literals.
+
+    Literal pool -- one entry per distinct literal in kinds, decorations,
+    values and extras. kinds holds the kind code, decorations the code of
+    the decoration, see DECORATIONS. values holds the string of the text of
+    a number, of a string, boolean or overlap and of the type of a special
+    interval, or the pool index of the lower bound of an inf-sup interval.
+    extras holds the pool index of the upper bound of an inf-sup interval.
+
+    Testcases -- one entry per testcase in testcaseNames, testcaseStarts,
+    testcaseLines, testcaseColumns and testcaseFiles. testcaseStarts holds
+    the index of the first test, the tests end where the next testcase
+    starts. Testcase templates are kept as nodes in templates, they are
+    instantiated for the output specification like in a DSLNode.
+
+    Strings -- the string table, the columns hold indices into it. Index 0
+    stands for None.
+
+    Comments are rare and kept as nodes in dictionaries, indexed by the test
+    or the testcase.
+    """
+
+    def __init__(self):
+        """Initialize an empty ColumnStore."""
+        self.strings = [None]
+        self._stringIds = {None: 0}
+
+        self.kinds = array('B')
+        self.decorations = array('B')
+        self.values = array('I')
+        self.extras = array('I')
+        self._literalIds = {}
+        # the nodes of the pool, built by literalNode
+        self._literalNodes = []
+
+        self.ops = array('I')
+        self.signatures = array('I')
+        self.starts = array('I')
+        self.refs = array('I')
+        self.lines = array('I')
+        self.columns = array('I')
+        self.testComments = {}
+        # the OperationNameNode objects by their string, see TestView
+        self._opNames = {}
+        # the last visitor and the translations of the literals of the pool
+        # by it, see _literalTexts
+        self._translation = None
+
+        self.testcaseNames = array('I')
+        self.testcaseStarts = array('I')
+        self.testcaseLines = array('I')
+        self.testcaseColumns = array('I')
+        self.testcaseFiles = array('I')
+        self.testcaseComments = {}
+        self.templates = {}
+        # the QualidentNode objects by their string, see TestcaseView
+        self._qualidents = {}
+
+        self.comments = []
+        self.fileName = None
+
+    def accept(self, visitor):
+        """Translate the store like a DSLNode."""
+        return visitor.visitDSLNode(self)
+
+    def digest(self):
+        """Return the digest of the DSLNode of the store, see Node.digest."""
+        return structuralDigest('DSLNode', [('testcases', self.testcases)])
+
+    def appendComment(self, comment):
+        """
+        Add a global comment to the file.
+
+        Arguments:
+        comment -- A LineCommentNode object or a BlockCommentNode object
+        """
+        self.comments += [comment]
+
+    def setFileName(self, fileName):
+        """
+        Set the name of the file.
+
+        Arguments:
+        fileName -- name of the file as a string
+        """
+        self.fileName = fileName
+
+    def string(self, value):
+        """
+        Return the index of a string in the string table, it is added on the
+        first call.
+
+        Arguments:
+        value -- a string or None
+        """
+        index = self._stringIds.get(value)
+        if index is None:
+            index = self._stringIds[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def literal(self, node):
+        """
+        Return the pool index of a literal, it is added on the first call.
+
+        Arguments:
+        node -- a literal node
+        """
+        cls = type(node)
+        decoration = 0
+        extra = 0
+        if cls is FloatingPointNode:
+            kind, value = FLOAT, self.string(node.val)
+        elif cls is IntegerLiteralNode:
+            kind, value = INTEGER, self.string(node.val)
+        elif cls is InfinityLiteralNode:
+            kind, value = INFINITY, self.string(node.value.text)
+        elif cls in _VAL_KINDS:
+            kind, value = _VAL_KINDS[cls], self.string(node.val)
+        elif cls in _SPECIAL_KINDS:
+            kind, value = _SPECIAL_KINDS[cls], self.string(node.dataType)
+        elif cls is InfSupIntervalNode:
+            kind = INF_SUP
+            value = self.literal(node.inf)
+            extra = self.literal(node.sup)
+        else:
+            raise IOError('Not a literal: ' + cls.__name__)
+        if getattr(node, 'decoration', None) is not None:
+            decoration = _DECORATION_CODES[node.decoration.val]
+
+        key = (kind, decoration, value, extra)
+        index = self._literalIds.get(key)
+        if index is None:
+            index = self._literalIds[key] = len(self.kinds)
+            self.kinds.append(kind)
+            self.decorations.append(decoration)
+            self.values.append(value)
+            self.extras.append(extra)
+            self._literalNodes.append(None)
+        return index
+
+    def literalNode(self, index):
+        """
+        Return the node of a literal of the pool.
+
+        The node is built on the first call and shared by all tests, like
+        the literal nodes of the parser, see dslparser.share.
+
+        Arguments:
+        index -- the pool index of the literal
+        """
+        node = self._literalNodes[index]
+        if node is not None:
+            return node
+        kind = self.kinds[index]
+        value = self.values[index]
+        # the numbers are built like the parser builds them
+        if kind == FLOAT:
+            node = dslparser._floatingPointNode(self.strings[value])
+        elif kind == INTEGER:
+            node = dslparser._integerNode(self.strings[value])
+        elif kind == INFINITY:
+            node = dslparser._infinityNode(self.strings[value])
+        elif kind in _VAL_CLASSES:
+            node = _VAL_CLASSES[kind](self.strings[value])
+        elif kind in _SPECIAL_CLASSES:
+            node = _SPECIAL_CLASSES[kind]()
+            node.setType(self.strings[value])
+        else:
+            node = InfSupIntervalNode(self.literalNode(value),
+                                      self.literalNode(self.extras[index]))
+        decoration = self.decorations[index]
+        if decoration:
+            node.setDecoration(dslparser.share(
+                DecorationLiteralNode(DECORATIONS[decoration])))
+        node = self._literalNodes[index] = dslparser.share(node)
+        return node
+
+    def append(self, testcase):
+        """
+        Append a testcase, the tests of its generators are stored one by one.
+
+        Raise an IOError for an include directive, the includes must be
+        resolved before, see dslparser.IncludeResolver.
+
+        Arguments:
+        testcase -- a TestcaseNode object
+        """
+        if isinstance(testcase, IncludeNode):
+            raise IOError('Unresolved include of ' + testcase.path)
+        index = len(self.testcaseNames)
+        self.testcaseNames.append(self.string(testcase.name.val))
+        self.testcaseStarts.append(len(self.ops))
+        line, column = testcase.position or (0, 0)
+        self.testcaseLines.append(line)
+        self.testcaseColumns.append(column)
+        self.testcaseFiles.append(self.string(testcase.fileName))
+        if testcase.comments:
+            self.testcaseComments[index] = list(testcase.comments)
+        if isinstance(testcase, TestcaseTemplateNode):
+            self.templates[index] = testcase
+            return
+        # the pool indices of the literal nodes by their id, the nodes are
+        # kept alive by the testcase while it is appended
+        nodeIds = {}
+        for test in testcase.iterTests():
+            self._appendTest(test, nodeIds)
+
+    def _appendTest(self, test, nodeIds):
+        """
+        Append a test to the columns.
+
+        Arguments:
+        test -- a TestNode object
+        nodeIds -- the pool indices of the literal nodes of the testcase by
+                   their id
+        """
+        index = len(self.ops)
+        self.ops.append(self.string(test.opName.ident.val))
+        self.signatures.append(self.string(test.signature))
+        refs = self.refs
+        for literals in (test.inputs, test.tightestOutputs,
+                         test.accurateOutputs):
+            self.starts.append(len(refs))
+            if literals is not None:
+                for n in literals.literals:
+                    ref = nodeIds.get(id(n))
+                    if ref is None:
+                        ref = nodeIds[id(n)] = self.literal(n)
+                    refs.append(ref)
+        line, column = test.position or (0, 0)
+        self.lines.append(line)
+        self.columns.append(column)
+        if test.comments:
+            self.testComments[index] = list(test.comments)
+
+    @property
+    def testcases(self):
+        """
+        The testcases as a list of TestcaseView objects and of the
+        TestcaseTemplateNode objects of the templates.
+        """
+        return [self.templates.get(i) or TestcaseView(self, i)
+                for i in range(len(self.testcaseNames))]
+
+    def testCount(self):
+        """Return the number of tests."""
+        return len(self.ops)
+
+    def nbytes(self):
+        """Return the size of the columns in bytes."""
+        columns = (self.kinds, self.decorations, self.values, self.extras,
+                   self.ops, self.signatures, self.starts, self.refs, self.lines,
+                   self.columns, self.testcaseNames, self.testcaseStarts,
+                   self.testcaseLines, self.testcaseColumns,
+                   self.testcaseFiles)
+        return sum(c.itemsize * len(c) for c in columns)
+
+    def _literals(self, start, end, cls):
+        """
+        Return the literals of a range of refs as a node of class cls or None
+        for an empty range.
+        """
+        if start == end:
+            return None
+        literalNode = self.literalNode
+        return cls([literalNode(i) for i in self.refs[start:end]])
+
+    def _opName(self, index):
+        """Return the OperationNameNode of a string index."""
+        node = self._opNames.get(index)
+        if node is None:
+            node = self._opNames[index] = OperationNameNode(
+                IdentifierNode(self.strings[index]))
+        return node
+
+    def _qualident(self, index):
+        """Return the QualidentNode of a string index."""
+        node = self._qualidents.get(index)
+        if node is None:
+            node = self._qualidents[index] = QualidentNode(
+                self.strings[index])
+        return node
+
+    def _testRange(self, index):
+        """Return the range of the indices of the tests of a testcase."""
+        starts = self.testcaseStarts
+        if index + 1 < len(starts):
+            return starts[index], starts[index + 1]
+        return starts[index], len(self.ops)
+
+    def _literalTexts(self, visitor):
+        """
+        Return the list of the translations of the literals of the pool by a
+        visitor, indexed like the pool, None for a literal which is not
+        translated yet.
+
+        The translations of the last visitor are kept, a visitor translates
+        the whole store before the next one is used, see ASTVisitor.
+        """
+        translation = self._translation
+        if translation is None or translation[0] is not visitor:
+            translation = self._translation = (visitor, [])
+        texts = translation[1]
+        if len(texts) < len(self.kinds):
+            texts.extend([None] * (len(self.kinds) - len(texts)))
+        return texts
+
+    def _translateRange(self, visitor, texts, start, end):
+        """Return the translations of the literals of a range of refs."""
+        result = []
+        for ref in self.refs[start:end]:
+            text = texts[ref]
+            if text is None:
+                text = texts[ref] = self.literalNode(ref).accept(visitor)
+            result.append(text)
+        return result
+
+    def _translateOutputs(self, visitor, texts, start, end):
+        """
+        Return the translations of the outputs of a range of refs like
+        ASTVisitor.visitTightestOutputsNode or None for an empty range.
+        """
+        if start == end:
+            return None
+        kinds = self.kinds
+        decorations = self.decorations
+        return [(text, kinds[ref] == INF_SUP and decorations[ref] != 0)
+                for ref, text in zip(self.refs[start:end],
+                                     self._translateRange(visitor, texts,
+                                                          start, end))]
+
+    def translateTest(self, visitor, index):
+        """
+        Return the translation of a test like ASTVisitor.visitTestNode, read
+        from the columns.
+
+        Every literal of the pool is translated once per visitor.
+
+        Arguments:
+        visitor -- an ASTVisitor object
+        index -- the index of the test
+        """
+        comments = self.testComments.get(index)
+        commentText = '\n'.join([c.accept(visitor) for c in comments]) \
+            if comments else ''
+        texts = self._literalTexts(visitor)
+        starts = self.starts
+        first = 3 * index
+        inputs, tightest, accurate = starts[first:first + 3]
+        end = starts[first + 3] if first + 3 < len(starts) else len(self.refs)
+
+        inputList = self._translateRange(visitor, texts, inputs, tightest)
+        opPrefix = 'arith_op_' + self._opName(self.ops[index]).accept(visitor)
+        opName = visitor.testOperation(
+            opPrefix, self.strings[self.signatures[index]])
+        if not opName:
+            return ""
+        return visitor.translateTest(
+            commentText, inputList, opName,
+            self._translateOutputs(visitor, texts, tightest, accurate),
+            self._translateOutputs(visitor, texts, accurate, end))
+
+    def translateTests(self, visitor, index):
+        """
+        Yield the tuples (test, text) of the tests of a testcase for
+        ASTVisitor.translateTestcase.
+
+        The tests are translated from the columns, unless the visitor
+        overrides visitTestNode. test is a TestView if the visitor builds a
+        source map or visits the views, None otherwise.
+
+        Arguments:
+        visitor -- an ASTVisitor object
+        index -- the index of the testcase
+        """
+        columns = _readsColumns(visitor, 'visitTestNode')
+        views = visitor.buildSourceMap or not columns
+        for i in range(*self._testRange(index)):
+            view = TestView(self, i) if views else None
+            if columns:
+                yield view, self.translateTest(visitor, i)
+            else:
+                yield view, visitor.visitTestNode(view)
+
+
+def _readsColumns(visitor, name):
+    """
+    Return whether a visitor translates the views of a store from the
+    columns, i.e. it is an ASTVisitor which does not override the visit
+    method of the name.
+
+    Arguments:
+    visitor -- a visitor object
+    name -- the name of a visit method, e.g. 'visitTestNode'
+    """
+    return getattr(type(visitor), name, None) is getattr(ASTVisitor, name)
+
+
+class TestView(Node):
+
+    """
+    A read-only view of a test of a ColumnStore, it has the attributes of a
+    TestNode and is translated like one.
+    """
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        """
+        Initialize a TestView.
+
+        Arguments:
+        store -- a ColumnStore object
+        index -- the index of the test
+        """
+        self.store = store
+        self.index = index
+
+    def accept(self, visitor):
+        """
+        Translate the test like a TestNode, from the columns for an
+        ASTVisitor, see ColumnStore.translateTest.
+        """
+        if _readsColumns(visitor, 'visitTestNode'):
+            return self.store.translateTest(visitor, self.index)
+        return visitor.visitTestNode(self)
+
+    def digest(self):
+        """Return the digest of the TestNode of the view, see Node.digest."""
+        return structuralDigest('TestNode', [
+            ('opName', self.opName), ('inputs', self.inputs),
+            ('tightestOutputs', self.tightestOutputs),
+            ('accurateOutputs', self.accurateOutputs)])
+
+    def _range(self, i):
+        """Return the start and the end of the i-th range of the test."""
+        starts = self.store.starts
+        start = 3 * self.index + i
+        end = starts[start + 1] if start + 1 < len(starts) else \
+            len(self.store.refs)
+        return starts[start], end
+
+    @property
+    def opName(self):
+        """The OperationNameNode of the test."""
+        return self.store._opName(self.store.ops[self.index])
+
+    @property
+    def inputs(self):
+        """The InputsNode of the test or None."""
+        return self.store._literals(*self._range(0), cls=InputsNode)
+
+    @property
+    def tightestOutputs(self):
+        """The TightestOutputsNode of the test or None."""
+        return self.store._literals(*self._range(1), cls=TightestOutputsNode)
+
+    @property
+    def accurateOutputs(self):
+        """The AccurateOutputsNode of the test or None."""
+        return self.store._literals(*self._range(2), cls=AccurateOutputsNode)
+
+    @property
+    def signature(self):
+        """The signature of the test, see TestNode.annotate."""
+        return self.store.strings[self.store.signatures[self.index]]
+
+    @property
+    def comments(self):
+        """The comments of the test."""
+        return self.store.testComments.get(self.index, [])
+
+    @property
+    def position(self):
+        """The (line, column) of the test or None."""
+        line = self.store.lines[self.index]
+        return (line, self.store.columns[self.index]) if line else None
+
+
+class TestcaseView(TestcaseNode):
+
+    """
+    A read-only view of a testcase of a ColumnStore, it has the attributes
+    of a TestcaseNode and is translated like one.
+    """
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        """
+        Initialize a TestcaseView.
+
+        Arguments:
+        store -- a ColumnStore object
+        index -- the index of the testcase
+        """
+        self.store = store
+        self.index = index
+
+    def accept(self, visitor):
+        """
+        Translate the testcase like a TestcaseNode, from the columns for an
+        ASTVisitor, see ColumnStore.translateTests.
+        """
+        if _readsColumns(visitor, 'visitTestcaseNode'):
+            return visitor.translateTestcase(
+                self, self.store.translateTests(visitor, self.index))
+        return visitor.visitTestcaseNode(self)
+
+    def digest(self):
+        """
+        Return the digest of the TestcaseNode of the view, see Node.digest.
+        The tests of generators are stored one by one, so the digest is the
+        one of the testcase with the expanded tests.
+        """
+        return structuralDigest('TestcaseNode', [('name', self.name),
+                                                 ('tests', self.tests)])
+
+    def iterTests(self):
+        """Yield the tests of the testcase as TestView objects."""
+        store = self.store
+        for i in range(*store._testRange(self.index)):
+            yield TestView(store, i)
+
+    @property
+    def tests(self):
+        """The tests of the testcase as a list of TestView objects."""
+        return list(self.iterTests())
+
+    @property
+    def name(self):
+        """The QualidentNode of the name of the testcase."""
+        return self.store._qualident(self.store.testcaseNames[self.index])
+
+    @property
+    def comments(self):
+        """The comments of the testcase."""
+        return self.store.testcaseComments.get(self.index, [])
+
+    @property
+    def position(self):
+        """The (line, column) of the testcase or None."""
+        line = self.store.testcaseLines[self.index]
+        if not line:
+            return None
+        return (line, self.store.testcaseColumns[self.index])
+
+    @property
+    def fileName(self):
+        """The path of the file of the testcase or None."""
+        return self.store.strings[self.store.testcaseFiles[self.index]]
+
+
+def fromAST(ast):
+    """
+    Return a ColumnStore with the testcases of a DSLNode.
+
+    Arguments:
+    ast -- a DSLNode object with resolved includes
+    """
+    store = ColumnStore()
+    for comment in ast.comments:
+        store.appendComment(comment)
+    for testcase in ast.testcases:
+        store.append(testcase)
+    store.setFileName(ast.fileName)
+    return store
+
+
+def parse(testFilePath, scanner='ply', backend='lalr', includes=None):
+    """
+    Return a ColumnStore for the test file.
+
+    The file is parsed one testcase at a time, see dslparser.iterparse, so
+    the nodes of only one testcase are held in memory at once, apart from
+    the ASTs of the included files.
+
+    Arguments:
+    testFilePath -- path to the file as a string
+    scanner -- the scanner to use, see dslparser.SCANNERS
+    backend -- the parser to use, see dslparser.BACKENDS
+    includes -- a dslparser.IncludeResolver which parses the included files,
+                an include directive raises an IOError if None. The
+                testcases of the file are named after its path then, like
+                the testcases of the files parsed by the resolver.
+    """
+    store = ColumnStore()
+    directory = os.path.dirname(testFilePath)
+    for item in dslparser.iterparse(testFilePath, scanner, backend):
+        if isinstance(item, (LineCommentNode, BlockCommentNode)):
+            store.appendComment(item)
+        elif includes is None:
+            store.append(item)
+        elif isinstance(item, IncludeNode):
+            path = os.path.normpath(os.path.join(directory, item.path))
+            for testcase in includes.parse(path).testcases:
+                store.append(testcase)
+        else:
+            item.setFileName(testFilePath)
+            store.append(item)
+    store.setFileName(testFilePath.split('/')[-1])
+    return store
@@ -26,10 +26,23 @@
 
 '''Lexer and Parser. Process the DSL test files and build an AST'''
 
+import bisect
+import concurrent.futures
+import copy
+import functools
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import re
+import sys
+import threading
 import ply.lex as lex
 from ply.lex import TOKEN
 import ply.yacc as yacc
 from testAST import *
+import literals as numericLiterals
 
 #
 # Lexer
@@ -40,6 +53,8 @@ from testAST import *
 # the token type will be assigned to the key's value.
 reserved = {
     'testcase': 'TESTCASE',
+    'include': 'INCLUDE',
+    'set': 'SET',
 
     'trv': 'TRV',
     'def': 'DEF',
@@ -185,6 +200,8 @@ def t_FLOAT(t):
 @TOKEN(integerConstant)
 def t_INT(t):
     """Return the parsed int value."""
+    if t.value[-1] == '0':
+        _checkZeroRun(t.lexer.lexdata, t.lexer.lexpos, t.lexer.lineno)
     return t
 
 
@@ -259,20 +276,405 @@ def t_newline(t):
 
 # error handling for an unknown token
 def t_error(t):
-    """Skip invalid tokens and print an error message."""
-    print("Illegal character '%s' in line %d" % (t.value[0], t.lexer.lineno))
-    t.lexer.skip(1)
+    """Skip invalid tokens and print or report an error message."""
+    skip = _lexError(t.lexer, t.lexer.lexdata, t.lexpos, t.lexer.lineno)
+    t.lexer.lineno += t.lexer.lexdata.count('\n', t.lexpos, t.lexpos + skip)
+    t.lexer.skip(skip)
+
+
+# Guard against the quadratic behaviour of the regexes on malformed input.
+# Every zero of a run like '000' is a token of its own, and for each of them
+# the float regex scans the rest of the run again. Likewise the string and
+# comment regexes scan to the end of the line or file again for every
+# character after an unterminated string or comment.
+MAX_ZERO_RUN = 64
+_zeroRun = re.compile('0*')
+# an unterminated string up to the end of its line, a newline escaped by a
+# backslash is part of the string
+_unterminatedString = re.compile(r'"(?:[^\\\n]|\\(?:.|\n))*\\?')
+
+
+def _lexError(lexer, data, pos, lineno):
+    """
+    Handle a character which is not the start of a token and return the
+    number of characters to skip.
+
+    An unterminated string or comment raises an IOError, unless the report
+    attribute of the lexer is set to a function report(message, lineno,
+    lexpos). It is reported once then and skipped, the string up to the
+    end of its line and the comment up to the end of the input, so the
+    lexer does not scan its contents again. An illegal character is
+    printed or reported and skipped.
 
+    Arguments:
+    lexer -- the PLY lexer or the Scanner
+    data -- the input of the lexer
+    pos -- the position of the character in data
+    lineno -- the line number of the character
+    """
+    report = getattr(lexer, 'report', None)
+    if data[pos] == '"':
+        message = 'unterminated string'
+    elif data.startswith('/*', pos) or data.startswith('#*', pos):
+        message = 'unterminated comment'
+    else:
+        message = "illegal character '%s'" % data[pos]
+        if report is None:
+            print("Illegal character '%s' in line %d" % (data[pos], lineno))
+    if report is not None:
+        report(message, lineno, pos)
+    elif not message.startswith('illegal'):
+        raise IOError(message.capitalize() + ' in line %d' % lineno)
+    if message == 'unterminated string':
+        return _unterminatedString.match(data, pos).end() - pos
+    if message == 'unterminated comment':
+        return len(data) - pos
+    return 1
+
+
+def _checkZeroRun(data, pos, lineno):
+    """Raise an IOError if more than MAX_ZERO_RUN zeros start at pos."""
+    if _zeroRun.match(data, pos).end() - pos > MAX_ZERO_RUN:
+        raise IOError('Too many zeros in line %d' % lineno)
+
+
+#
+# Fast scanner
+#
+
+def _rule(name):
+    """Return the regex of the t_* rule as a named group."""
+    f = globals()['t_' + name]
+    return '(?P<%s>%s)' % (name, getattr(f, 'regex', f.__doc__))
+
+# The scanner matches all tokens with one regex. PLY tries the rules in the
+# order of their definition and takes the first match. Each alternative of
+# the scanner regex is guarded by a lookahead for the characters a token
+# can start with, and the order of the rules is kept among the rules which
+# can start with the same character. This gives the same tokens, but the
+# regex engine skips most rules at once. Literals and blanks are checked
+# first since no rule starts with them, except for '.' which starts a float.
+_scannerRegex = re.compile('|'.join([
+    r'(?P<literal>[{};=<_\[\],])',
+    r'(?P<ignore>[ \t]+)',
+    r'(?=[-+.0-9])(?:' + _rule('FLOAT') + '|' + _rule('INT') + ')',
+    r'(?=[-+ine])(?:' + _rule('INF') + '|' + _rule('NAI') + '|' +
+    _rule('EMPTY') + '|' + _rule('ENTIRE') + ')',
+    r'(?=[a-zA-Z])' + _rule('ID'),
+    r'(?=")' + _rule('STRING'),
+    r'(?=/)(?:' + _rule('BLOCK_COMMENT') + '|' + _rule('LINE_COMMENT') + ')',
+    r'(?=\#)(?:' + _rule('IGNORED_BLOCK_COMMENT') + '|' +
+    _rule('IGNORED_LINE_COMMENT') + ')',
+    _rule('newline'),
+    r'(?P<dot>\.)',
+    r'(?P<error>.)']), re.VERBOSE)
+
+class Scanner(object):
+
+    """
+    Fast replacement for the PLY lexer.
+
+    The scanner emits the same token stream as the lexer built from the t_*
+    rules, but tokenizes the whole input at once with a single regex and
+    without a function call per token.
+
+    Like the PLY lexer it raises an IOError for an unterminated string or
+    comment and for a run of more than MAX_ZERO_RUN zeros. The regexes would
+    scan to the end of the line or file again and again for such input.
+
+    Errors are printed, or passed to the report attribute if it is set to a
+    function report(message, lineno, lexpos). Only the run of zeros raises
+    an IOError then.
+    """
+
+    def __init__(self):
+        """Initialize a Scanner."""
+        self.lineno = 1
+        self.lexpos = 0
+        self.lexdata = ''
+        self.report = None
+        self._tokens = iter(())
+
+    def input(self, data):
+        """
+        Set the input of the scanner.
+
+        Arguments:
+        data -- the text to tokenize
+        """
+        self.lexdata = data
+        self.lexpos = 0
+        self._tokens = iter(self.tokenize(data))
+
+    def token(self):
+        """Return the next token or None at the end of the input."""
+        return next(self._tokens, None)
+
+    def tokenize(self, data):
+        """
+        Return the tokens of data as a list of LexToken objects.
+
+        The line count starts at the value of the lineno attribute.
+
+        Arguments:
+        data -- the text to tokenize
+        """
+        tokens = []
+        append = tokens.append
+        lineno = self.lineno
+
+        # the scan is resumed behind an unterminated string or comment
+        pos = 0
+        while pos is not None:
+            lineno, pos = self._scan(data, pos, lineno, append)
+
+        self.lineno = lineno
+        self.lexpos = len(data)
+        return tokens
+
+    def _scan(self, data, pos, lineno, append):
+        """
+        Append the tokens of data from pos on.
+
+        Return a tuple (lineno, pos) of the line number and the position
+        behind an unterminated string or comment, pos is None at the end of
+        the input.
+        """
+        LexToken = lex.LexToken
+        for m in _scannerRegex.finditer(data, pos):
+            kind = m.lastgroup
+            if kind == 'ignore':
+                continue
+            value = m.group()
+            if kind == 'newline':
+                lineno += len(value)
+                continue
+
+            tok = LexToken()
+            if kind == 'literal' or kind == 'dot':
+                tok.type = value
+            elif kind == 'ID':
+                tok.type = reserved.get(value, 'ID')
+            elif kind == 'IGNORED_LINE_COMMENT':
+                continue
+            elif kind == 'IGNORED_BLOCK_COMMENT':
+                lineno += value.count('\n')
+                continue
+            elif kind == 'error':
+                skip = _lexError(self, data, m.start(), lineno)
+                if skip > 1:
+                    pos = m.start() + skip
+                    return lineno + data.count('\n', m.start(), pos), pos
+                continue
+            else:
+                tok.type = kind
+                if kind == 'INT' and value[-1] == '0':
+                    _checkZeroRun(data, m.end(), lineno)
+            tok.value = value
+            tok.lineno = lineno
+            tok.lexpos = m.start()
+            append(tok)
+            if kind == 'BLOCK_COMMENT':
+                lineno += value.count('\n')
+        return lineno, None
+
+
+#
+# Literal nodes
+#
+# The nodes of the literals are built by these functions for the grammar
+# rules as well as for the recursive descent parser.
+#
+
+# Set to False to give every literal its own node, e.g. to compare the memory
+# usage, see share.
+SHARE_LITERALS = True
+
+# Flyweight table of the literal nodes: maps the key of a literal to the node
+# which is shared by all its occurrences, see share. The nodes in the table
+# must never be modified.
+_flyweights = {}
+_flyweightLock = threading.Lock()
+# the maximal number of nodes in the flyweight table, the table is cleared
+# when it is full, so the memory stays bounded in a long run
+MAX_FLYWEIGHTS = 1 << 16
+# the number of calls of share, counted without the lock, so it is
+# approximate while several threads parse at once
+_shareCount = [0]
+# the number of nodes put into the flyweight table
+_flyweightCount = [0]
+
+
+def _literalKey(node):
+    '''
+    Return a hashable key of a literal node, equal for literals with the same
+    text, type and decoration.
+
+    Arguments:
+    node -- a complete literal node, i.e. with its decoration
+    '''
+    cls = type(node)
+    if cls is InfSupIntervalNode:
+        decoration = node.decoration
+        return (cls, _literalKey(node.inf), _literalKey(node.sup),
+                decoration.val if decoration is not None else None)
+    if cls is EntireIntervalNode:
+        decoration = node.decoration
+        return (cls, node.dataType,
+                decoration.val if decoration is not None else None)
+    if cls is NotAnIntervalNode or cls is EmptyIntervalNode:
+        return (cls, node.dataType)
+    if cls is InfinityLiteralNode:
+        # 'infinity' and '+infinity' have different texts of their values
+        value = node.value
+        return (cls, node.sign, node.dataType,
+                value.text if value is not None else None)
+    # the text determines the type and the value of the other literals
+    return (cls, node.val)
+
+
+def share(node):
+    '''
+    Return the shared node of a literal.
+
+    The first node of a literal is put into the flyweight table and returned
+    for all later literals with the same key, so the nodes of a literal must
+    not be modified once they are shared. The table holds at most
+    MAX_FLYWEIGHTS nodes, it is cleared when it is full, so the literals
+    after that get new nodes, which are shared again.
+
+    Arguments:
+    node -- a complete literal node, i.e. with its decoration
+    '''
+    if not SHARE_LITERALS:
+        return node
+    _shareCount[0] += 1
+    key = _literalKey(node)
+    shared = _flyweights.get(key)
+    if shared is None:
+        with _flyweightLock:
+            if len(_flyweights) >= MAX_FLYWEIGHTS:
+                _flyweights.clear()
+            shared = _flyweights.setdefault(key, node)
+            if shared is node:
+                _flyweightCount[0] += 1
+    return shared
+
+
+def flyweightStats():
+    '''
+    Return a tuple (literals, nodes) of the number of literals passed to share
+    and the number of nodes put into the flyweight table.
+    '''
+    return _shareCount[0], _flyweightCount[0]
+
+
+def clearFlyweights():
+    '''
+    Remove all shared literal nodes and reset the statistics, e.g. between
+    files.
+    '''
+    with _flyweightLock:
+        _flyweights.clear()
+        _shareCount[0] = 0
+        _flyweightCount[0] = 0
+
+
+def _floatingType(text):
+    '''
+    Return the data type of a floating point literal by its suffix.
+
+    Arguments:
+    text -- the text of the token
+    '''
+    suffix = text[-1]
+    if suffix == 'F':
+        return 'float'
+    elif suffix == 'L':
+        return 'long_double'
+    return 'double'
+
+
+def _specialIntervalNode(cls, text):
+    '''
+    Return a node for nai, empty or entire.
+
+    Arguments:
+    cls -- NotAnIntervalNode, EmptyIntervalNode or EntireIntervalNode
+    text -- the text of the NAI, EMPTY or ENTIRE token
+    '''
+    node = cls()
+    node.setType(intervalType(_floatingType(text)))
+    return node
+
+
+def _infinityNode(text):
+    '''
+    Return an InfinityLiteralNode.
+
+    Arguments:
+    text -- the text of the INF token
+    '''
+    if text.startswith('-'):
+        node = InfinityLiteralNode('-')
+    else:
+        node = InfinityLiteralNode('+')
+    node.setType(_floatingType(text))
+    node.setValue(numericLiterals.decode(text))
+    return node
+
+
+def _floatingPointNode(text):
+    '''
+    Return a FloatingPointNode.
+
+    Arguments:
+    text -- the text of the FLOAT token
+    '''
+    node = FloatingPointNode(text)
+    node.setType(_floatingType(text))
+    node.setValue(numericLiterals.decode(text))
+    return node
+
+
+def _integerNode(text):
+    '''
+    Return an IntegerLiteralNode.
+
+    Arguments:
+    text -- the text of the INT token
+    '''
+    node = IntegerLiteralNode(text)
+
+    # append zeros to avoid if statements because of ints with too few digits
+    # this won't change the behaviour
+    suffix = ('000' + text)[-3:]
+    if 'u' in suffix:
+        unsigned = True
+    else:
+        unsigned = False
+
+    lCount = suffix.count('l') + suffix.count('L')
+
+    if lCount == 0:
+        dataType = 'int'
+    elif lCount == 1:
+        dataType = 'long'
+    else:
+        dataType = 'long_long'
+
+    node.setUnsigned(unsigned)
+    node.setType(dataType)
+    node.setValue(numericLiterals.decode(text))
+    return node
 
-# parse the input
-lexer = lex.lex()
 
 #
 # Parser
 #
 
 def p_error(t):
-    print("Illegal character '%s' in line %d" % (t.value[0], t.lexer.lineno))
+    print("Illegal character '%s' in line %d" % (t.value[0], t.lineno))
     raise IOError("Syntax error")
 
 def p_dsl_1(t):
@@ -285,30 +687,182 @@ def p_dsl_2(t):
     t[0].appendComment(t[1])
 
 
+def _position(t, n):
+    '''
+    Return the (line, column) of a symbol of a grammar rule.
+
+    Arguments:
+    t -- the YaccProduction of the rule
+    n -- the index of a terminal or of a nonterminal which passes the
+         position of its first token on, like opName
+    '''
+    lexer = t.lexer
+    return t.lineno(n), _column(lexer.lexdata, t.lexpos(n), lexer.column)
+
+
 def p_testcaseSequence_1(t):
-    '''testcaseSequence : testcaseSequence testcase'''
-    t[0] = t[1] + [t[2]]
+    '''testcaseSequence : testcaseSequence block'''
+    # append in place, copying the list would make the rule quadratic
+    t[1].append(t[2])
+    t[0] = t[1]
 
 
 def p_testcaseSequence_2(t):
-    '''testcaseSequence : testcase'''
+    '''testcaseSequence : block'''
     t[0] = [t[1]]
 
 
+def p_block(t):
+    '''block : testcase
+             | include'''
+    t[0] = t[1]
+
+
+def p_include_1(t):
+    '''include : INCLUDE STRING'''
+    t[0] = IncludeNode(t[2][1:-1])
+    t[0].setPosition(*_position(t, 1))
+
+
+def p_include_2(t):
+    '''include : comment INCLUDE STRING'''
+    t[0] = IncludeNode(t[3][1:-1])
+    t[0].appendComment(t[1])
+    t[0].setPosition(*_position(t, 2))
+
+
 def p_testcase_1(t):
-    '''testcase : TESTCASE qualident "{" testSequence "}"'''
+    '''testcase : TESTCASE qualident "{" testBody "}"'''
     t[0] = TestcaseNode(t[2], t[4])
+    t[0].setPosition(*_position(t, 1))
 
 
 def p_testcase_2(t):
-    '''testcase : comment TESTCASE qualident "{" testSequence "}"'''
+    '''testcase : comment TESTCASE qualident "{" testBody "}"'''
     t[0] = TestcaseNode(t[3], t[5])
     t[0].appendComment(t[1])
+    t[0].setPosition(*_position(t, 2))
+
+
+def p_testcase_3(t):
+    '''testcase : TESTCASE qualident "[" typeList "]" "{" testBody "}"'''
+    t[0] = _templateNode(t[2], t[4], t[7], t.lineno(1))
+    t[0].setPosition(*_position(t, 1))
+
+
+def p_testcase_4(t):
+    '''testcase : comment TESTCASE qualident "[" typeList "]" "{" testBody "}"'''
+    t[0] = _templateNode(t[3], t[5], t[8], t.lineno(2))
+    t[0].appendComment(t[1])
+    t[0].setPosition(*_position(t, 2))
+
+
+def p_typeList_1(t):
+    '''typeList : typeList "," identifier'''
+    t[1].append(t[3].val)
+    t[0] = t[1]
+
+
+def p_typeList_2(t):
+    '''typeList : identifier'''
+    t[0] = [t[1].val]
+
+
+def _templateError(types):
+    '''
+    Return a tuple (index, message) for the first invalid type parameter of
+    a testcase template or None if they are valid.
+
+    Arguments:
+    types -- the names of the types
+    '''
+    for i, dataType in enumerate(types):
+        if dataType not in TYPE_SUFFIXES:
+            return i, "unknown type '%s'" % dataType
+        if dataType in types[:i]:
+            return i, "repeated type '%s'" % dataType
+    return None
+
+
+def _templateNode(name, types, tests, line):
+    '''
+    Return a TestcaseTemplateNode, raise an IOError for invalid types.
+
+    Arguments:
+    name -- a QualidentNode object
+    types -- the names of the type parameters
+    tests -- a list of TestNode objects
+    line -- the line of the testcase for the error message
+    '''
+    error = _templateError(types)
+    if error is not None:
+        raise IOError(error[1].capitalize() + ' in line %d' % line)
+    return TestcaseTemplateNode(name, types, tests)
+
+
+def p_testBody(t):
+    '''testBody : testSequence'''
+    t[0], error = _bindSets(t[1])
+    if error is not None:
+        raise IOError(error[1].capitalize() + ' in line %d' % error[0][0])
+
+
+def _bindSets(items):
+    '''
+    Bind the named sets of the generators of a testcase and annotate the
+    tests with their signatures, see TestNode.annotate.
+
+    Return a tuple (tests, error) of the tests without the set declarations
+    and None or a tuple (position, message) for the first undefined or
+    repeated set, generator with a wrong number of outputs or test with
+    different types of its outputs. The comments of a declaration are moved
+    to the next test.
+
+    Arguments:
+    items -- the TestNode, GeneratorNode and LiteralSetNode objects of the
+             testcase
+    '''
+    sets = {}
+    tests = []
+    comments = []
+    for item in items:
+        if isinstance(item, LiteralSetNode):
+            if item.name in sets:
+                return tests, (item.position,
+                               "repeated set '%s'" % item.name)
+            sets[item.name] = item
+            comments += item.comments
+            item.comments = []
+            continue
+        if comments:
+            item.comments = comments + item.comments
+            comments = []
+        if isinstance(item, TestNode):
+            try:
+                item.annotate()
+            except IOError as e:
+                return tests, (item.position, str(e))
+        if isinstance(item, GeneratorNode):
+            for i, inputSet in enumerate(item.inputs):
+                if inputSet.literals is None:
+                    if inputSet.name not in sets:
+                        return tests, (inputSet.position, "undefined set '%s'"
+                                       % inputSet.name)
+                    item.inputs[i] = sets[inputSet.name]
+            count = item.count()
+            for outputs in (item.tightestOutputs, item.accurateOutputs):
+                if outputs is not None and len(outputs.literals) % count:
+                    return tests, (item.position,
+                                   '%d outputs for %d tests of a generator'
+                                   % (len(outputs.literals), count))
+        tests.append(item)
+    return tests, None
 
 
 def p_testSequence_1(t):
     '''testSequence : testSequence test'''
-    t[0] = t[1] + [t[2]]
+    t[1].append(t[2])
+    t[0] = t[1]
 
 
 def p_testSequence_2(t):
@@ -322,39 +876,55 @@ def p_test_comment(t):
     t[0] = t[2]
 
 
+def p_test_set(t):
+    '''test : SET identifier "=" literalSequence ";"'''
+    t[0] = LiteralSetNode(t[4], t[2].val)
+    t[0].setPosition(*_position(t, 1))
+
+
 def p_test_1(t):
     '''test : opName inputs tightestOutputs accurateOutputs ";"'''
-    t[0] = TestNode(t[1], t[2], t[3], t[4])
+    t[0] = _testNode(t[1], t[2], t[3], t[4])
+    t[0].setPosition(*_position(t, 1))
 
 
 def p_test_2(t):
     '''test : opName inputs tightestOutputs ";"'''
-    t[0] = TestNode(t[1], t[2], t[3], None)
+    t[0] = _testNode(t[1], t[2], t[3], None)
+    t[0].setPosition(*_position(t, 1))
 
 
 def p_test_3(t):
     '''test : opName inputs accurateOutputs ";"'''
-    t[0] = TestNode(t[1], t[2], None, t[3])
+    t[0] = _testNode(t[1], t[2], None, t[3])
+    t[0].setPosition(*_position(t, 1))
 
 
 def p_test_4(t):
     '''test : opName tightestOutputs accurateOutputs ";"'''
-    t[0] = TestNode(t[1], None, t[2], t[3])
+    t[0] = _testNode(t[1], None, t[2], t[3])
+    t[0].setPosition(*_position(t, 1))
 
 
 def p_test_5(t):
     '''test : opName tightestOutputs ";"'''
-    t[0] = TestNode(t[1], None, t[2], None)
+    t[0] = _testNode(t[1], None, t[2], None)
+    t[0].setPosition(*_position(t, 1))
 
 
 def p_test_6(t):
     '''test : opName accurateOutputs ";"'''
-    t[0] = TestNode(t[1], None, None, t[2])
+    t[0] = _testNode(t[1], None, None, t[2])
+    t[0].setPosition(*_position(t, 1))
 
 
 def p_opName(t):
     '''opName : identifier'''
+    t[1].val = sys.intern(t[1].val)
     t[0] = OperationNameNode(t[1])
+    # pass the position on to the test
+    t.set_lineno(0, t.lineno(1))
+    t.set_lexpos(0, t.lexpos(1))
 
 
 def p_qualident_1(t):
@@ -369,8 +939,66 @@ def p_qualident_2(t):
 
 
 def p_inputs(t):
-    '''inputs : literalSequence'''
-    t[0] = InputsNode(t[1])
+    '''inputs : inputSequence'''
+    t[0] = _inputsNode(t[1])
+
+
+def p_inputSequence_1(t):
+    '''inputSequence : inputSequence input'''
+    t[1].append(t[2])
+    t[0] = t[1]
+
+
+def p_inputSequence_2(t):
+    '''inputSequence : input'''
+    t[0] = [t[1]]
+
+
+def p_input(t):
+    '''input : literal
+             | literalSet'''
+    t[0] = t[1]
+
+
+def p_literalSet_1(t):
+    '''literalSet : "{" literalSequence "}"'''
+    t[0] = LiteralSetNode(t[2])
+    t[0].setPosition(*_position(t, 1))
+
+
+def p_literalSet_2(t):
+    '''literalSet : "{" identifier "}"'''
+    t[0] = LiteralSetNode(None, t[2].val)
+    t[0].setPosition(*_position(t, 2))
+
+
+def _inputsNode(inputs):
+    '''
+    Return an InputsNode for a list of literals or a list of LiteralSetNode
+    objects for the inputs of a generator, i.e. if there is a set among them.
+
+    Arguments:
+    inputs -- a list of literal nodes and LiteralSetNode objects
+    '''
+    if not any(isinstance(i, LiteralSetNode) for i in inputs):
+        return InputsNode(inputs)
+    return [i if isinstance(i, LiteralSetNode) else LiteralSetNode([i])
+            for i in inputs]
+
+
+def _testNode(opName, inputs, tightestOutputs, accurateOutputs):
+    '''
+    Return a TestNode or a GeneratorNode if the inputs are literal sets.
+
+    Arguments:
+    opName -- an OperationNameNode object
+    inputs -- the result of _inputsNode or None
+    tightestOutputs -- a TightestOutputsNode object or None
+    accurateOutputs -- an AccurateOutputsNode object or None
+    '''
+    if isinstance(inputs, list):
+        return GeneratorNode(opName, inputs, tightestOutputs, accurateOutputs)
+    return TestNode(opName, inputs, tightestOutputs, accurateOutputs)
 
 
 def p_tightestOutputs(t):
@@ -385,7 +1013,8 @@ def p_accurateOutputs(t):
 
 def p_literalSequence_1(t):
     '''literalSequence : literalSequence literal'''
-    t[0] = t[1] + [t[2]]
+    t[1].append(t[2])
+    t[0] = t[1]
 
 
 def p_literalSequence_2(t):
@@ -407,13 +1036,13 @@ def p_interval_1(t):
     '''intervalLiteral : notAnInterval
                        | emptyInterval
                        | bareInterval'''
-    t[0] = t[1]
+    t[0] = share(t[1])
 
 
 def p_interval_2(t):
     '''intervalLiteral : bareInterval "_" decorationLiteral'''
     t[1].setDecoration(t[3])
-    t[0] = t[1]
+    t[0] = share(t[1])
 
 
 def p_bareInterval(t):
@@ -427,37 +1056,16 @@ def p_infSupInterval_2(t):
 
 def p_emptyInterval(t):
     '''emptyInterval : "[" EMPTY "]"'''
-    t[0] = EmptyIntervalNode()
-    suffix = t[2][-1]
-    if suffix == 'F':
-        t[0].setType('interval<float>')
-    elif suffix == 'L':
-        t[0].setType('interval<long_double>')
-    else:
-        t[0].setType('interval<double>')
+    t[0] = _specialIntervalNode(EmptyIntervalNode, t[2])
 
 def p_entireInterval(t):
     '''entireInterval : "[" ENTIRE "]"'''
-    t[0] = EntireIntervalNode()
-    suffix = t[2][-1]
-    if suffix == 'F':
-        t[0].setType('interval<float>')
-    elif suffix == 'L':
-        t[0].setType('interval<long_double>')
-    else:
-        t[0].setType('interval<double>')
+    t[0] = _specialIntervalNode(EntireIntervalNode, t[2])
 
 
 def p_notAnInterval(t):
     '''notAnInterval : "[" NAI "]"'''
-    t[0] = NotAnIntervalNode()
-    suffix = t[2][-1]
-    if suffix == 'F':
-        t[0].setType('interval<float>')
-    elif suffix == 'L':
-        t[0].setType('interval<long_double>')
-    else:
-        t[0].setType('interval<double>')
+    t[0] = _specialIntervalNode(NotAnIntervalNode, t[2])
 
 
 def p_decorationLiteral(t):
@@ -466,84 +1074,40 @@ def p_decorationLiteral(t):
                          | DAC
                          | COM
                          | ILL'''
-    t[0] = DecorationLiteralNode(t[1])
+    t[0] = share(DecorationLiteralNode(t[1]))
 
 
 def p_numberLiteral(t):
     '''numberLiteral : floatingPointNumberLiteral
                      | infinityLiteral'''
-    t[0] = t[1]
+    t[0] = share(t[1])
 
 
 def p_infinityLiteral(t):
     '''infinityLiteral : INF'''
-    if t[1].startswith('-'):
-        t[0] = InfinityLiteralNode('-')
-    else:
-        t[0] = InfinityLiteralNode('+')
-    suffix = t[1][-1]
-    if suffix == 'F':
-        t[0].setType('float')
-    elif suffix == 'L':
-        t[0].setType('long_double')
-    else:
-        t[0].setType('double')
+    t[0] = _infinityNode(t[1])
 
 
 def p_floatingPointNumberLiteral(t):
     '''floatingPointNumberLiteral : FLOAT'''
-    tmp = FloatingPointNode(t[1])
-
-    suffix = t[1][-1]
-
-    if suffix == 'F':
-        dataType = 'float'
-    elif suffix == 'L':
-        dataType = 'long_double'
-    else:
-        dataType = 'double'
-
-    tmp.setType(dataType)
-    t[0] = tmp
+    t[0] = _floatingPointNode(t[1])
 
 
 def p_integerLiteral(t):
     '''integerLiteral : INT'''
-    tmp = IntegerLiteralNode(t[1])
-
-    # append zeros to avoid if statements because of ints with too few digits
-    # this won't change the behaviour
-    suffix = ('000' + t[1])[-3:]
-    if 'u' in suffix:
-        unsigned = True
-    else:
-        unsigned = False
-
-    lCount = suffix.count('l') + suffix.count('L')
-
-    if lCount == 0:
-        dataType = 'int'
-    elif lCount == 1:
-        dataType = 'long'
-    else:
-        dataType = 'long_long'
-
-    tmp.setUnsigned(unsigned)
-    tmp.setType(dataType)
-
-    t[0] = tmp
+    t[0] = share(_integerNode(t[1]))
 
 
 def p_stringLiteral(t):
     '''stringLiteral : STRING'''
     # strip "
-    t[0] = StringLiteralNode(t[1])
+    t[0] = share(StringLiteralNode(t[1]))
 
 
 def p_booleanLiteral(t):
     '''booleanLiteral : TRUE
                       | FALSE'''
-    t[0] = BooleanLiteralNode(t[1])
+    t[0] = share(BooleanLiteralNode(t[1]))
 
 
 def p_overlapLiteral(t):
@@ -563,7 +1127,7 @@ def p_overlapLiteral(t):
                        | OVERLAPPEDBY
                        | METBY
                        | AFTER'''
-    t[0] = OverlapLiteralNode(t[1])
+    t[0] = share(OverlapLiteralNode(t[1]))
 
 
 def p_comment_1(t):
@@ -579,20 +1143,1537 @@ def p_comment_2(t):
 def p_identifier(t):
     '''identifier : ID'''
     t[0] = IdentifierNode(t[1])
+    t.set_lineno(0, t.lineno(1))
+    t.set_lexpos(0, t.lexpos(1))
+
+
+#
+# Recursive descent parser
+#
+
+_COMMENTS = frozenset(['LINE_COMMENT', 'BLOCK_COMMENT'])
+_DECORATIONS = frozenset(['TRV', 'DEF', 'DAC', 'COM', 'ILL'])
+_OVERLAPS = frozenset(['BOTHEMPTY', 'FIRSTEMPTY', 'SECONDEMPTY', 'BEFORE',
+                       'MEETS', 'OVERLAPS', 'STARTS', 'CONTAINEDBY',
+                       'FINISHES', 'EQUALS', 'FINISHEDBY', 'CONTAINS',
+                       'STARTEDBY', 'OVERLAPPEDBY', 'METBY', 'AFTER'])
+_LITERALS = frozenset(['[', 'INT', 'FLOAT', 'INF', 'STRING', 'TRUE',
+                       'FALSE']) | _OVERLAPS
+# tokens which start an input of a test
+_INPUTS = _LITERALS | set(['{'])
+# tokens which end the test sequence of a testcase
+_TESTCASE_END = frozenset(['}', 'TESTCASE', 'INCLUDE', '$end'])
+
+
+def _column(data, pos, column=1):
+    '''
+    Return the column of a position in a text, starting at 1.
+
+    Arguments:
+    data -- the text
+    pos -- the index of the character in data
+    column -- the column of the first character of data
+    '''
+    start = data.rfind('\n', 0, pos)
+    if start < 0:
+        return pos + column
+    return pos - start
+
+
+def offsetColumn(data, offset):
+    '''
+    Return the column of a byte offset in the contents of a file.
+
+    Arguments:
+    data -- the contents of the file as bytes or as mmap object
+    offset -- the byte offset, e.g. the start of a span of scanTestcases
+    '''
+    start = data.rfind(b'\n', 0, offset) + 1
+    return 1 + len(data[start:offset].decode(errors='replace'))
+
+
+class Diagnostic(object):
+
+    '''
+    A syntax error found by the recovering parser, see Parser.recoverParse.
+    '''
 
+    def __init__(self, fileName, line, column, message, expected=()):
+        '''
+        Initialize a Diagnostic.
 
-yacc.yacc(debug=0, write_tables=0)
+        Arguments:
+        fileName -- name of the ITL file
+        line -- line number of the error
+        column -- column of the error, starting at 1
+        message -- description of the error
+        expected -- the types of the tokens the parser expected
+        '''
+        self.fileName = fileName
+        self.line = line
+        self.column = column
+        self.message = message
+        self.expected = tuple(sorted(expected))
 
+    def __str__(self):
+        '''Return the diagnostic in the format file:line:column: message.'''
+        text = '%s:%d:%d: %s' % (self.fileName, self.line, self.column,
+                                 self.message)
+        if self.expected:
+            expected = set(self.expected)
+            if _LITERALS <= expected:
+                expected = (expected - _LITERALS) | set(['literal'])
+            text += ', expected ' + ' '.join(sorted(expected))
+        return text
 
-def parse(testFilePath):
+
+class _Resync(Exception):
+
+    '''Raised by the recovering parser to skip to the next ';' or '}'.'''
+
+
+class RecursiveDescentParser(object):
+
+    '''
+    Hand written parser for the grammar of the p_* rules.
+
+    Build the same AST as the LALR parser with one method call per
+    nonterminal instead of one action call per reduction. The tokens are
+    read into a list first, so the parser can look at the type of any token
+    without calling the lexer.
+
+    If a list for diagnostics is given, the parser does not stop at the
+    first syntax error. It appends a Diagnostic for the error and continues
+    after the next ';' or '}'. Testcases with errors are left out of the
+    AST, as well as testcases with an error of the lexer at one of the
+    positions in lexerErrors.
+    '''
+
+    def __init__(self, diagnostics=None, fileName=None, lexdata='',
+                 column=1):
+        '''
+        Initialize a RecursiveDescentParser.
+
+        Arguments:
+        diagnostics -- a list for the syntax errors to recover from them,
+                       or None to raise an IOError for the first one
+        fileName -- name of the file for the diagnostics
+        lexdata -- the text of the tokens to compute the columns
+        column -- the column of the first character of lexdata
+        '''
+        self.diagnostics = diagnostics
+        self.fileName = fileName
+        self.lexdata = lexdata
+        self.column = column
+        self.lexerErrors = []
+
+    def parse(self, tokens, start='dsl'):
+        '''
+        Return the AST for the tokens.
+
+        Arguments:
+        tokens -- an iterable of LexToken objects
+        start -- 'dsl' for a whole file or 'block' for a single block
+        '''
+        self.tokens = list(tokens)
+        self.types = [tok.type for tok in self.tokens]
+        self.types.append('$end')
+        self.pos = 0
+        if start == 'dsl':
+            node = self._dsl()
+        else:
+            node = self._block()
+        if self.types[self.pos] != '$end':
+            self._error(('$end',))
+        return node
+
+    def _error(self, expected):
+        '''
+        Report the token at the current position as syntax error.
+
+        Arguments:
+        expected -- the types of the tokens which are valid at the position
+        '''
+        tok = None
+        if self.pos < len(self.tokens):
+            tok = self.tokens[self.pos]
+
+        if self.diagnostics is None:
+            if tok is not None:
+                print("Illegal character '%s' in line %d" %
+                      (tok.value[0], tok.lineno))
+            raise IOError("Syntax error")
+
+        if tok is None:
+            line = self.tokens[-1].lineno if self.tokens else 1
+            pos = len(self.lexdata)
+            message = 'unexpected end of input'
+        else:
+            line = tok.lineno
+            pos = tok.lexpos
+            value = tok.value.split('\n')[0]
+            if len(value) > 20:
+                value = value[:20] + '...'
+            message = "unexpected '%s'" % value
+        self.diagnostics.append(Diagnostic(self.fileName, line,
+                                           _column(self.lexdata, pos,
+                                                   self.column),
+                                           message, expected))
+        raise _Resync()
+
+    def _expect(self, tokenType):
+        '''
+        Consume a token of the type and return its value.
+
+        Arguments:
+        tokenType -- the expected type of the token
+        '''
+        if self.types[self.pos] != tokenType:
+            self._error((tokenType,))
+        self.pos += 1
+        return self.tokens[self.pos - 1].value
+
+    def _hasLexerError(self, first):
+        '''
+        Return if the lexer reported an error within the last tokens.
+
+        Arguments:
+        first -- the index of the first of the tokens
+        '''
+        if not self.lexerErrors:
+            return False
+        i = bisect.bisect_left(self.lexerErrors, self.tokens[first].lexpos)
+        return (i < len(self.lexerErrors) and
+                self.lexerErrors[i] < self.tokens[self.pos - 1].lexpos)
+
+    def _resyncTest(self):
+        '''Skip the tokens up to and including the next ';'.'''
+        types = self.types
+        # the depth of the literal sets of a generator
+        depth = 0
+        while types[self.pos] != ';' or depth > 0:
+            if types[self.pos] == '{':
+                depth += 1
+            elif types[self.pos] == '}' and depth > 0:
+                depth -= 1
+            elif types[self.pos] in _TESTCASE_END:
+                return
+            self.pos += 1
+        self.pos += 1
+
+    def _resyncTestcase(self, start):
+        '''
+        Skip the tokens up to and including the next '}'.
+
+        Stop in front of the next testcase or include directive if there is
+        no '}' before it.
+
+        Arguments:
+        start -- the position of the first token of the broken testcase
+        '''
+        types = self.types
+        while types[self.pos] not in _TESTCASE_END:
+            self.pos += 1
+        if types[self.pos] == '}':
+            self.pos += 1
+        elif (types[self.pos] in ('TESTCASE', 'INCLUDE') and
+                self.pos - 1 > start and types[self.pos - 1] in _COMMENTS):
+            # the comment belongs to the next block
+            self.pos -= 1
+        if self.pos <= start and types[start] != '$end':
+            self.pos = start + 1
+
+    def _position(self):
+        '''Return the (line, column) of the token at the current position.'''
+        tok = self.tokens[self.pos]
+        return tok.lineno, _column(self.lexdata, tok.lexpos, self.column)
+
+    def _comment(self):
+        '''comment : LINE_COMMENT | BLOCK_COMMENT'''
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        if tok.type == 'LINE_COMMENT':
+            return LineCommentNode(tok.value)
+        return BlockCommentNode(tok.value)
+
+    def _dsl(self):
+        '''dsl : [comment] block+'''
+        comment = None
+        if self.types[self.pos] in _COMMENTS:
+            comment = self._comment()
+        if self.diagnostics is None:
+            testcases = [self._block()]
+            while self.types[self.pos] != '$end':
+                testcases.append(self._block())
+        else:
+            testcases = []
+            while True:
+                start = self.pos
+                try:
+                    testcase = self._block()
+                    if testcase is not None:
+                        testcases.append(testcase)
+                except _Resync:
+                    self._resyncTestcase(start)
+                if self.types[self.pos] == '$end':
+                    break
+        node = DSLNode(testcases)
+        if comment is not None:
+            node.appendComment(comment)
+        return node
+
+    def _block(self):
+        '''block : testcase | include'''
+        pos = self.pos
+        if self.types[pos] in _COMMENTS:
+            pos += 1
+        if self.types[pos] == 'INCLUDE':
+            return self._include()
+        return self._testcase()
+
+    def _include(self):
+        '''include : [comment] INCLUDE STRING'''
+        comment = None
+        if self.types[self.pos] in _COMMENTS:
+            comment = self._comment()
+        position = self._position()
+        self._expect('INCLUDE')
+        node = IncludeNode(self._expect('STRING')[1:-1])
+        if comment is not None:
+            node.appendComment(comment)
+        node.setPosition(*position)
+        return node
+
+    def _testcase(self):
+        '''
+        testcase : [comment] TESTCASE qualident ["[" typeList "]"]
+                   "{" test+ "}"
+
+        Return None for a testcase with errors in its tests if the parser
+        recovers from errors.
+        '''
+        first = self.pos
+        comment = None
+        if self.types[self.pos] in _COMMENTS:
+            comment = self._comment()
+        elif self.types[self.pos] != 'TESTCASE':
+            self._error(('TESTCASE', 'INCLUDE') + tuple(_COMMENTS))
+        if self.types[self.pos] == 'TESTCASE':
+            position = self._position()
+        self._expect('TESTCASE')
+        name = QualidentNode(self._expect('ID'))
+        while self.types[self.pos] == '.':
+            self.pos += 1
+            name.appendIdentifier(self._expect('ID'))
+        types = None
+        if self.types[self.pos] == '[':
+            self.pos += 1
+            typePositions = [self._position()]
+            types = [self._expect('ID')]
+            while self.types[self.pos] == ',':
+                self.pos += 1
+                typePositions.append(self._position())
+                types.append(self._expect('ID'))
+            self._expect(']')
+        if self.types[self.pos] != '{':
+            self._error(('.', '[', '{') if types is None else ('{',))
+        self.pos += 1
+
+        tests = []
+        valid = True
+        while True:
+            if self.diagnostics is None:
+                tests.append(self._test())
+            else:
+                try:
+                    tests.append(self._test())
+                except _Resync:
+                    valid = False
+                    self._resyncTest()
+            if self.types[self.pos] in _TESTCASE_END:
+                break
+        self._expect('}')
+        tests, error = _bindSets(tests)
+        if error is not None:
+            if self.diagnostics is None:
+                raise IOError(error[1].capitalize() +
+                              ' in line %d' % error[0][0])
+            self.diagnostics.append(Diagnostic(self.fileName, error[0][0],
+                                               error[0][1], error[1]))
+            valid = False
+        if types is not None and self.diagnostics is not None:
+            error = _templateError(types)
+            if error is not None:
+                line, column = typePositions[error[0]]
+                self.diagnostics.append(Diagnostic(self.fileName, line,
+                                                   column, error[1]))
+                valid = False
+        if not valid or self._hasLexerError(first):
+            return None
+        if types is not None:
+            node = _templateNode(name, types, tests, position[0])
+        else:
+            node = TestcaseNode(name, tests)
+        if comment is not None:
+            node.appendComment(comment)
+        node.setPosition(*position)
+        return node
+
+    def _test(self):
+        '''
+        test : comment* opName [inputs] [tightest] [accurate] ";"
+             | comment* SET ID "=" literalSequence ";"
+        '''
+        types = self.types
+        comments = []
+        while types[self.pos] in _COMMENTS:
+            comments.append(self._comment())
+        if types[self.pos] in ('ID', 'SET'):
+            position = self._position()
+        else:
+            self._error(('ID', 'SET'))
+        if types[self.pos] == 'SET':
+            self.pos += 1
+            name = self._expect('ID')
+            self._expect('=')
+            node = LiteralSetNode(self._literalSequence(), name)
+            self._expect(';')
+        else:
+            node = self._opTest()
+        node.setPosition(*position)
+        # the innermost comment is appended first, like 'test : comment test'
+        for comment in reversed(comments):
+            node.appendComment(comment)
+        return node
+
+    def _opTest(self):
+        '''opName [inputs] [tightest] [accurate] ";"'''
+        types = self.types
+        opName = OperationNameNode(IdentifierNode(
+            sys.intern(self._expect('ID'))))
+        inputs = tightest = accurate = None
+        if types[self.pos] in _INPUTS:
+            inputs = self._inputs()
+        if types[self.pos] == '=':
+            self.pos += 1
+            tightest = TightestOutputsNode(self._literalSequence())
+        if types[self.pos] == '<':
+            self.pos += 1
+            self._expect('=')
+            accurate = AccurateOutputsNode(self._literalSequence())
+        if types[self.pos] != ';' or tightest is None and accurate is None:
+            # a literal sequence may go on in front of the token
+            if accurate is not None:
+                expected = _LITERALS | set([';'])
+            elif tightest is not None:
+                expected = _LITERALS | set(['<', ';'])
+            else:
+                expected = _INPUTS | set(['=', '<'])
+            self._error(expected)
+        self.pos += 1
+        return _testNode(opName, inputs, tightest, accurate)
+
+    def _inputs(self):
+        '''
+        inputs : (literal | "{" literalSequence "}" | "{" ID "}")+
+
+        Return the result of _inputsNode.
+        '''
+        types = self.types
+        inputs = []
+        while types[self.pos] in _INPUTS:
+            if types[self.pos] != '{':
+                inputs.append(self._literal())
+                continue
+            position = self._position()
+            self.pos += 1
+            if types[self.pos] == 'ID':
+                position = self._position()
+                inputSet = LiteralSetNode(None, self._expect('ID'))
+            elif types[self.pos] in _LITERALS:
+                inputSet = LiteralSetNode(self._literalSequence())
+            else:
+                self._error(_LITERALS | set(['ID']))
+            inputSet.setPosition(*position)
+            if types[self.pos] != '}':
+                # a literal sequence may go on in front of the token
+                self._error(set(['}']) if inputSet.literals is None
+                            else _LITERALS | set(['}']))
+            self.pos += 1
+            inputs.append(inputSet)
+        return _inputsNode(inputs)
+
+    def _literalSequence(self):
+        '''literalSequence : literal+'''
+        literals = [self._literal()]
+        while self.types[self.pos] in _LITERALS:
+            literals.append(self._literal())
+        return literals
+
+    def _literal(self):
+        '''literal : interval | INT | FLOAT | INF | STRING | TRUE | ...'''
+        tokenType = self.types[self.pos]
+        if tokenType == '[':
+            return self._interval()
+        if tokenType == 'FLOAT' or tokenType == 'INF':
+            return self._number()
+        value = self.tokens[self.pos].value
+        if tokenType == 'INT':
+            node = _integerNode(value)
+        elif tokenType == 'STRING':
+            node = StringLiteralNode(value)
+        elif tokenType == 'TRUE' or tokenType == 'FALSE':
+            node = BooleanLiteralNode(value)
+        elif tokenType in _OVERLAPS:
+            node = OverlapLiteralNode(value)
+        else:
+            self._error(_LITERALS)
+        self.pos += 1
+        return share(node)
+
+    def _number(self):
+        '''numberLiteral : FLOAT | INF'''
+        tokenType = self.types[self.pos]
+        if tokenType == 'FLOAT':
+            node = _floatingPointNode(self.tokens[self.pos].value)
+        elif tokenType == 'INF':
+            node = _infinityNode(self.tokens[self.pos].value)
+        else:
+            self._error(('FLOAT', 'INF'))
+        self.pos += 1
+        return share(node)
+
+    def _interval(self):
+        '''intervalLiteral : "[" ... "]" ["_" decorationLiteral]'''
+        self.pos += 1
+        tokenType = self.types[self.pos]
+        if tokenType == 'NAI' or tokenType == 'EMPTY':
+            if tokenType == 'NAI':
+                cls = NotAnIntervalNode
+            else:
+                cls = EmptyIntervalNode
+            node = _specialIntervalNode(cls, self.tokens[self.pos].value)
+            self.pos += 1
+            self._expect(']')
+            return share(node)
+        if tokenType == 'ENTIRE':
+            node = _specialIntervalNode(EntireIntervalNode,
+                                        self.tokens[self.pos].value)
+            self.pos += 1
+        elif tokenType != 'FLOAT' and tokenType != 'INF':
+            self._error(('NAI', 'EMPTY', 'ENTIRE', 'FLOAT', 'INF'))
+        else:
+            inf = self._number()
+            self._expect(',')
+            node = InfSupIntervalNode(inf, self._number())
+        self._expect(']')
+        if self.types[self.pos] == '_':
+            self.pos += 1
+            if self.types[self.pos] not in _DECORATIONS:
+                self._error(_DECORATIONS)
+            node.setDecoration(
+                share(DecorationLiteralNode(self.tokens[self.pos].value)))
+            self.pos += 1
+        return share(node)
+
+
+#
+# Table cache
+#
+
+# Directory for the generated parser tables. The tables are keyed on the hash
+# of the grammar, so a change of the p_* rules results in a new table file.
+CACHE_DIR = os.environ.get('ITF1788_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache',
+                                        'itf1788'))
+
+# The lexer and the parsers are built by _init() on the first use and shared
+# by all Parser objects. The LALR tables are never modified after that.
+_initLock = threading.Lock()
+lexer = None
+parser = None
+testcaseParser = None
+
+# names of the available scanners, see Parser
+SCANNERS = ('ply', 'fast')
+
+# names of the parsers, see Parser
+BACKENDS = ('lalr', 'rd')
+
+
+def grammarHash():
+    '''
+    Return a hash of the grammar as a hex string.
+
+    The hash covers the tokens, the literals, the p_* rules and the table
+    version of PLY.
+    '''
+    module = sys.modules[__name__]
+    rules = sorted((name, getattr(module, name).__doc__)
+                   for name in dir(module)
+                   if name.startswith('p_') and name != 'p_error')
+    h = hashlib.sha256()
+    h.update(repr((yacc.__tabversion__, tokens, literals, rules)).encode())
+    return h.hexdigest()[:16]
+
+
+def tablePath(start='dsl'):
+    '''
+    Return the path to the cached parser tables of the current grammar.
+
+    Arguments:
+    start -- the start symbol of the parser
+    '''
+    return os.path.join(CACHE_DIR,
+                        'parsetab-' + start + '-' + grammarHash() + '.pickle')
+
+
+def _buildParser(start='dsl'):
+    '''
+    Return a parser, read from the table cache if possible.
+
+    If no valid tables are cached, the LALR tables are generated and written
+    to the cache. The file is written under a temporary name and renamed
+    afterwards, so concurrent runs never read an incomplete file.
+
+    Arguments:
+    start -- the start symbol of the parser
+    '''
+    module = sys.modules[__name__]
+    path = tablePath(start)
+    # the rules above another start symbol are unreachable, don't warn
+    errorlog = None if start == 'dsl' else yacc.NullLogger()
+
+    if os.path.exists(path):
+        try:
+            return yacc.yacc(module=module, start=start, debug=0,
+                             picklefile=path, errorlog=errorlog)
+        except Exception:
+            # the cached file is corrupt, generate it again
+            pass
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+    except OSError:
+        # no cache available, only build the tables in memory
+        return yacc.yacc(module=module, start=start, debug=0,
+                         write_tables=0, errorlog=errorlog)
+
+    tmpPath = '%s.%d.tmp' % (path, os.getpid())
+    p = yacc.yacc(module=module, start=start, debug=0, picklefile=tmpPath,
+                  errorlog=errorlog)
+    if os.path.exists(tmpPath):
+        os.replace(tmpPath, path)
+    return p
+
+
+def _init():
+    '''Build the lexer and the parsers if this was not done yet.'''
+    global lexer, parser, testcaseParser
+    with _initLock:
+        if parser is None:
+            lexer = lex.lex(module=sys.modules[__name__])
+            testcaseParser = _buildParser('block')
+            parser = _buildParser()
+
+
+#
+# Testcase blocks
+#
+
+# Tokens of the top level structure of an ITL file. Strings and comments are
+# matched as a whole, so braces inside of them are skipped.
+_blockTokenRegex = r"""
+      [^{}"/\#]+
+    | \{
+    | \}
+    | "([^\\\n]|(\\(.|\n)))*?"
+    | /\*(.|\n)*?\*/
+    | //.*
+    | \#\*(.|\n)*?\*\#
+    | \#.*
+    """
+_blockToken = re.compile(_blockTokenRegex, re.VERBOSE)
+
+# the number of characters read at once by iterparse
+READ_SIZE = 1 << 16
+_blockTokenBytes = re.compile(_blockTokenRegex.encode(), re.VERBOSE)
+
+
+def splitTestcases(chunks):
+    '''
+    Split the text of an ITL file into testcase blocks.
+
+    Yield a tuple (text, line) for every top level testcase block, where text
+    reaches from the end of the previous block up to and including the
+    closing brace, i.e. it contains the comments in front of the testcase,
+    and line is the line number of the first character of text. An include
+    directive is a block of its own, which ends with the path string.
+    Text after the last block is yielded the same way if it is not blank.
+    Only the current block is held in memory.
+
+    Arguments:
+    chunks -- an iterable of strings, e.g. a file object
+    '''
+    # the scanned text of the current block, joined when it ends
+    done = []
+    buf = ''
+    pos = 0
+    depth = 0
+    line = 1
+    final = False
+    chunks = iter(chunks)
+
+    while True:
+        m = _blockToken.match(buf, pos)
+        # a token which touches the end of the buffer might be incomplete,
+        # only this token is scanned again with the next chunk
+        if not final and (m is None or m.end() == len(buf)):
+            if m is not None and m.group()[0] not in '{}"/#':
+                # text without braces, strings and comments, its rest is a
+                # token of its own
+                pos = m.end()
+            chunk = next(chunks, None)
+            if chunk is None:
+                final = True
+            else:
+                done.append(buf[:pos])
+                buf = buf[pos:] + chunk
+                pos = 0
+            continue
+        if m is None:
+            if pos == len(buf):
+                break
+            # not a valid token, leave it to the lexer
+            end = pos + 1
+        else:
+            end = m.end()
+            tok = m.group()
+            ended = False
+            if tok == '{':
+                depth += 1
+            elif tok == '}' and depth > 0:
+                depth -= 1
+                ended = depth == 0
+            elif tok[0] == '"':
+                # the path of an include directive
+                ended = depth == 0
+            if ended:
+                done.append(buf[:end])
+                text = ''.join(done)
+                yield (text, line)
+                line += text.count('\n')
+                done = []
+                buf = buf[end:]
+                pos = 0
+                continue
+        pos = end
+
+    done.append(buf)
+    buf = ''.join(done)
+    if buf and not buf.isspace():
+        yield (buf, line)
+
+
+#
+# Testcase index
+#
+
+# version of the index file format
+INDEX_VERSION = 2
+
+_qualident = re.compile(rb'testcase\s*([a-zA-Z][a-zA-Z0-9_]*'
+                        rb'(\s*\.\s*[a-zA-Z][a-zA-Z0-9_]*)*)'
+                        rb'\s*(\[[^\]]*\]\s*)?$')
+
+
+def scanTestcases(data):
+    '''
+    Return the spans of the testcases in the contents of an ITL file.
+
+    Return a list of tuples (name, start, end, line) where name is the
+    qualident of the testcase or template, start and end are the byte
+    offsets of the testcase block including the comments in front of it and
+    line is the line number of start. The first comment of the file belongs
+    to the DSLNode and is not part of the first block. An include directive
+    is a block of its own with an empty name, which ends with the path
+    string.
+
+    Arguments:
+    data -- the contents of the file as bytes or as mmap object
+    '''
+    spans = []
+    pos = 0
+    start = 0
+    depth = 0
+    # top level text of the current block without comments
+    head = []
+    first = True
+
+    while pos < len(data):
+        m = _blockTokenBytes.match(data, pos)
+        end = m.end() if m else pos + 1
+        c = data[pos:pos + 1]
+
+        if depth > 0:
+            if c == b'{':
+                depth += 1
+            elif c == b'}':
+                depth -= 1
+                if depth == 0:
+                    name = _qualident.search(b''.join(head))
+                    name = name.group(1) if name else b''
+                    name = re.sub(rb'\s', b'', name).decode()
+                    spans.append((name, start, end))
+                    start = end
+                    head = []
+        elif c == b'{':
+            depth = 1
+        elif m and c == b'"':
+            # the path of an include directive
+            spans.append(('', start, end))
+            start = end
+            head = []
+            first = False
+        elif m and data[pos:pos + 2] in (b'//', b'/*'):
+            if first:
+                start = end
+            first = False
+        elif m and c == b'#':
+            # ignored comment
+            pass
+        else:
+            head.append(data[pos:end])
+            first = first and data[pos:end].isspace()
+        pos = end
+
+    # add the line numbers
+    result = []
+    prev = 0
+    line = 1
+    for name, start, end in spans:
+        line += data[prev:start].count(b'\n')
+        prev = start
+        result.append((name, start, end, line))
+    return result
+
+
+def indexPath(testFilePath):
+    '''
+    Return the path of the index file of an ITL file.
+
+    Arguments:
+    testFilePath -- path to the ITL file as a string
+    '''
+    return testFilePath + '.idx'
+
+
+def loadIndex(testFilePath):
+    '''
+    Return the testcase index of an ITL file.
+
+    The index maps the qualident of every testcase to a tuple
+    (start, end, line) as returned by scanTestcases. It is read from the
+    index file next to the ITL file if the modification time and the size of
+    the ITL file did not change, otherwise the file is scanned and the index
+    file is written again.
+
+    Arguments:
+    testFilePath -- path to the ITL file as a string
+    '''
+    stat = os.stat(testFilePath)
+    path = indexPath(testFilePath)
+
+    try:
+        with open(path) as f:
+            index = json.load(f)
+        if (index['version'] == INDEX_VERSION and
+                index['mtime'] == stat.st_mtime_ns and
+                index['size'] == stat.st_size):
+            return dict((k, tuple(v))
+                        for k, v in index['testcases'].items())
+    except (IOError, ValueError, KeyError):
+        pass
+
+    with open(testFilePath, 'rb') as f:
+        if stat.st_size == 0:
+            spans = []
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                spans = scanTestcases(data)
+
+    testcases = {}
+    for name, start, end, line in spans:
+        # like the parser, keep the first of two testcases with equal names,
+        # include directives have no name
+        if name:
+            testcases.setdefault(name, (start, end, line))
+
+    index = {'version': INDEX_VERSION,
+             'mtime': stat.st_mtime_ns,
+             'size': stat.st_size,
+             'testcases': testcases}
+    tmpPath = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        with open(tmpPath, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmpPath, path)
+    except OSError:
+        # the index is only a cache, go on without it
+        pass
+    return testcases
+
+
+#
+# Parser objects
+#
+
+class Parser(object):
+
+    '''
+    Parser for ITL files with its own lexer and parser state.
+
+    The LALR tables and the PLY lexer are built once and shared by all
+    instances, a new instance only copies the references to them. So it is
+    cheap to create one Parser per thread.
+
+    Thread safety: the shared tables are never modified, so any number of
+    Parser objects can be used in different threads at the same time. A
+    single Parser object must not be used by two threads at once. A
+    generator returned by iterparse uses the state of its Parser only
+    while it computes the next item, so it may be interleaved with other
+    calls of the same Parser in the same thread.
+    '''
+
+    def __init__(self, scanner='ply', backend='lalr'):
+        '''
+        Create a parser.
+
+        Raise an IOError for an unknown scanner or backend.
+
+        Arguments:
+        scanner -- the scanner to use, see SCANNERS
+        backend -- the parser to use, see BACKENDS
+        '''
+        if scanner not in SCANNERS:
+            raise IOError('Unknown scanner: ' + str(scanner))
+        if backend not in BACKENDS:
+            raise IOError('Unknown backend: ' + str(backend))
+        _init()
+        self.scanner = scanner
+        self.backend = backend
+        if scanner == 'fast':
+            self.lexer = Scanner()
+        else:
+            self.lexer = lexer.clone()
+        # the column of the first character of the input, for the positions
+        # of the nodes
+        self.lexer.column = 1
+        # the LRParser keeps its stacks in attributes, the tables are shared
+        self.parser = copy.copy(parser)
+        self.testcaseParser = copy.copy(testcaseParser)
+
+    def parse(self, testFilePath):
+        '''
+        Return an AST for the test file.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        '''
+        return self.parseString(open(testFilePath).read(),
+                                testFilePath.split('/')[-1])
+
+    def parseString(self, contents, fileName):
+        '''
+        Return an AST for the contents of a test file.
+
+        Arguments:
+        contents -- the text of the file
+        fileName -- the name of the file for the AST
+        '''
+        # the positions of the nodes refer to the unstripped contents
+        stripped = contents.lstrip()
+        skipped = len(contents) - len(stripped)
+        line = 1 + contents.count('\n', 0, skipped)
+        column = _column(contents, skipped)
+        contents = stripped.rstrip()
+        self.lexer.lineno = line
+        self.lexer.column = column
+        if self.backend == 'rd':
+            self.lexer.input(contents)
+            rd = RecursiveDescentParser(lexdata=contents, column=column)
+            ast = rd.parse(iter(self.lexer.token, None))
+        else:
+            ast = self.parser.parse(contents, lexer=self.lexer)
+        ast.setFileName(fileName)
+        return ast
+
+    def parseStream(self, stream, fileName):
+        '''
+        Return an AST for a test file which is read from a stream.
+
+        The stream is parsed one testcase at a time, see iterparse, so the
+        text of the file is never held in memory as a whole.
+
+        Arguments:
+        stream -- a text file object, e.g. a stream of itlinput.iterInputs
+        fileName -- the name of the file for the AST
+        '''
+        ast = DSLNode([])
+        for item in self.iterparse(stream):
+            if isinstance(item, (LineCommentNode, BlockCommentNode)):
+                ast.appendComment(item)
+            else:
+                ast.testcases.append(item)
+        ast.setFileName(fileName)
+        return ast
+
+    def recoverParse(self, testFilePath):
+        '''
+        Parse the test file and collect all syntax errors.
+
+        Return a tuple (ast, diagnostics) of a DSLNode with the testcases
+        without errors and a list of Diagnostic objects sorted by their
+        position. The parser skips to the next ';' or '}' after an error, so
+        all errors of the file are reported in one pass. The recursive
+        descent parser is used regardless of the backend.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        '''
+        return self.recoverParseString(open(testFilePath).read(),
+                                       testFilePath.split('/')[-1])
+
+    def recoverParseString(self, contents, fileName):
+        '''
+        Parse the contents of a test file and collect all syntax errors.
+
+        Return a tuple (ast, diagnostics), see recoverParse.
+
+        Arguments:
+        contents -- the text of the file
+        fileName -- the name of the file for the AST and the diagnostics
+        '''
+        diagnostics = []
+
+        rd = RecursiveDescentParser(diagnostics, fileName, contents)
+
+        def report(message, lineno, lexpos):
+            diagnostics.append(Diagnostic(fileName, lineno,
+                                          _column(contents, lexpos), message))
+            rd.lexerErrors.append(lexpos)
+
+        self.lexer.lineno = 1
+        self.lexer.report = report
+        try:
+            self.lexer.input(contents)
+            ast = rd.parse(iter(self.lexer.token, None))
+        finally:
+            self.lexer.report = None
+        ast.setFileName(fileName)
+        diagnostics.sort(key=lambda d: (d.line, d.column))
+        return ast, diagnostics
+
+    def parseBlock(self, text, line=1, column=1):
+        '''
+        Parse a testcase block as yielded by splitTestcases.
+
+        Return the TestcaseNode, the IncludeNode of an include directive or
+        None if text contains no tokens.
+
+        Arguments:
+        text -- the text of the block
+        line -- the line number of the first character of text
+        column -- the column of the first character of text
+        '''
+        lexer = self.lexer
+        lexer.lineno = line
+        lexer.column = column
+        lexer.input(text)
+        tok = lexer.token()
+        if tok is None:
+            return None
+        # hand the token which was already read to the parser first
+        tokens = itertools.chain([tok], iter(lexer.token, None))
+        if self.backend == 'rd':
+            return RecursiveDescentParser(lexdata=text, column=column).parse(
+                tokens, start='block')
+        return self.testcaseParser.parse(
+            lexer=lexer, tokenfunc=functools.partial(next, tokens, None))
+
+    def iterparse(self, testFilePath):
+        '''
+        Parse the test file incrementally.
+
+        Yield the comments of the file first, followed by the TestcaseNode
+        objects in the order of the file. A testcase is yielded as soon as
+        its closing brace is read, so the memory usage is bounded by the
+        largest testcase rather than by the file.
+
+        Arguments:
+        testFilePath -- path to the file as a string or a text file object,
+                        e.g. a stream of itlinput.iterInputs
+        '''
+        if isinstance(testFilePath, str):
+            with open(testFilePath) as f:
+                yield from self.iterparse(f)
+            return
+        first = True
+        column = 1
+        # large chunks instead of lines, a long line is read in parts
+        chunks = iter(functools.partial(testFilePath.read, READ_SIZE), '')
+        for text, line in splitTestcases(chunks):
+            nextColumn = _column(text, len(text), column)
+            if first:
+                first = False
+                # the first comment of the file belongs to the DSLNode
+                lexer = self.lexer
+                lexer.lineno = line
+                lexer.input(text)
+                tok = lexer.token()
+                if tok is not None and tok.type in ('LINE_COMMENT',
+                                                    'BLOCK_COMMENT'):
+                    if tok.type == 'LINE_COMMENT':
+                        yield LineCommentNode(tok.value)
+                    else:
+                        yield BlockCommentNode(tok.value)
+                    end = tok.lexpos + len(tok.value)
+                    line += text.count('\n', 0, end)
+                    column = _column(text, end, column)
+                    text = text[end:]
+            testcase = self.parseBlock(text, line, column)
+            if testcase is not None:
+                yield testcase
+            column = nextColumn
+
+    def parseHead(self, data, spans):
+        '''
+        Parse the text of an ITL file in front of the first testcase block.
+
+        Return the comment of the file or None. The text can only hold this
+        comment, anything else raises a syntax error.
+
+        Arguments:
+        data -- the contents of the file as bytes
+        spans -- the blocks of the file as returned by scanTestcases
+        '''
+        head = data[:spans[0][1]].decode()
+        self.lexer.lineno = 1
+        self.lexer.input(head)
+        tok = self.lexer.token()
+        if tok is None:
+            return None
+        elif tok.type == 'LINE_COMMENT':
+            return LineCommentNode(tok.value)
+        elif tok.type == 'BLOCK_COMMENT':
+            return BlockCommentNode(tok.value)
+        self.parseBlock(head)
+
+    def parseTail(self, data, spans):
+        '''
+        Parse the text of an ITL file after the last testcase block.
+
+        The text must be blank, anything else raises a syntax error. Call it
+        after the blocks are parsed, so the first error of the file is
+        raised like in a sequential parse.
+
+        Arguments:
+        data -- the contents of the file as bytes
+        spans -- the blocks of the file as returned by scanTestcases
+        '''
+        tail = data[spans[-1][2]:].decode()
+        if tail.strip():
+            self.parseBlock(tail, 1 + data.count(b'\n', 0, spans[-1][2]))
+
+    def parse_testcase(self, testFilePath, name):
+        '''
+        Return the TestcaseNode of a single testcase of the test file.
+
+        Only the block of the testcase is read and parsed, its location is
+        taken from the index of the file, see loadIndex.
+        Raise an IOError if the file contains no such testcase.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        name -- qualident of the testcase, e.g. 'minimal_pos_dec_test'
+        '''
+        index = loadIndex(testFilePath)
+        if name not in index:
+            raise IOError('No testcase ' + name + ' in ' + testFilePath)
+        start, end, line = index[name]
+
+        with open(testFilePath, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                text = data[start:end].decode()
+                column = offsetColumn(data, start)
+        return self.parseBlock(text, line, column)
+
+
+# Parser objects of the module level functions, one per thread and
+# configuration
+_threadParsers = threading.local()
+
+
+def threadParser(scanner='ply', backend='lalr'):
+    '''
+    Return the Parser of the current thread for the configuration.
+
+    Arguments:
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    '''
+    parsers = getattr(_threadParsers, 'parsers', None)
+    if parsers is None:
+        parsers = _threadParsers.parsers = {}
+    p = parsers.get((scanner, backend))
+    if p is None:
+        p = parsers[(scanner, backend)] = Parser(scanner, backend)
+    return p
+
+
+def parse(testFilePath, scanner='ply', backend='lalr', jobs=1, pool=None):
     '''
     Return an AST for the test file.
 
+    Thread safe, the Parser of the current thread is used.
+
+    Arguments:
+    testFilePath -- path to the file as a string
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    jobs -- number of processes, see parallelParse, or 1 to parse the file
+            in the current thread
+    pool -- the process pool of a parallel parse, see parallelParse
+    '''
+    if jobs != 1:
+        return parallelParse(testFilePath, jobs, scanner, backend, pool)
+    return threadParser(scanner, backend).parse(testFilePath)
+
+
+def parseString(contents, fileName, scanner='ply', backend='lalr'):
+    '''
+    Return an AST for the contents of a test file.
+
+    Arguments:
+    contents -- the text of the file
+    fileName -- the name of the file for the AST
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    '''
+    return threadParser(scanner, backend).parseString(contents, fileName)
+
+
+def parseStream(stream, fileName, scanner='ply', backend='lalr'):
+    '''
+    Return an AST for a test file which is read from a stream, see
+    Parser.parseStream.
+
+    Arguments:
+    stream -- a text file object
+    fileName -- the name of the file for the AST
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    '''
+    return threadParser(scanner, backend).parseStream(stream, fileName)
+
+
+def iterparse(testFilePath, scanner='ply', backend='lalr'):
+    '''
+    Parse the test file incrementally, see Parser.iterparse.
+
+    Arguments:
+    testFilePath -- path to the file as a string or a text file object
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    '''
+    return threadParser(scanner, backend).iterparse(testFilePath)
+
+
+def recoverParse(testFilePath, scanner='ply'):
+    '''
+    Parse the test file and collect all syntax errors.
+
+    Return a tuple (ast, diagnostics), see Parser.recoverParse.
+
+    Arguments:
+    testFilePath -- path to the file as a string
+    scanner -- the scanner to use, see SCANNERS
+    '''
+    return threadParser(scanner, 'rd').recoverParse(testFilePath)
+
+
+def recoverParseString(contents, fileName, scanner='ply'):
+    '''
+    Parse the contents of a test file and collect all syntax errors.
+
+    Return a tuple (ast, diagnostics), see Parser.recoverParse.
+
+    Arguments:
+    contents -- the text of the file
+    fileName -- the name of the file for the AST and the diagnostics
+    scanner -- the scanner to use, see SCANNERS
+    '''
+    return threadParser(scanner, 'rd').recoverParseString(contents, fileName)
+
+
+def parse_testcase(testFilePath, name, scanner='ply', backend='lalr'):
+    '''
+    Return the TestcaseNode of a single testcase, see Parser.parse_testcase.
+
     Arguments:
     testFilePath -- path to the file as a string
+    name -- qualident of the testcase, e.g. 'minimal_pos_dec_test'
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    '''
+    return threadParser(scanner, backend).parse_testcase(testFilePath, name)
+
+
+#
+# Include directives
+#
+
+class IncludeResolver(object):
+
+    '''
+    Replaces the include directives of ASTs by the included testcases.
+
+    The path of an include directive is relative to the directory of the
+    including file. Every included file is parsed at most once per resolver,
+    and the TestcaseNode objects of an included file are shared by reference
+    among all ASTs which include it, so they must not be modified. The AST
+    of a file which is only passed to parse is not kept by the resolver, so
+    it is freed when the caller is done with it. The testcases of every
+    file parsed by the resolver are named after the path of the file, see
+    TestcaseNode.setFileName.
+
+    An include cycle raises an IOError with the chain of the files.
+    '''
+
+    def __init__(self, parseFunction=None):
+        '''
+        Initialize an IncludeResolver.
+
+        Arguments:
+        parseFunction -- a function which returns the AST of a file for its
+                         path, e.g. ASTCache.parse, the module level parse
+                         function if None
+        '''
+        if parseFunction is None:
+            parseFunction = parse
+        self.parseFunction = parseFunction
+        # maps the real path of an included file to its resolved DSLNode
+        self.asts = {}
+
+    def parse(self, testFilePath):
+        '''
+        Return the AST of the test file with its includes resolved.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        '''
+        return self._load(testFilePath, [], keep=False)
+
+    def resolve(self, ast, testFilePath):
+        '''
+        Resolve the includes of an AST which was parsed elsewhere.
+
+        Return the ast, its IncludeNode objects are replaced in place.
+
+        Arguments:
+        ast -- a DSLNode object
+        testFilePath -- path of the file of the AST, the paths of the
+                        includes are relative to its directory
+        '''
+        chain = [(os.path.realpath(testFilePath), testFilePath)]
+        ast.testcases = self._expand(ast.testcases, testFilePath, chain)
+        return ast
+
+    def _load(self, testFilePath, chain, keep=True):
+        '''
+        Return the resolved AST of a file, parse it on first use.
+
+        Arguments:
+        testFilePath -- path to the file as a string
+        chain -- tuples (real path, path) of the files which include this
+                 file
+        keep -- keep the AST for the next include of the file
+        '''
+        realPath = os.path.realpath(testFilePath)
+        realPaths = [p for p, path in chain]
+        if realPath in realPaths:
+            cycle = chain[realPaths.index(realPath):]
+            raise IOError('Include cycle: ' +
+                          ' -> '.join([path for p, path in cycle] +
+                                      [testFilePath]))
+        ast = self.asts.get(realPath)
+        if ast is None:
+            ast = self.parseFunction(testFilePath)
+            for node in ast.testcases:
+                if isinstance(node, TestcaseNode):
+                    node.setFileName(testFilePath)
+            ast.testcases = self._expand(ast.testcases, testFilePath,
+                                         chain + [(realPath, testFilePath)])
+            if keep:
+                self.asts[realPath] = ast
+        return ast
+
+    def _expand(self, nodes, testFilePath, chain):
+        '''
+        Return the nodes with every IncludeNode replaced by the testcases
+        of its file.
+
+        Arguments:
+        nodes -- the testcases of a DSLNode
+        testFilePath -- path of the file of the nodes
+        chain -- tuples (real path, path) of the file and of the files which
+                 include it
+        '''
+        if not any(isinstance(node, IncludeNode) for node in nodes):
+            return nodes
+        directory = os.path.dirname(testFilePath)
+        testcases = []
+        for node in nodes:
+            if isinstance(node, IncludeNode):
+                path = os.path.normpath(os.path.join(directory, node.path))
+                testcases.extend(self._load(path, chain).testcases)
+            else:
+                testcases.append(node)
+        return testcases
+
+
+#
+# Parallel parsing
+#
+
+# files with less testcases are parsed in the current process
+MIN_PARALLEL_TESTCASES = 8
+
+# number of chunks per process, more chunks balance the load better
+CHUNKS_PER_JOB = 4
+
+
+def _splitSpans(spans, count):
     '''
-    global yacc
-    contents = open(testFilePath).read().strip()
-    ast = yacc.parse(contents)
+    Split the spans of scanTestcases into count runs of about equal size.
+
+    Arguments:
+    spans -- the list of spans
+    count -- the number of runs
+    '''
+    total = spans[-1][2] - spans[0][1]
+    chunks = []
+    chunk = []
+    for span in spans:
+        chunk.append(span)
+        # split at the next multiple of the chunk size
+        if (span[2] - spans[0][1]) * count >= total * (len(chunks) + 1):
+            chunks.append(chunk)
+            chunk = []
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _parseChunk(testFilePath, scanner, backend, spans):
+    '''
+    Return the TestcaseNode objects of a run of testcase blocks.
+
+    Runs in the worker processes of parallelParse.
+
+    Arguments:
+    testFilePath -- path to the file as a string
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    spans -- the spans of the blocks as returned by scanTestcases, with the
+             column of start appended
+    '''
+    p = threadParser(scanner, backend)
+    testcases = []
+    with open(testFilePath, 'rb') as f:
+        f.seek(spans[0][1])
+        data = f.read(spans[-1][2] - spans[0][1])
+    offset = spans[0][1]
+    for name, start, end, line, column in spans:
+        text = data[start - offset:end - offset].decode()
+        testcases.append(p.parseBlock(text, line, column))
+    return testcases
+
+
+def _parseChunks(pool, testFilePath, scanner, backend, chunks):
+    '''
+    Return the TestcaseNode objects of the runs of blocks parsed by a pool.
+
+    The results are taken in the order of the runs, so the error of the
+    first run with an error is raised.
+
+    Arguments:
+    pool -- a concurrent.futures.ProcessPoolExecutor
+    testFilePath -- path to the file as a string
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    chunks -- the runs of spans as returned by _splitSpans
+    '''
+    futures = [pool.submit(_parseChunk, testFilePath, scanner, backend, chunk)
+               for chunk in chunks]
+    testcases = []
+    try:
+        for future in futures:
+            testcases.extend(future.result())
+    finally:
+        # the runs after an error are not needed, a shared pool is free for
+        # the next file
+        for future in futures:
+            future.cancel()
+    return testcases
+
+
+def parallelParse(testFilePath, jobs=None, scanner='ply', backend='lalr',
+                  pool=None):
+    '''
+    Return an AST for the test file, parsed by a pool of processes.
+
+    The file is split at the top level testcase blocks, see scanTestcases.
+    Runs of blocks are parsed in the worker processes and the TestcaseNode
+    objects are joined to a DSLNode in the order of the file. The blocks are
+    parsed with their line numbers in the file, and the results are taken
+    in the order of the file, with the text after the last block checked
+    last, so the first error is raised with the same line as for a
+    sequential parse. Small files are parsed in the current process.
+
+    Arguments:
+    testFilePath -- path to the file as a string
+    jobs -- number of processes, the number of CPUs if None
+    scanner -- the scanner to use, see SCANNERS
+    backend -- the parser to use, see BACKENDS
+    pool -- a concurrent.futures.ProcessPoolExecutor with jobs processes,
+            which is shared by the parses of several files, a pool for
+            this file if None
+    '''
+    p = threadParser(scanner, backend)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+
+    with open(testFilePath, 'rb') as f:
+        data = f.read()
+    spans = scanTestcases(data)
+    if jobs <= 1 or len(spans) < MIN_PARALLEL_TESTCASES:
+        return p.parse(testFilePath)
+
+    comment = p.parseHead(data, spans)
+    columnSpans = [span + (offsetColumn(data, span[1]),) for span in spans]
+    chunks = _splitSpans(columnSpans, jobs * CHUNKS_PER_JOB)
+    if pool is None:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+            testcases = _parseChunks(pool, testFilePath, scanner, backend,
+                                     chunks)
+    else:
+        testcases = _parseChunks(pool, testFilePath, scanner, backend,
+                                 chunks)
+    p.parseTail(data, spans)
+
+    ast = DSLNode(testcases)
+    if comment is not None:
+        ast.appendComment(comment)
     ast.setFileName(testFilePath.split('/')[-1])
     return ast
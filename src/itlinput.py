@@ -0,0 +1,256 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+"""
+Input adapters for ITL files.
+
+Read ITL files which are compressed with gzip, xz or bzip2, stored in a tar
+or zip archive or passed on stdin. The files are decompressed and extracted
+while they are read, no temporary copies are written.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import sys
+import tarfile
+import zipfile
+
+# the name of the standard input as a test file
+STDIN = '-'
+
+# name of an ITL file read from stdin, the output files are named after it
+STDIN_NAME = 'stdin.itl'
+
+# file name suffixes of compressed files and the functions to open them
+COMPRESSIONS = {
+    '.gz': gzip.open,
+    '.xz': lzma.open,
+    '.bz2': bz2.open,
+}
+
+# magic numbers of the compressions at the start of a file
+MAGIC_NUMBERS = [
+    (b'\x1f\x8b', '.gz'),
+    (b'\xfd7zXZ\x00', '.xz'),
+    (b'BZh', '.bz2'),
+]
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.bz2',
+                '.tbz2')
+
+ZIP_SUFFIXES = ('.zip',)
+
+
+def compression(path):
+    """
+    Return the compression suffix of a file name or None.
+
+    Arguments:
+    path -- name or path of the file
+    """
+    ext = os.path.splitext(path)[1]
+    if ext in COMPRESSIONS:
+        return ext
+    return None
+
+
+def itlName(path):
+    """
+    Return the name of the ITL file, i.e. the base name without the suffix of
+    the compression.
+
+    Arguments:
+    path -- name or path of the file
+    """
+    name = os.path.basename(path)
+    if compression(name):
+        name = os.path.splitext(name)[0]
+    return name
+
+
+def memberName(path):
+    """
+    Return the name of an ITL file in an archive, i.e. its relative path
+    without the suffix of the compression.
+
+    The path is kept, so the files a/x.itl and b/x.itl of an archive have
+    different names. Raise an IOError if the path leaves the directory of
+    the archive.
+
+    Arguments:
+    path -- path of the member in the archive
+    """
+    parts = [part for part in path.replace('\\', '/').split('/')
+             if part not in ('', '.')]
+    if '..' in parts or not parts:
+        raise IOError('Invalid path in archive: ' + path)
+    parts[-1] = itlName(parts[-1])
+    return '/'.join(parts)
+
+
+def isITLFile(path):
+    """
+    Return if the file is an ITL file, compressed or not.
+
+    Arguments:
+    path -- name or path of the file
+    """
+    return itlName(path).endswith('.itl')
+
+
+def isArchive(path):
+    """
+    Return if the file is a tar or zip archive.
+
+    Arguments:
+    path -- name or path of the file
+    """
+    return path.endswith(TAR_SUFFIXES + ZIP_SUFFIXES)
+
+
+def isInput(path):
+    """
+    Return if the path is accepted by iterInputs.
+
+    Arguments:
+    path -- name or path of the file
+    """
+    return path == STDIN or isITLFile(path) or isArchive(path)
+
+
+def isPlain(path):
+    """
+    Return if the path is an uncompressed ITL file on the disk.
+
+    Such files can be passed to dslparser.parse directly.
+
+    Arguments:
+    path -- name or path of the file
+    """
+    return path != STDIN and path.endswith('.itl')
+
+
+def openText(name, stream):
+    """
+    Return a text stream of a binary stream, decompressed if name has the
+    suffix of a compression.
+
+    Arguments:
+    name -- the name of the file
+    stream -- the binary stream of the file
+    """
+    suffix = compression(name)
+    if suffix is not None:
+        stream = COMPRESSIONS[suffix](stream)
+    return io.TextIOWrapper(stream)
+
+
+class _RawStream(io.RawIOBase):
+
+    """
+    Raw stream of an object with a read method.
+
+    The members of a tar archive which is read in one pass lack some methods
+    of a stream, io.BufferedReader adds them on top of this class.
+    """
+
+    def __init__(self, stream):
+        """
+        Initialize a _RawStream.
+
+        Arguments:
+        stream -- an object with a read(size) method which returns bytes
+        """
+        self.stream = stream
+
+    def readable(self):
+        """Return True, the stream is readable."""
+        return True
+
+    def readinto(self, b):
+        """Read into the buffer b and return the number of bytes read."""
+        data = self.stream.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def _openStdin():
+    """Return a text stream of stdin, decompressed if necessary."""
+    stream = sys.stdin.buffer
+    head = stream.peek(8)[:8] if hasattr(stream, 'peek') else b''
+    for magic, suffix in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return openText(STDIN_NAME + suffix, stream)
+    return io.TextIOWrapper(stream)
+
+
+def iterInputs(path, accept=None):
+    """
+    Yield a tuple (name, stream) for every ITL file of the input.
+
+    The input is an ITL file, compressed or not, a tar or zip archive or
+    STDIN. name is the name of the ITL file without the suffix of the
+    compression, the relative path for the members of an archive, see
+    memberName, and stream is a text stream of its contents. The members of
+    a tar archive are read in one pass, so a stream must be read before the
+    next tuple is taken.
+
+    Arguments:
+    path -- path of the input or STDIN
+    accept -- a function which is called with the name of an ITL file in an
+              archive and returns if the file shall be read, all files are
+              read if None
+    """
+    if path == STDIN:
+        yield STDIN_NAME, _openStdin()
+    elif path.endswith(TAR_SUFFIXES):
+        with tarfile.open(path, 'r|*') as tar:
+            for member in tar:
+                if not member.isfile() or not isITLFile(member.name):
+                    continue
+                name = memberName(member.name)
+                if accept is None or accept(name):
+                    raw = io.BufferedReader(
+                        _RawStream(tar.extractfile(member)))
+                    with openText(member.name, raw) as stream:
+                        yield name, stream
+    elif path.endswith(ZIP_SUFFIXES):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not isITLFile(info.filename):
+                    continue
+                name = memberName(info.filename)
+                if accept is None or accept(name):
+                    with openText(info.filename,
+                                  archive.open(info)) as stream:
+                        yield name, stream
+    else:
+        with openText(path, open(path, 'rb')) as stream:
+            yield itlName(path), stream
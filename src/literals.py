@@ -0,0 +1,279 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+"""
+Exact values of the numeric literals of the ITL.
+
+decode returns a Literal for the text of an INT, FLOAT or INF token. It
+holds the exact value of the literal as a Fraction and the bit patterns of
+the value correctly rounded to float, double and long double. The Literal
+objects are memoized by their text, so a literal which occurs many times in
+the tests is converted only once. At most TABLE_SIZE literals are memoized,
+the least recently used ones are dropped first.
+"""
+
+import functools
+import re
+import struct
+from fractions import Fraction
+
+# IEEE 754 binary formats: (precision, emin, emax, exponent bits,
+# explicit integer bit). long_double is the x87 extended format.
+FORMATS = {
+    'float': (24, -126, 127, 8, False),
+    'double': (53, -1022, 1023, 11, False),
+    'long_double': (64, -16382, 16383, 15, True),
+}
+
+_hexFloat = re.compile(r'([+-]?)0[xX]([0-9a-fA-F]*)\.?([0-9a-fA-F]*)'
+                       r'[pP]([+-]?[0-9]+)[fFlL]?$')
+_integer = re.compile(r'([+-]?)(0[xX][0-9a-fA-F]+|[0-9]+)[uUlL]*$')
+
+# the maximal number of memoized literals, see decode
+TABLE_SIZE = 1 << 16
+
+
+def _fraction(text):
+    """
+    Return the exact value of the text of a literal as a Fraction.
+
+    Arguments:
+    text -- the text of an INT or FLOAT token
+    """
+    m = _integer.match(text)
+    if m:
+        value = int(m.group(2), 0)
+        return Fraction(-value if m.group(1) == '-' else value)
+    m = _hexFloat.match(text)
+    if m:
+        digits = m.group(2) + m.group(3)
+        value = Fraction(int(digits, 16)) * \
+            Fraction(2) ** (int(m.group(4)) - 4 * len(m.group(3)))
+        return -value if m.group(1) == '-' else value
+    # decimal floating point constant, remove the suffix
+    return Fraction(text.rstrip('fFlL'))
+
+
+def _round(value, negative, precision, emin, emax):
+    """
+    Round a value to nearest, ties to even, in a binary format.
+
+    Return a tuple (negative, exponent, significand) where the value of the
+    result is significand * 2**(exponent - precision + 1). For an overflow
+    the exponent is emax + 1 and the significand 0.
+
+    Arguments:
+    value -- the value as a Fraction
+    negative -- the sign, needed for a zero value
+    precision, emin, emax -- parameters of the format
+    """
+    a = abs(value)
+    if a == 0:
+        return (negative, emin, 0)
+    # exponent of the leading bit
+    e = a.numerator.bit_length() - a.denominator.bit_length()
+    if a < Fraction(2) ** e:
+        e -= 1
+    e = max(e, emin)
+    significand = round(a * Fraction(2) ** (precision - 1 - e))
+    if significand == 1 << precision:
+        significand >>= 1
+        e += 1
+    if e > emax:
+        return (negative, emax + 1, 0)
+    return (negative, e, significand)
+
+
+def _bits(rounded, precision, emin, emax, exponentBits, explicit):
+    """
+    Return the bit pattern of a rounded value as an int.
+
+    Arguments:
+    rounded -- a tuple as returned by _round
+    precision, emin, emax, exponentBits, explicit -- parameters of the format
+    """
+    negative, e, significand = rounded
+    fractionBits = precision if explicit else precision - 1
+    if e > emax:
+        field = (1 << exponentBits) - 1
+        significand = 1 << (precision - 1) if explicit else 0
+    elif significand < 1 << (precision - 1):
+        # subnormal or zero
+        field = 0
+    else:
+        field = e + emax
+        if not explicit:
+            significand -= 1 << (precision - 1)
+    sign = 1 if negative else 0
+    return ((sign << exponentBits | field) << fractionBits) | significand
+
+
+def _hex(rounded, precision, emin, emax):
+    """
+    Return a rounded value as hex-float string like float.hex.
+
+    Arguments:
+    rounded -- a tuple as returned by _round
+    precision, emin, emax -- parameters of the format
+    """
+    negative, e, significand = rounded
+    sign = '-' if negative else ''
+    if e > emax:
+        return sign + 'inf'
+    if significand == 0:
+        return sign + '0x0.0p+0'
+    digits = (precision + 2) // 4
+    fraction = significand & ((1 << (precision - 1)) - 1)
+    fraction <<= 4 * digits - (precision - 1)
+    return '%s0x%d.%0*xp%+d' % (sign, significand >> (precision - 1), digits,
+                                fraction, e)
+
+
+class Literal(object):
+
+    """
+    The exact value of a numeric literal and its rounded bit patterns.
+
+    Use decode to get the shared object of a text. The exact value is
+    computed on the first access, the bit patterns are computed once per
+    format.
+    """
+
+    __slots__ = ('text', 'negative', 'infinite', '_exact', '_rounded')
+
+    def __init__(self, text):
+        """
+        Initialize a Literal.
+
+        Arguments:
+        text -- the text of an INT, FLOAT or INF token
+        """
+        self.text = text
+        self.negative = text.startswith('-')
+        self.infinite = 'infinity' in text
+        self._exact = None
+        self._rounded = {}
+
+    def __eq__(self, other):
+        return isinstance(other, Literal) and self.text == other.text
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.text)
+
+    def __repr__(self):
+        return 'Literal(%r)' % self.text
+
+    def __getstate__(self):
+        return self.text
+
+    def __setstate__(self, text):
+        self.__init__(text)
+
+    def exact(self):
+        """
+        Return the exact value as a Fraction or None for an infinity.
+
+        The sign of a zero is in the attribute negative.
+        """
+        if self._exact is None and not self.infinite:
+            self._exact = _fraction(self.text)
+        return self._exact
+
+    def _roundTo(self, fmt):
+        """Return the value rounded to a format, see _round."""
+        rounded = self._rounded.get(fmt)
+        if rounded is None:
+            precision, emin, emax = FORMATS[fmt][:3]
+            if self.infinite:
+                rounded = (self.negative, emax + 1, 0)
+            else:
+                rounded = _round(self.exact(), self.negative, precision,
+                                 emin, emax)
+            self._rounded[fmt] = rounded
+        return rounded
+
+    def bits(self, fmt='double'):
+        """
+        Return the bit pattern of the correctly rounded value as an int.
+
+        Arguments:
+        fmt -- 'float', 'double' or 'long_double', see FORMATS
+        """
+        return _bits(self._roundTo(fmt), *FORMATS[fmt])
+
+    def hex(self, fmt='double'):
+        """
+        Return the correctly rounded value as hex-float string.
+
+        Arguments:
+        fmt -- 'float', 'double' or 'long_double', see FORMATS
+        """
+        return _hex(self._roundTo(fmt), *FORMATS[fmt][:3])
+
+    def isExact(self, fmt='double'):
+        """
+        Return if the value is representable in a format without rounding.
+
+        Arguments:
+        fmt -- 'float', 'double' or 'long_double', see FORMATS
+        """
+        if self.infinite:
+            return True
+        negative, e, significand = self._roundTo(fmt)
+        precision, emin, emax = FORMATS[fmt][:3]
+        if e > emax:
+            return False
+        value = Fraction(significand) * Fraction(2) ** (e - precision + 1)
+        return value == abs(self.exact())
+
+    def __float__(self):
+        """Return the value correctly rounded to a double."""
+        return struct.unpack('>d', struct.pack('>Q', self.bits('double')))[0]
+
+
+@functools.lru_cache(maxsize=TABLE_SIZE)
+def decode(text):
+    """
+    Return the shared Literal of the text of a numeric token.
+
+    Arguments:
+    text -- the text of an INT, FLOAT or INF token
+    """
+    return Literal(text)
+
+
+def tableSize():
+    """Return the number of memoized literals."""
+    return decode.cache_info().currsize
+
+
+def clearTable():
+    """Remove all memoized literals, e.g. between large runs."""
+    decode.cache_clear()
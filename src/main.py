@@ -24,13 +24,20 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import astcache
+import columnar
+import concurrent.futures
 import dslparser
 import testAST
 import discovery
+import itlinput
 import lang
+import passes
+import sourcemap
 import os
 import optparse
 import re
+import sys
 from ast import literal_eval as makeTuple
 import time
 import ntpath
@@ -51,7 +58,9 @@ class ConsoleParser(optparse.OptionParser):
             self.add_option("-s", "--sourceDirectory", dest="sourceDir",
                      # TODO: check for operating systems other than linux
                      default='../itl',
-                     help="Directory with DSL tests")
+                     help="Directory with DSL tests, a DSL test file, "
+                          "a tar or zip archive or - for stdin. The files "
+                          "may be compressed with gzip, xz or bzip2")
 
             self.add_option("-f", "--fileRegex", dest="fileRegex",
                             default='.*',
@@ -66,6 +75,55 @@ class ConsoleParser(optparse.OptionParser):
                             
             self.add_option("-v", "--verbose", action="store_true",
                             dest="verbose")
+
+            self.add_option("--scanner", dest="scanner", type="choice",
+                            choices=list(dslparser.SCANNERS), default="ply",
+                            help="Scanner for the DSL tests, 'ply' or 'fast'")
+
+            self.add_option("--backend", dest="backend", type="choice",
+                            choices=list(dslparser.BACKENDS), default="lalr",
+                            help="Parser for the DSL tests, 'lalr' or 'rd'")
+
+            self.add_option("-j", "--jobs", dest="jobs", type="int",
+                            default=1,
+                            help="Number of processes to parse a DSL test "
+                                 "file, 0 for the number of CPUs")
+
+            self.add_option("--no-ast-cache", action="store_false",
+                            dest="astCache", default=True,
+                            help="Parse every DSL test file instead of "
+                                 "loading its AST from the cache. The cache "
+                                 "is on by default and keeps up to %d MB "
+                                 "in ~/.cache/itf1788/ast, or in the "
+                                 "directory ast of $ITF1788_CACHE_DIR"
+                                 % (astcache.MAX_SIZE // (1024 * 1024)))
+
+            self.add_option("--columnar", action="store_true",
+                            dest="columnar",
+                            help="Keep the tests of every DSL test file in "
+                                 "columns instead of nodes, for very large "
+                                 "files, see columnar.py. A DSL test file "
+                                 "is parsed one testcase at a time then, "
+                                 "without the AST cache, unless it is "
+                                 "transformed with --pass")
+
+            self.add_option("-k", "--keep-going", action="store_true",
+                            dest="keepGoing",
+                            help="Report all syntax errors of the DSL test "
+                                 "files and generate the valid testcases")
+
+            self.add_option("-m", "--source-map", action="store_true",
+                            dest="sourceMap",
+                            help="Write a map from the lines of every "
+                                 "generated file to the DSL tests, see "
+                                 "sourcemap.py")
+
+            self.add_option("-p", "--pass", action="append", dest="passes",
+                            default=[], metavar="PASS",
+                            help="Transform the tests before they are "
+                                 "generated, may be given more than once: "
+                                 "filter:REGEX, dedupe, sample:F[:SEED], "
+                                 "shard:I/N or limit:N, see passes.py")
         
                      
         def processConsoleParameters(self):
@@ -79,6 +137,18 @@ class ConsoleParser(optparse.OptionParser):
             self.testFiles = self._buildTestFileList(options)
             self.outDir = options.outDir
             self.verbose = options.verbose
+            self.scanner = options.scanner
+            self.backend = options.backend
+            self.jobs = options.jobs or None
+            self.astCache = options.astCache
+            self.columnar = options.columnar
+            self.keepGoing = options.keepGoing
+            self.sourceMap = options.sourceMap
+            self.fileRegex = options.fileRegex
+            self.pipeline = None
+            if options.passes:
+                self.pipeline = passes.Pipeline.fromSpecs(options.passes,
+                                                          options.verbose)
         
         def _buildSpecList(self, options):
             '''
@@ -160,19 +230,28 @@ class ConsoleParser(optparse.OptionParser):
             Assemble a list of all ITL tests corresponding to the passed
             parameter
             '''
+            if not os.path.isdir(options.sourceDir):
+                # a single file, an archive or stdin
+                return [options.sourceDir]
             testFiles = [os.path.join(options.sourceDir, f)
                               for f in os.listdir(options.sourceDir)
                               if os.path.isfile(os.path.join(options.sourceDir,
                                                              f))
                               if re.match(options.fileRegex, f)]
-            testFiles = list(filter(lambda f: f.endswith('.itl'), testFiles))
+            testFiles = list(filter(itlinput.isInput, testFiles))
             return testFiles
             
         def _checkSrcDir(self, options):
             '''
             Check if the path to the source directory is well formed
             '''
-            if not os.path.isdir(options.sourceDir):
+            if options.sourceDir == itlinput.STDIN:
+                return
+            if os.path.isfile(options.sourceDir):
+                if not itlinput.isInput(options.sourceDir):
+                    raise IOError('Invalid source file: ' +\
+                                    options.sourceDir)
+            elif not os.path.isdir(options.sourceDir):
                 raise IOError('Invalid source directory: ' +\
                                 options.sourceDir)
                 
@@ -232,8 +311,63 @@ class ConsoleParser(optparse.OptionParser):
 
                     --generate tests for C++ and Octave only
                     python3 main.py -s "../itl" -c "(cpp, *, *); (octave, *, *)"
+
+                    --generate the first of 4 shards of the distinct tests of
+                      the operation add
+                    python3 main.py -p "filter:add" -p dedupe -p "shard:0/4"
                     """)
 
+def parseInput(optParser, includes, testfile):
+    '''
+    Yield a tuple (name, ast, diagnostics) for every ITL file of an input.
+
+    name is the path of the output files relative to the output directory
+    with the suffix .itl, i.e. the base name of a plain ITL file or the name
+    yielded by itlinput.iterInputs, which keeps the relative path of an
+    archive member. The includes of the files are resolved relative to the
+    directory of the input, as if the members of an archive were extracted
+    next to it.
+
+    Arguments:
+    optParser -- the ConsoleParser with the processed options
+    includes -- the dslparser.IncludeResolver which parses the plain ITL
+                files
+    testfile -- an entry of optParser.testFiles
+    '''
+    if itlinput.isPlain(testfile):
+        if optParser.keepGoing:
+            ast, diagnostics = dslparser.recoverParse(
+                testfile, scanner=optParser.scanner)
+            includes.resolve(ast, testfile)
+        elif optParser.columnar and optParser.pipeline is None:
+            ast = columnar.parse(testfile, scanner=optParser.scanner,
+                                 backend=optParser.backend, includes=includes)
+            diagnostics = []
+        else:
+            ast = includes.parse(testfile)
+            diagnostics = []
+        yield ntpath.basename(testfile), ast, diagnostics
+        return
+
+    # compressed files, archive members and stdin are read as streams, the
+    # file regex applies to the base names of the members
+    accept = lambda name: re.match(optParser.fileRegex,
+                                   os.path.basename(name))
+    for name, stream in itlinput.iterInputs(testfile, accept):
+        fileName = os.path.basename(name)
+        if optParser.keepGoing:
+            # the recovering parser needs the whole text
+            ast, diagnostics = dslparser.recoverParseString(
+                stream.read(), fileName, scanner=optParser.scanner)
+        else:
+            ast = dslparser.parseStream(stream, fileName,
+                                        scanner=optParser.scanner,
+                                        backend=optParser.backend)
+            diagnostics = []
+        includes.resolve(ast, os.path.join(os.path.dirname(testfile), name))
+        yield name, ast, diagnostics
+
+
 def main():            
     # measure run time
     startTime = time.clock()
@@ -244,11 +378,40 @@ def main():
     specList = optParser.specList
     testFiles = optParser.testFiles
     outDir = optParser.outDir
+    if optParser.astCache:
+        parse = astcache.ASTCache().parse
+    else:
+        parse = dslparser.parse
+    # the processes of a parallel parse are started once for all files
+    pool = None
+    if optParser.jobs != 1:
+        pool = concurrent.futures.ProcessPoolExecutor(optParser.jobs)
+    # every included file is parsed once
+    includes = dslparser.IncludeResolver(
+        lambda path: parse(path, scanner=optParser.scanner,
+                           backend=optParser.backend, jobs=optParser.jobs,
+                           pool=pool))
+
+    syntaxErrors = 0
+    sharedLiterals = literalNodes = 0
 
     # Assemble source files
-    for testfile in testFiles:
-        # parse the current ITL file and build an abstract syntax tree
-        ast = dslparser.parse(testfile)
+    inputs = (result for f in testFiles
+              for result in parseInput(optParser, includes, f))
+    for testfile, ast, diagnostics in inputs:
+        # print the syntax errors of the current ITL file
+        for diagnostic in diagnostics:
+            print(diagnostic)
+        syntaxErrors += len(diagnostics)
+
+        # filter the tests once for all configurations
+        if optParser.pipeline is not None:
+            ast = ast.applyPasses(optParser.pipeline)
+
+        # the passes work on the nodes, the tests are put into columns after
+        # them, the files of streams are parsed as a whole
+        if optParser.columnar and not isinstance(ast, columnar.ColumnStore):
+            ast = columnar.fromAST(ast)
         
         # iterate over configurations
         for language, testlib, arithlib in specList:
@@ -258,7 +421,7 @@ def main():
             
             # paths to output directory and output file
             writeDir = '/'.join([outDir, language, testlib, arithlib])
-            writeFile = '.'.join(ntpath.basename(testfile).split('.')[:-1]) + \
+            writeFile = '.'.join(testfile.split('.')[:-1]) + \
                         out.lang_extension
             
             if optParser.verbose:
@@ -266,25 +429,50 @@ def main():
                       str((language, testlib, arithlib)), '...')    
             
             # generate output content by visiting the AST
-            v = testAST.ASTVisitor(out, cbPath)
+            v = testAST.ASTVisitor(out, cbPath, optParser.sourceMap)
             (content, warnings) = ast.accept(v)           
 
-            # create output directory if it does not exist
-            if not os.path.exists(writeDir):
-                os.makedirs(writeDir)
+            # create output directory if it does not exist, the members of
+            # an archive are written to the subdirectories of their paths
+            fileDir = os.path.dirname(writeDir + '/' + writeFile)
+            if not os.path.exists(fileDir):
+                os.makedirs(fileDir)
 
             # write content
             open(writeDir + '/' + writeFile, 'w+').write(content)
+            if optParser.sourceMap:
+                v.sourceMap.dump(writeDir + '/' + writeFile + sourcemap.SUFFIX)
             if optParser.verbose:
                 for warn in warnings:
                     print(warn)
                 print('Done.\n')
+
+        # the literals of a file are not shared with the next files, so the
+        # flyweight table holds the literals of one file
+        literals, nodes = dslparser.flyweightStats()
+        sharedLiterals += literals
+        literalNodes += nodes
+        dslparser.clearFlyweights()
+
+    if pool is not None:
+        pool.shutdown()
             
     endTime = time.clock()
     if optParser.verbose:
         print('-'*80)
         print('Generated output for', len(testFiles), 'testfiles in',
               "%.2f" % round(endTime - startTime, 2), 'seconds.')
+        if literalNodes:
+            print(sharedLiterals, 'literals share', literalNodes,
+                  'nodes, deduplication ratio',
+                  "%.1f" % (sharedLiterals / literalNodes) + '.')
+        if optParser.pipeline is not None:
+            print('Passes:')
+            for line in optParser.pipeline.report():
+                print('   ', line)
+    if syntaxErrors:
+        print(syntaxErrors, 'syntax errors.')
+        sys.exit(1)
 
 # Run main method if this script is called directly
 if __name__ == '__main__':
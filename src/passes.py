@@ -0,0 +1,452 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+"""
+Passes which transform the tests of an AST between parsing and translation.
+
+A pass is a lazy transformation of an iterator over the tests of a file,
+e.g. it drops the tests of other operations or the tests seen before. The
+passes of a Pipeline are applied to an AST by DSLNode.applyPasses, which
+returns a new AST with the remaining tests:
+
+    pipeline = passes.Pipeline.fromSpecs(['dedupe', 'shard:0/4'])
+    ast = ast.applyPasses(pipeline)
+
+Adjacent passes which decide test by test, see Pass.keep, are fused: they
+are applied in one loop over the tests, one test after the other, without
+an iterator per pass. The tests of generators are built one at a time and
+only the remaining tests are kept. The passes see the tests of a template
+once per type, as the tests of its instances.
+"""
+
+import hashlib
+import itertools
+import re
+import time
+
+
+class Pass(object):
+
+    """
+    Base class of the passes.
+
+    A pass transforms the tests in apply. A pass which decides for every
+    test on its own whether it is kept defines keep instead, such passes
+    are fused by the Pipeline.
+    """
+
+    # the name of the pass in the specification, see fromSpec
+    name = None
+
+    # a function of a TestNode which returns whether the test is kept, or
+    # None if the pass transforms the tests in apply
+    keep = None
+
+    def reset(self):
+        """Forget the tests of the previous file, called once per file."""
+        pass
+
+    def apply(self, tests):
+        """
+        Return an iterator over the transformed tests.
+
+        Arguments:
+        tests -- an iterator over TestNode objects
+        """
+        return filter(self.keep, tests)
+
+    def __str__(self):
+        return self.name
+
+
+class OperationFilter(Pass):
+
+    """Keep the tests whose operation name matches a regex."""
+
+    name = 'filter'
+
+    def __init__(self, regex):
+        """
+        Initialize the pass.
+
+        Arguments:
+        regex -- a regex for the operation names, it must match the whole
+                 name
+        """
+        self.regex = regex
+        self._match = re.compile(regex).fullmatch
+
+    def keep(self, test):
+        return self._match(test.opName.ident.val) is not None
+
+    def __str__(self):
+        return self.name + ':' + self.regex
+
+
+class Dedupe(Pass):
+
+    """
+    Keep the first of the tests of a file with the same structure, see
+    Node.digest. The comments and the positions of the tests are ignored.
+    """
+
+    name = 'dedupe'
+
+    def __init__(self):
+        self.seen = set()
+
+    def reset(self):
+        self.seen = set()
+
+    def keep(self, test):
+        seen = self.seen
+        size = len(seen)
+        seen.add(test)
+        return len(seen) != size
+
+
+class Sample(Pass):
+
+    """
+    Keep a fraction of the tests.
+
+    A test is kept by its digest, so the same tests are kept in every run
+    and in every order of the files.
+    """
+
+    name = 'sample'
+
+    def __init__(self, fraction, seed=0):
+        """
+        Initialize the pass.
+
+        Arguments:
+        fraction -- the expected fraction of the tests which is kept, from
+                    0 to 1
+        seed -- an integer, other seeds keep other tests
+        """
+        self.fraction = fraction
+        self.seed = seed
+        self._salt = seed.to_bytes(8, 'big', signed=True)
+        self._limit = int(fraction * 2 ** 64)
+
+    def keep(self, test):
+        h = hashlib.sha256(self._salt + test.digest()).digest()
+        return int.from_bytes(h[:8], 'big') < self._limit
+
+    def __str__(self):
+        return '%s:%g:%d' % (self.name, self.fraction, self.seed)
+
+
+class Shard(Pass):
+
+    """
+    Keep the tests of one of count shards.
+
+    The shard of a test depends only on its digest, so the shards of every
+    run are disjoint and cover all tests.
+    """
+
+    name = 'shard'
+
+    def __init__(self, index, count):
+        """
+        Initialize the pass.
+
+        Arguments:
+        index -- the index of the shard, from 0 to count - 1
+        count -- the number of shards
+        """
+        self.index = index
+        self.count = count
+
+    def keep(self, test):
+        return hash(test) % self.count == self.index
+
+    def __str__(self):
+        return '%s:%d/%d' % (self.name, self.index, self.count)
+
+
+class Limit(Pass):
+
+    """
+    Keep the first tests of a file.
+
+    The pass stops to read its tests when it has enough, so it is not fused
+    with other passes.
+    """
+
+    name = 'limit'
+
+    def __init__(self, count):
+        """
+        Initialize the pass.
+
+        Arguments:
+        count -- the number of tests per file
+        """
+        self.count = count
+        self.remaining = count
+
+    def reset(self):
+        self.remaining = self.count
+
+    def apply(self, tests):
+        # the tests of all testcases of a file are counted together
+        for test in itertools.islice(tests, self.remaining):
+            self.remaining -= 1
+            yield test
+
+    def __str__(self):
+        return '%s:%d' % (self.name, self.count)
+
+
+def fromSpec(spec):
+    """
+    Return the pass of a specification.
+
+    The specification is the name of the pass, followed by its arguments
+    after a colon:
+
+    filter:REGEX    -- the tests whose operation name matches REGEX
+    dedupe          -- the first of the equal tests of a file
+    sample:F[:SEED] -- the fraction F of the tests
+    shard:I/N       -- the shard I of N shards of the tests
+    limit:N         -- the first N tests of a file
+
+    Raise an IOError if the specification is invalid.
+
+    Arguments:
+    spec -- the specification as a string
+    """
+    name, _, args = spec.partition(':')
+    try:
+        if name == 'filter':
+            re.compile(args)
+            return OperationFilter(args)
+        if name == 'dedupe' and not args:
+            return Dedupe()
+        if name == 'sample':
+            fraction, _, seed = args.partition(':')
+            fraction = float(fraction)
+            if 0 <= fraction <= 1:
+                return Sample(fraction, int(seed or 0))
+        if name == 'shard':
+            index, count = [int(v) for v in args.split('/')]
+            if 0 <= index < count:
+                return Shard(index, count)
+        if name == 'limit' and int(args) >= 0:
+            return Limit(int(args))
+    except (ValueError, OverflowError, re.error):
+        pass
+    raise IOError('Invalid pass: ' + spec)
+
+
+class PassStats(object):
+
+    """The number of tests read and kept by a pass and the time it took."""
+
+    def __init__(self):
+        self.read = 0
+        self.kept = 0
+        self.time = 0.0
+
+
+class Pipeline(object):
+
+    """
+    A sequence of passes.
+
+    The passes are applied in their order. Every maximal run of adjacent
+    passes with a keep function is one stage, a loop which applies their
+    keep functions to a test until one of them drops it, the other passes
+    are stages of their own. The stages are chained lazily, so the tests
+    are read once and one at a time.
+
+    The number of tests read and kept by every pass is counted in stats,
+    the time of every pass is measured if profile is set.
+    """
+
+    def __init__(self, passes, profile=False):
+        """
+        Initialize the pipeline.
+
+        Arguments:
+        passes -- a list of Pass objects
+        profile -- measure the time of every pass
+        """
+        self.passes = passes
+        self.profile = profile
+        self.stats = [PassStats() for _ in passes]
+        self.stages = []
+        for fused, group in itertools.groupby(
+                enumerate(passes), lambda item: item[1].keep is not None):
+            indices = [i for i, _ in group]
+            if fused:
+                self.stages.append(indices)
+            else:
+                self.stages.extend([i] for i in indices)
+
+    @classmethod
+    def fromSpecs(cls, specs, profile=False):
+        """
+        Return the pipeline of a list of specifications, see fromSpec.
+
+        Arguments:
+        specs -- a list of strings
+        profile -- measure the time of every pass
+        """
+        return cls([fromSpec(spec) for spec in specs], profile)
+
+    def reset(self):
+        """Start a new file, see Pass.reset."""
+        for p in self.passes:
+            p.reset()
+
+    def run(self, tests):
+        """
+        Return an iterator over the tests kept by all passes.
+
+        Arguments:
+        tests -- an iterable of TestNode objects
+        """
+        tests = iter(tests)
+        for indices in self.stages:
+            if self.passes[indices[0]].keep is not None:
+                if self.profile:
+                    tests = self._profiledFused(indices, tests)
+                else:
+                    tests = self._fused(indices, tests)
+            elif self.profile:
+                tests = self._profiled(indices[0], tests)
+            else:
+                tests = self._counted(indices[0], tests)
+        return tests
+
+    def _fused(self, indices, tests):
+        """
+        Yield the tests kept by the keep functions of some passes.
+
+        Only the tests read by the stage and the tests dropped by every pass
+        are counted in the loop, the numbers of the passes follow from them
+        when the stage is done.
+        """
+        keeps = [self.passes[i].keep for i in indices]
+        dropped = dict((keep, 0) for keep in keeps)
+        read = 0
+        try:
+            for test in tests:
+                read += 1
+                for keep in keeps:
+                    if not keep(test):
+                        dropped[keep] += 1
+                        break
+                else:
+                    yield test
+        finally:
+            for i, keep in zip(indices, keeps):
+                stats = self.stats[i]
+                stats.read += read
+                read -= dropped[keep]
+                stats.kept += read
+
+    def _profiledFused(self, indices, tests):
+        """Like _fused, with the time of every keep function."""
+        clock = time.perf_counter
+        stages = [(self.passes[i].keep, self.stats[i]) for i in indices]
+        for test in tests:
+            for keep, stats in stages:
+                stats.read += 1
+                start = clock()
+                kept = keep(test)
+                stats.time += clock() - start
+                if not kept:
+                    break
+                stats.kept += 1
+            else:
+                yield test
+
+    def _counted(self, index, tests):
+        """Yield the tests of the apply method of a pass."""
+        stats = self.stats[index]
+
+        def read():
+            for test in tests:
+                stats.read += 1
+                yield test
+
+        for test in self.passes[index].apply(read()):
+            stats.kept += 1
+            yield test
+
+    def _profiled(self, index, tests):
+        """
+        Like _counted, with the time of the pass. The time spent to read its
+        tests belongs to the passes before it and is not counted.
+        """
+        clock = time.perf_counter
+        stats = self.stats[index]
+        # the time to read the tests from the previous stage
+        upstream = [0.0]
+
+        def read():
+            it = iter(tests)
+            while True:
+                start = clock()
+                try:
+                    test = next(it)
+                except StopIteration:
+                    upstream[0] += clock() - start
+                    return
+                upstream[0] += clock() - start
+                stats.read += 1
+                yield test
+
+        result = iter(self.passes[index].apply(read()))
+        while True:
+            upstream[0] = 0.0
+            start = clock()
+            try:
+                test = next(result)
+            except StopIteration:
+                stats.time += clock() - start - upstream[0]
+                return
+            stats.time += clock() - start - upstream[0]
+            stats.kept += 1
+            yield test
+
+    def report(self):
+        """Return a line per pass with its number of tests and its time."""
+        lines = []
+        for p, stats in zip(self.passes, self.stats):
+            line = '%-20s %8d tests read, %8d kept' % (p, stats.read,
+                                                       stats.kept)
+            if self.profile:
+                line += ', %.3f seconds' % stats.time
+            lines.append(line)
+        return lines
@@ -23,10 +23,14 @@
 #   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
-   
+
+import re
+
+# compiled once, cb_fpNum is called for every number of the tests
+_hexNumber = re.compile("[+-]?(0x|0X)([0-9a-fA-F])+(UL?|U(LL)|(LL)U?|LU?)?")
+
 #strip suffix
 def cb_fpNum(val):
-    import re
-    if re.match("[+-]?(0x|0X)([0-9a-fA-F])+(UL?|U(LL)|(LL)U?|LU?)?", val):
+    if _hexNumber.match(val):
         return '"' + val + '"' 
     return val
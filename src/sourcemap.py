@@ -0,0 +1,218 @@
+#
+#                              ITF1788
+#
+#   Interval Test Framework for IEEE 1788 Standard for Interval Arithmetic
+#
+#
+#   Copyright 2014
+#
+#   Marco Nehmeier (nehmeier@informatik.uni-wuerzburg.de)
+#   Maximilian Kiesner (maximilian.kiesner@stud-mail.uni-wuerzburg.de)
+#
+#   Department of Computer Science
+#   University of Wuerzburg, Germany
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+
+"""
+Source maps from generated test files back to the ITL files.
+
+A source map is written next to a generated file if main.py is called with
+--source-map. It maps ranges of lines of the generated file to the
+positions of the testcases and tests in the ITL sources, so a failing
+assertion can be traced back to its test without searching the ITL files.
+
+Usage: python3 sourcemap.py GENERATED_FILE[:LINE] [LINE ...]
+"""
+
+import bisect
+import json
+import sys
+
+# bump if the format of the map files changes
+SOURCE_MAP_VERSION = 1
+
+# suffix of a map file, appended to the name of the generated file
+SUFFIX = '.map'
+
+
+class SourceMap(object):
+
+    """
+    The map of one generated file.
+
+    The ranges of the testcases and the ranges of the tests are kept in two
+    lists sorted by their first line. Ranges of one kind do not overlap, so a
+    line is found by a binary search in each list.
+    """
+
+    def __init__(self, generated):
+        """
+        Initialize an empty map.
+
+        Arguments:
+        generated -- name of the generated file
+        """
+        self.generated = generated
+        self.sources = []
+        self.testcases = []
+        self.tests = []
+        self._sourceIds = {}
+        # the first lines of the ranges, built by the first lookup
+        self._starts = None
+
+    def sourceId(self, fileName):
+        """
+        Return the id of an ITL file, the file is added on first use.
+
+        Arguments:
+        fileName -- name of the ITL file
+        """
+        if fileName not in self._sourceIds:
+            self._sourceIds[fileName] = len(self.sources)
+            self.sources.append(fileName)
+        return self._sourceIds[fileName]
+
+    def addTestcase(self, first, last, fileName, position, name):
+        """
+        Add the range of a testcase.
+
+        The ranges must be added in the order of the generated file.
+
+        Arguments:
+        first -- first line of the range in the generated file
+        last -- last line of the range in the generated file
+        fileName -- name of the ITL file of the testcase
+        position -- the (line, column) of the testcase in the ITL file
+        name -- the qualident of the testcase
+        """
+        self.testcases.append((first, last, self.sourceId(fileName))
+                              + tuple(position) + (name,))
+        self._starts = None
+
+    def addTest(self, first, last, fileName, position):
+        """
+        Add the range of a test.
+
+        The ranges must be added in the order of the generated file.
+
+        Arguments:
+        first -- first line of the range in the generated file
+        last -- last line of the range in the generated file
+        fileName -- name of the ITL file of the test
+        position -- the (line, column) of the test in the ITL file
+        """
+        self.tests.append((first, last, self.sourceId(fileName))
+                          + tuple(position))
+        self._starts = None
+
+    def _find(self, ranges, starts, line):
+        """Return the range of a sorted list which contains line or None."""
+        i = bisect.bisect_right(starts, line) - 1
+        if i >= 0 and ranges[i][1] >= line:
+            return ranges[i]
+        return None
+
+    def lookup(self, line):
+        """
+        Return the ITL position of a line of the generated file.
+
+        Return a tuple (fileName, line, column, testcase, isTest), where
+        isTest is False if the line belongs to a testcase but not to one of
+        its tests, e.g. to a closing brace. Return None if the line belongs
+        to no testcase.
+
+        Arguments:
+        line -- line number in the generated file
+        """
+        if self._starts is None:
+            self._starts = ([r[0] for r in self.testcases],
+                            [r[0] for r in self.tests])
+        testcase = self._find(self.testcases, self._starts[0], line)
+        if testcase is None:
+            return None
+        test = self._find(self.tests, self._starts[1], line)
+        if test is not None:
+            return (self.sources[test[2]], test[3], test[4], testcase[5],
+                    True)
+        return (self.sources[testcase[2]], testcase[3], testcase[4],
+                testcase[5], False)
+
+    def dump(self, path):
+        """
+        Write the map as JSON.
+
+        Arguments:
+        path -- path of the map file
+        """
+        with open(path, 'w') as f:
+            json.dump({'version': SOURCE_MAP_VERSION,
+                       'generated': self.generated,
+                       'sources': self.sources,
+                       'testcases': self.testcases,
+                       'tests': self.tests}, f, separators=(',', ':'))
+
+
+def load(path):
+    """
+    Read a map file written by SourceMap.dump.
+
+    Raise an IOError if the file has another version.
+
+    Arguments:
+    path -- path of the map file
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != SOURCE_MAP_VERSION:
+        raise IOError('Unsupported source map version in ' + path)
+    sourceMap = SourceMap(data['generated'])
+    for fileName in data['sources']:
+        sourceMap.sourceId(fileName)
+    sourceMap.testcases = [tuple(r) for r in data['testcases']]
+    sourceMap.tests = [tuple(r) for r in data['tests']]
+    return sourceMap
+
+
+def main(args):
+    """
+    Print the ITL positions of lines of a generated file.
+
+    Arguments:
+    args -- the command line arguments without the program name
+    """
+    if not args:
+        print(__doc__.strip().split('\n')[-1])
+        return 2
+    generated, sep, line = args[0].rpartition(':')
+    if not sep or not line.isdigit():
+        generated, lines = args[0], args[1:]
+    else:
+        lines = [line] + args[1:]
+    sourceMap = load(generated + SUFFIX)
+    for line in lines:
+        result = sourceMap.lookup(int(line))
+        if result is None:
+            print('%s:%s: no testcase' % (generated, line))
+            continue
+        fileName, itlLine, column, testcase, isTest = result
+        print('%s:%s: %s:%d:%d: %s %s' % (
+            generated, line, fileName, itlLine, column,
+            'test in testcase' if isTest else 'testcase', testcase))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
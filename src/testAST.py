@@ -27,8 +27,41 @@
 """This module contains classes to model an AST."""
 
 from string import Template
+import copy
+import hashlib
 import importlib
+import itertools
 import re
+import sys
+import threading
+
+import literals
+import sourcemap
+
+# the type parameters of a testcase template and the suffixes of their
+# literals, see TestcaseTemplateNode
+TYPE_SUFFIXES = {'float': 'F', 'double': '', 'long_double': 'L'}
+
+# the types of the intervals by the types of their bounds, the nodes share
+# these strings instead of building one per node, see intervalType
+_INTERVAL_TYPES = dict((t, 'interval<' + t + '>') for t in TYPE_SUFFIXES)
+
+# marks the start and the end of the translation of a node while a source
+# map is built, see ASTVisitor.mark
+_markRegex = re.compile('\x00(/?)([0-9]+)\x00')
+
+def intervalType(dataType):
+    """
+    Return the shared type string of an interval, e.g. 'interval<double>'.
+
+    Arguments:
+    dataType -- the type of the bounds of the interval
+    """
+    intervalType = _INTERVAL_TYPES.get(dataType)
+    if intervalType is None:
+        intervalType = sys.intern('interval<' + dataType + '>')
+    return intervalType
+
 
 class Node(object):
 
@@ -43,22 +76,32 @@ class Node(object):
     not distinguish method parameters by type. Thus an overloaded visit-Method
     is not possible. Instead, e.g. for a Node of type 'LineCommentNode', we
     call the visitors 'visitLineCommentNode' method.
+
+    The nodes have no instance dictionary, every subclass lists its
+    attributes in __slots__, see fields.
+
+    Nodes are equal if they have the same structure, see digest, so they
+    can be used as keys of dictionaries and caches.
     """
 
+    # the cached result of digest
+    __slots__ = ('_digest',)
+
     def accept(self, visitor):
         """
         The accept method for the visitor functionality.
 
+        The visit method is looked up in the visitTable of the visitor, see
+        visitTable, and resolved by name on a miss.
+
         Arguments:
         visitor -- a visitor object
         """
-
-        #
-        # assemble function as 'visitCLASSNAME' where CLASSNAME represents
-        # the name of the concrete class of the node, i.e. a subclass of Node
-        #
-        visitFnc = getattr(visitor, 'visit' + self.__class__.__name__)
-        return visitFnc(self)
+        try:
+            visitFnc = visitor.visitTable[self.__class__]
+        except (AttributeError, KeyError):
+            visitFnc = _resolveVisit(visitor, self.__class__)
+        return visitFnc(visitor, self)
 
     def getType(self):
         """
@@ -66,11 +109,187 @@ class Node(object):
         """
         return self.__class__.__name__
 
+    def fields(self):
+        """
+        Return the names of the public attributes which are set on the
+        node, in the order of their declaration in __slots__.
+        """
+        return [name for name in _slotNames(type(self))
+                if hasattr(self, name)]
+
+    def digest(self):
+        """
+        Return the structural hash of the node as the 32 bytes of a SHA-256
+        digest.
+
+        The digest covers the class of the node and its attributes
+        recursively, e.g. the text, the type suffix and the decoration of a
+        literal, but not the comments, the position and the file name. It is
+        the same in every process and Python version, so it can be stored,
+        e.g. as the key of an on-disk cache. It is computed on the first
+        call and cached, the node must not be changed afterwards.
+        """
+        try:
+            return self._digest
+        except AttributeError:
+            pass
+        self._digest = structuralDigest(
+            self.__class__.__name__,
+            [(name, getattr(self, name)) for name in self.fields()
+             if name not in _UNSTRUCTURED])
+        return self._digest
+
+    def __eq__(self, other):
+        """Return whether the nodes have the same digest."""
+        if not isinstance(other, Node):
+            return NotImplemented
+        return self is other or self.digest() == other.digest()
+
+    def __hash__(self):
+        """Return the first 8 bytes of the digest as an integer."""
+        return int.from_bytes(self.digest()[:8], 'big')
+
+
+# the attributes which are not part of the digest of a node: the comments,
+# the position in the source, the signature of a test, which is computed
+# from its literals
+_UNSTRUCTURED = frozenset(['comments', 'position', 'fileName', 'signature'])
+
+
+def structuralDigest(name, items):
+    """
+    Return the SHA-256 digest of a node by its class name and its attributes.
+
+    Arguments:
+    name -- the name of the class of the node
+    items -- a list of tuples (name, value) of the attributes, values are
+             nodes, strings, numbers, booleans, None, literals.Literal
+             objects and lists or tuples of them
+    """
+    h = hashlib.sha256()
+    _encode(h, name)
+    for item in items:
+        _encode(h, item)
+    return h.digest()
+
+
+def _encode(h, value):
+    """
+    Add an unambiguous encoding of a value to a hash object.
+
+    Arguments:
+    h -- a hashlib object
+    value -- a value of the attributes of a node, see structuralDigest
+    """
+    if isinstance(value, Node):
+        h.update(b'N')
+        h.update(value.digest())
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        h.update(b'S%d:' % len(data))
+        h.update(data)
+    elif value is None:
+        h.update(b'0')
+    elif isinstance(value, bool):
+        h.update(b'T' if value else b'F')
+    elif isinstance(value, int):
+        h.update(b'I%d;' % value)
+    elif isinstance(value, (list, tuple)):
+        h.update(b'L%d:' % len(value))
+        for v in value:
+            _encode(h, v)
+    elif isinstance(value, literals.Literal):
+        # the value is determined by the text
+        h.update(b'V')
+        _encode(h, value.text)
+    else:
+        raise TypeError('Cannot digest ' + type(value).__name__)
+
+
+# maps a visitor class to its table of visit methods, see visitTable
+_visitTables = {}
+
+
+def _nodeClasses(cls=Node):
+    """Yield the subclasses of Node which are defined so far."""
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _nodeClasses(sub)
+
+
+def visitTable(visitorClass):
+    """
+    Return the table of the visit methods of a visitor class.
+
+    The table maps a Node class to the function of the visitor class which
+    visits it, e.g. TestNode to visitorClass.visitTestNode. It is built
+    once per visitor class for the node classes defined so far and shared
+    by all visitors of the class. Node.accept adds the other node classes
+    on their first visit, so every method is resolved once per pair of
+    visitor class and node class instead of on every visit.
+
+    Arguments:
+    visitorClass -- a visitor class, e.g. a subclass of ASTVisitor
+    """
+    table = _visitTables.get(visitorClass)
+    if table is None:
+        table = {}
+        for nodeClass in _nodeClasses():
+            visitFnc = getattr(visitorClass, 'visit' + nodeClass.__name__,
+                               None)
+            if visitFnc is not None:
+                table[nodeClass] = visitFnc
+        table = _visitTables.setdefault(visitorClass, table)
+    return table
+
+
+def _resolveVisit(visitor, nodeClass):
+    """
+    Return the function which visits a node class, called with the visitor
+    and the node, and add it to the visitTable of the visitor if it has one.
+
+    Arguments:
+    visitor -- a visitor object
+    nodeClass -- a subclass of Node
+    """
+    name = 'visit' + nodeClass.__name__
+    visitFnc = getattr(type(visitor), name, None)
+    if visitFnc is None:
+        # a method of the instance only, it is looked up on every visit
+        return lambda visitor, node: getattr(visitor, name)(node)
+    table = getattr(visitor, 'visitTable', None)
+    if table is not None:
+        table[nodeClass] = visitFnc
+    return visitFnc
+
+
+# maps a subclass of Node to the names of its slots, see _slotNames
+_slotNamesCache = {}
+
+
+def _slotNames(cls):
+    """
+    Return the names of the slots of a Node class and of its base classes,
+    the names of the base classes first.
+
+    Arguments:
+    cls -- a subclass of Node
+    """
+    names = _slotNamesCache.get(cls)
+    if names is None:
+        names = tuple(name for c in reversed(cls.__mro__)
+                      for name in c.__dict__.get('__slots__', ())
+                      if not name.startswith('_'))
+        _slotNamesCache[cls] = names
+    return names
+
 
 class LineCommentNode(Node):
 
     """A Node which represents a line comment in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize a LineCommentNode with the parsed value of the comment.
@@ -82,6 +301,8 @@ class BlockCommentNode(Node):
 
     """A Node which represents a block comment in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize a BlockCommentNode with the parsed value of the comment.
@@ -93,6 +314,8 @@ class IdentifierNode(Node):
 
     """A Node which represents an identifier in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize an IdentifierNode with the parsed value of the comment.
@@ -104,6 +327,8 @@ class OverlapLiteralNode(Node):
 
     """A Node which represents an overlap relation in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize an OverlapLiteralNode with the value of the overlap.
@@ -115,6 +340,8 @@ class BooleanLiteralNode(Node):
 
     """A Node which represents a boolean value in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize a BooleanLiteralNode with the parsed value of the boolean.
@@ -126,6 +353,8 @@ class StringLiteralNode(Node):
 
     """A Node which represents a string in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize a StringLiteralNode with the parsed value of the string.
@@ -143,11 +372,30 @@ class IntegerLiteralNode(Node):
 
     """A Node which represents an integer in the AST."""
 
+    __slots__ = ('val', 'value', 'dataType', 'unsigned')
+
     def __init__(self, val):
         """
         Initialize an IntegerLiteralNode with the parsed value of the integer.
         """
         self.val = val
+        self.value = None
+
+    def setValue(self, value):
+        """
+        Set the exact value of the literal.
+
+        Arguments:
+        value -- a literals.Literal object
+        """
+        self.value = value
+
+    def getValue(self):
+        """
+        Return the exact value of the literal as a literals.Literal object,
+        if it was previously set, or None otherwise.
+        """
+        return self.value
 
     def setType(self, t):
         """
@@ -179,12 +427,31 @@ class FloatingPointNode(Node):
 
     """A Node which represents a floating point number in the AST."""
 
+    __slots__ = ('val', 'value', 'dataType', 'unsigned')
+
     def __init__(self, val):
         """
         Initialize a FloatingPointNumberLiteral with the parsed value of the
         floating point number.
         """
         self.val = val
+        self.value = None
+
+    def setValue(self, value):
+        """
+        Set the exact value of the literal.
+
+        Arguments:
+        value -- a literals.Literal object
+        """
+        self.value = value
+
+    def getValue(self):
+        """
+        Return the exact value of the literal as a literals.Literal object,
+        if it was previously set, or None otherwise.
+        """
+        return self.value
 
     def setType(self, t):
         """
@@ -216,9 +483,28 @@ class InfinityLiteralNode(Node):
 
     """A Node which represents positive and negative infinity in the AST."""
 
+    __slots__ = ('sign', 'value', 'dataType')
+
     def __init__(self, sign):
         """Initialize an InfinityLiteralNode by sign."""
         self.sign = sign
+        self.value = None
+
+    def setValue(self, value):
+        """
+        Set the exact value of the literal.
+
+        Arguments:
+        value -- a literals.Literal object
+        """
+        self.value = value
+
+    def getValue(self):
+        """
+        Return the exact value of the literal as a literals.Literal object,
+        if it was previously set, or None otherwise.
+        """
+        return self.value
 
     def setType(self, t):
         """
@@ -241,6 +527,8 @@ class DecorationLiteralNode(Node):
 
     """A Node which represents a decoration in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize a DecorationLiteralNode with the parsed value of the
@@ -253,6 +541,8 @@ class NotAnIntervalNode(Node):
 
     """A Node which represents NaI in the AST."""
 
+    __slots__ = ('dataType',)
+
     def setType(self, t):
         """
         Set the datatype of the node.
@@ -271,6 +561,8 @@ class EmptyIntervalNode(Node):
 
     """A Node which represents an Empty-Interval in the AST."""
 
+    __slots__ = ('dataType',)
+
     def setType(self, t):
         """
         Set the datatype of the node.
@@ -289,6 +581,8 @@ class EntireIntervalNode(Node):
 
     """A Node which represents an Entire-Interval in the AST."""
 
+    __slots__ = ('decoration', 'dataType')
+
     def __init__(self):
         """Initialize an EntireIntervalNode."""
         self.decoration = None
@@ -320,6 +614,8 @@ class InfSupIntervalNode(Node):
 
     """A Node which represents a regular interval in the AST."""
 
+    __slots__ = ('inf', 'sup', 'decoration')
+
     def __init__(self, inf, sup):
         """
         Initialize an InfSupIntervalNode. 
@@ -350,13 +646,15 @@ class InfSupIntervalNode(Node):
         """
         Return the type of the interval.
         """
-        return 'interval<' + self.inf.getType() + '>'
+        return intervalType(self.inf.getType())
 
 
 class AccurateOutputsNode(Node):
 
     """A Node which represents the accurate output in the AST."""
 
+    __slots__ = ('literals',)
+
     def __init__(self, literals):
         """
         Initialize an AccurateOutputsNode.
@@ -371,6 +669,8 @@ class TightestOutputsNode(Node):
 
     """A Node which represents the tightest output in the AST."""
 
+    __slots__ = ('literals',)
+
     def __init__(self, literals):
         """
         Initialize a TightestOutputsNode.
@@ -384,6 +684,8 @@ class InputsNode(Node):
 
     """A Node which represents the inputs in the AST."""
 
+    __slots__ = ('literals',)
+
     def __init__(self, literals):
         """
         Initialize an InputsNode.
@@ -398,6 +700,8 @@ class QualidentNode(Node):
 
     """A Node which represents a qualified identifier in the AST."""
 
+    __slots__ = ('val',)
+
     def __init__(self, val):
         """
         Initialize a QualidentNode with the value of the first identifier.
@@ -418,6 +722,8 @@ class OperationNameNode(Node):
 
     """A Node which represents the name of an operation in the AST."""
 
+    __slots__ = ('ident',)
+
     def __init__(self, ident):
         """
         Initialize an OperationNameNode with an identifier.
@@ -432,9 +738,12 @@ class TestNode(Node):
 
     """A Node which represents a test in the AST."""
 
+    __slots__ = ('opName', 'inputs', 'tightestOutputs',
+                 'accurateOutputs', 'comments', 'position', 'signature')
+
     def __init__(self, opName, inputs, tightestOutputs, accurateOutputs):
         """
-        Initialize a TestNode.
+        Initialize a TestNode, see annotate for the signature.
 
         Arguments:
         opName -- an OperationNameNode object
@@ -447,6 +756,7 @@ class TestNode(Node):
         self.tightestOutputs = tightestOutputs
         self.accurateOutputs = accurateOutputs
         self.comments = []
+        self.position = None
 
     def appendComment(self, comment):
         """
@@ -457,22 +767,203 @@ class TestNode(Node):
         """
         self.comments = [comment] + self.comments
 
+    def setPosition(self, line, column):
+        """
+        Set the position of the test in the ITL source.
+
+        Arguments:
+        line -- line number of the operation name
+        column -- column of the operation name, starting at 1
+        """
+        self.position = (line, column)
+
+    def annotate(self):
+        """
+        Store the signature of the test in the signature attribute.
+
+        The signature is the part of the key of the operation in the output
+        specification which follows the operation name, the types of the
+        outputs and of the inputs, e.g.
+        '<<interval<double>>><interval<double>,interval<double>>'. It does
+        not depend on the output specification, so the parser computes it
+        once per test for all of them.
+
+        Raise an IOError if the types of the accurate and the tightest
+        outputs differ.
+        """
+        inputTypes = _types(self.inputs)
+        accurateTypes = _types(self.accurateOutputs)
+        tightestTypes = _types(self.tightestOutputs)
+        if accurateTypes and tightestTypes and accurateTypes != tightestTypes:
+            raise IOError('types of accurate and tightest outputs differ')
+        outputTypes = accurateTypes or tightestTypes
+        self.signature = sys.intern('<<' + outputTypes + '>>' + '<' +
+                                    inputTypes + '>')
+
+
+def _types(literals):
+    """
+    Return the types of the literals of an InputsNode, TightestOutputsNode
+    or AccurateOutputsNode separated by commas, or '' for None.
+    """
+    if literals is None:
+        return ''
+    return ','.join([n.getType() for n in literals.literals])
+
+
+class LiteralSetNode(Node):
+
+    """
+    A Node which represents a set of literals in the AST, an input of a
+    GeneratorNode.
+    """
+
+    __slots__ = ('literals', 'name', 'comments', 'position')
+
+    def __init__(self, literals, name=None):
+        """
+        Initialize a LiteralSetNode.
+
+        Arguments:
+        literals -- list of literal nodes, None for a reference to a named
+                    set which is not bound yet
+        name -- the name of a declared set or None for an inline set
+        """
+        self.literals = literals
+        self.name = name
+        self.comments = []
+        self.position = None
+
+    def appendComment(self, comment):
+        """
+        Add a comment to the declaration of the set.
+
+        Arguments:
+        comment -- A LineCommentNode object or a BlockCommentNode object
+        """
+        self.comments = [comment] + self.comments
+
+    def setPosition(self, line, column):
+        """
+        Set the position of the set in the ITL source.
+
+        Arguments:
+        line -- line number of the declaration or the reference
+        column -- column of the declaration or the reference, starting at 1
+        """
+        self.position = (line, column)
+
+
+class GeneratorNode(Node):
+
+    """
+    A Node which represents a family of tests in the AST.
+
+    The inputs are LiteralSetNode objects and the generator stands for one
+    test per element of their cartesian product, the first input varying
+    slowest. The outputs list the outputs of these tests one after the
+    other, every test gets the same number of them. Iterating over the node
+    yields the tests, they are built one at a time.
+    """
+
+    __slots__ = ('opName', 'inputs', 'tightestOutputs',
+                 'accurateOutputs', 'comments', 'position')
+
+    def __init__(self, opName, inputs, tightestOutputs, accurateOutputs):
+        """
+        Initialize a GeneratorNode.
+
+        Arguments:
+        opName -- an OperationNameNode object
+        inputs -- a list of LiteralSetNode objects
+        tightestOutputs -- a TightestOutputsNode object
+        accurateOutputs -- a AccurateOutputsNode object
+        """
+        self.opName = opName
+        self.inputs = inputs
+        self.tightestOutputs = tightestOutputs
+        self.accurateOutputs = accurateOutputs
+        self.comments = []
+        self.position = None
+
+    def appendComment(self, comment):
+        """
+        Add a comment to the generator, it is the comment of the first test.
+
+        Arguments:
+        comment -- A LineCommentNode object or a BlockCommentNode object
+        """
+        self.comments = [comment] + self.comments
+
+    def setPosition(self, line, column):
+        """
+        Set the position of the generator in the ITL source, it is the
+        position of all its tests.
+
+        Arguments:
+        line -- line number of the operation name
+        column -- column of the operation name, starting at 1
+        """
+        self.position = (line, column)
+
+    def count(self):
+        """Return the number of tests of the generator."""
+        count = 1
+        for inputSet in self.inputs:
+            count *= len(inputSet.literals)
+        return count
+
+    def __iter__(self):
+        """Yield the tests of the generator as TestNode objects."""
+        count = self.count()
+        combinations = itertools.product(*[inputSet.literals
+                                           for inputSet in self.inputs])
+        for i, combination in enumerate(combinations):
+            test = TestNode(self.opName, InputsNode(list(combination)),
+                            _outputsOf(self.tightestOutputs, i, count),
+                            _outputsOf(self.accurateOutputs, i, count))
+            if i == 0:
+                test.comments = self.comments
+            test.position = self.position
+            test.annotate()
+            yield test
+
+
+def _outputsOf(outputs, index, count):
+    """
+    Return the outputs of a test of a GeneratorNode.
+
+    Arguments:
+    outputs -- the TightestOutputsNode or AccurateOutputsNode of the
+               generator or None
+    index -- the index of the test
+    count -- the number of tests of the generator
+    """
+    if outputs is None:
+        return None
+    size = len(outputs.literals) // count
+    return type(outputs)(outputs.literals[index * size:(index + 1) * size])
+
 
 class TestcaseNode(Node):
 
     """A Node which represents a testcase in the AST."""
 
+    __slots__ = ('name', 'tests', 'comments', 'position', 'fileName')
+
     def __init__(self, name, tests):
         """
         Initialize a TestcaseNode.
 
         Arguments:
         name -- an IdentifierNode object
-        tests -- a list of TestNode objects
+        tests -- a list of TestNode and GeneratorNode objects
         """
         self.name = name
         self.tests = tests
         self.comments = []
+        self.position = None
+        self.fileName = None
 
     def appendComment(self, comment):
         """
@@ -483,17 +974,275 @@ class TestcaseNode(Node):
         """
         self.comments += [comment]
 
+    def setPosition(self, line, column):
+        """
+        Set the position of the testcase in the ITL source.
+
+        Arguments:
+        line -- line number of the 'testcase' keyword
+        column -- column of the 'testcase' keyword, starting at 1
+        """
+        self.position = (line, column)
+
+    def setFileName(self, fileName):
+        """
+        Set the name of the ITL file of the testcase.
+
+        The file of a testcase without a name is the file of its DSLNode.
+
+        Arguments:
+        fileName -- name of the file as a string
+        """
+        self.fileName = fileName
+
+    def iterTests(self):
+        """
+        Yield the tests of the testcase as TestNode objects.
+
+        The tests of a GeneratorNode are built while they are consumed, a
+        generator is never expanded into a list.
+        """
+        for test in self.tests:
+            if isinstance(test, GeneratorNode):
+                yield from test
+            else:
+                yield test
+
+    def applyPasses(self, pipeline):
+        """
+        Return a copy of the testcase with the tests kept by the passes of a
+        pipeline, see passes.Pipeline.
+
+        The tests of generators are passed one by one, the copy has a list of
+        TestNode objects.
+
+        Arguments:
+        pipeline -- a passes.Pipeline object
+        """
+        testcase = TestcaseNode(self.name, list(pipeline.run(self.iterTests())))
+        testcase.comments = self.comments
+        testcase.position = self.position
+        testcase.fileName = self.fileName
+        return testcase
+
+
+class TestcaseTemplateNode(TestcaseNode):
+
+    """
+    A Node which represents a type-generic testcase in the AST.
+
+    The floating point literals of the tests without a type suffix stand for
+    the type parameter. The template is expanded into one TestcaseNode per
+    type by instantiate, when the type is needed.
+    """
+
+    __slots__ = ('types',)
+
+    def __init__(self, name, types, tests):
+        """
+        Initialize a TestcaseTemplateNode.
+
+        Arguments:
+        name -- a QualidentNode object
+        types -- a list of the type parameters, keys of TYPE_SUFFIXES
+        tests -- a list of TestNode objects
+        """
+        TestcaseNode.__init__(self, name, tests)
+        self.types = types
+
+    def instantiate(self, dataType):
+        """
+        Return the testcase for a type as a TestcaseNode.
+
+        The literals without a suffix get the suffix of the type, as if the
+        testcase was written for the type, and the name of the testcase is
+        followed by the type, e.g. 'minimal_add_test_float'. The testcase is
+        built on every call and not kept by the template, which may be held
+        for a whole run, e.g. by an IncludeResolver.
+
+        Arguments:
+        dataType -- one of the types of the template
+        """
+        if dataType == 'double':
+            # the literals are double already
+            tests = self.tests
+        else:
+            tests = [_retype(test, dataType) for test in self.tests]
+        instance = TestcaseNode(QualidentNode(self.name.val + '_' + dataType),
+                                tests)
+        instance.comments = self.comments
+        instance.position = self.position
+        instance.fileName = self.fileName
+        return instance
+
+    def applyPasses(self, pipeline):
+        """
+        Return a list of templates, one per type, with the tests kept by the
+        passes of a pipeline, see TestcaseNode.applyPasses.
+
+        The passes see the tests of the instances of all types one after the
+        other, like the tests of testcases, so e.g. dedupe drops the tests
+        of the instance for double which equal a test of a testcase. The
+        template of a type has the kept tests of its instance, its instance
+        is the one of the template for the type with the other tests
+        dropped.
+
+        Arguments:
+        pipeline -- a passes.Pipeline object
+        """
+        templates = []
+        for dataType in self.types:
+            tests = self.instantiate(dataType).iterTests()
+            template = TestcaseTemplateNode(self.name, [dataType],
+                                            list(pipeline.run(tests)))
+            template.comments = self.comments
+            template.position = self.position
+            template.fileName = self.fileName
+            templates.append(template)
+        return templates
+
+
+def _retype(node, dataType):
+    """
+    Return a copy of a node where the literals of type double have the type
+    dataType instead.
+
+    Arguments:
+    node -- a Node object
+    dataType -- one of the keys of TYPE_SUFFIXES
+    """
+    node = copy.copy(node)
+    # the copy is changed, its digest is computed again
+    if hasattr(node, '_digest'):
+        del node._digest
+    if isinstance(node, (FloatingPointNode, InfinityLiteralNode)):
+        if node.getType() == 'double':
+            suffix = TYPE_SUFFIXES[dataType]
+            if isinstance(node, FloatingPointNode):
+                node.val += suffix
+            if node.value is not None:
+                node.setValue(literals.decode(node.value.text + suffix))
+            node.setType(dataType)
+        return node
+    if isinstance(node, (NotAnIntervalNode, EmptyIntervalNode,
+                         EntireIntervalNode)):
+        if node.getType() == 'interval<double>':
+            node.setType(intervalType(dataType))
+    for name in node.fields():
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            setattr(node, name, _retype(value, dataType))
+        elif isinstance(value, list):
+            setattr(node, name, [_retype(v, dataType)
+                                 if isinstance(v, Node) else v
+                                 for v in value])
+    if isinstance(node, TestNode):
+        node.annotate()
+    return node
+
+
+_SPECIAL_INTERVAL_KEYS = {NotAnIntervalNode: 'nai_interval_',
+                          EmptyIntervalNode: 'empty_interval_',
+                          EntireIntervalNode: 'entire_interval_'}
+
+
+def _arithKeys(node, dataType='double'):
+    """
+    Yield the arith_ keys of the output specification which are needed to
+    translate the literals of a node.
+
+    Arguments:
+    node -- a Node object
+    dataType -- the type of the literals of type double, i.e. the keys are
+                the ones of the instance of a template for dataType, see
+                TestcaseTemplateNode.instantiate
+    """
+    if isinstance(node, InfinityLiteralNode):
+        sign = 'plus_' if node.sign == '+' else 'minus_'
+        yield 'arith_infinity_' + sign + _retyped(node.dataType, dataType)
+        return
+    if type(node) in _SPECIAL_INTERVAL_KEYS:
+        key = _SPECIAL_INTERVAL_KEYS[type(node)]
+        if getattr(node, 'decoration', None):
+            key = 'decorated_' + key
+        yield 'arith_' + key + _retyped(node.getType()[9:][:-1], dataType)
+    elif isinstance(node, InfSupIntervalNode):
+        key = 'inf_sup_interval_'
+        if node.decoration:
+            key = 'decorated_' + key
+        yield 'arith_' + key + _retyped(node.inf.getType(), dataType)
+    for name in node.fields():
+        value = getattr(node, name)
+        if isinstance(value, Node):
+            yield from _arithKeys(value, dataType)
+        elif isinstance(value, list):
+            for v in value:
+                if isinstance(v, Node):
+                    yield from _arithKeys(v, dataType)
+
+
+def _retyped(nodeType, dataType):
+    """Return the type of a literal of type nodeType in an instance of a
+    template for dataType."""
+    return dataType if nodeType == 'double' else nodeType
+
+
+class IncludeNode(Node):
+
+    """
+    A Node which represents an include directive in the AST.
+
+    The parser puts it into the testcases of the DSLNode, it is replaced by
+    the testcases of the included file, see dslparser.IncludeResolver.
+    """
+
+    __slots__ = ('path', 'comments', 'position')
+
+    def __init__(self, path):
+        """
+        Initialize an IncludeNode.
+
+        Arguments:
+        path -- the path of the included file, relative to the directory of
+                the including file
+        """
+        self.path = path
+        self.comments = []
+        self.position = None
+
+    def appendComment(self, comment):
+        """
+        Add a comment to the include directive.
+
+        Arguments:
+        comment -- a LineCommentNode object or a BlockCommentNode object
+        """
+        self.comments += [comment]
+
+    def setPosition(self, line, column):
+        """
+        Set the position of the include directive in the ITL source.
+
+        Arguments:
+        line -- line number of the 'include' keyword
+        column -- column of the 'include' keyword, starting at 1
+        """
+        self.position = (line, column)
+
 
 class DSLNode(Node):
 
     """The root node which represents a complete test suite."""
 
+    __slots__ = ('testcases', 'comments', 'fileName')
+
     def __init__(self, testcases):
         """
         Initialize a DSLNode.
 
         Arguments:
-        testcases -- a list of TestCaseNode objects
+        testcases -- a list of TestCaseNode objects, and IncludeNode objects
+                     until the includes are resolved
         """
         self.testcases = testcases
         self.comments = []
@@ -516,11 +1265,148 @@ class DSLNode(Node):
         """
         self.fileName = fileName
 
+    def applyPasses(self, pipeline):
+        """
+        Return a copy of the AST with the tests kept by the passes of a
+        pipeline, see passes.Pipeline. The AST is not changed.
+
+        The pipeline is reset, the passes see the tests of all testcases of
+        the file one after the other. A template is split into one template
+        per type, see TestcaseTemplateNode.applyPasses.
+
+        Arguments:
+        pipeline -- a passes.Pipeline object
+        """
+        pipeline.reset()
+        testcases = []
+        for testcase in self.testcases:
+            if isinstance(testcase, TestcaseTemplateNode):
+                testcases.extend(testcase.applyPasses(pipeline))
+            elif isinstance(testcase, TestcaseNode):
+                testcases.append(testcase.applyPasses(pipeline))
+            else:
+                testcases.append(testcase)
+        dsl = DSLNode(testcases)
+        dsl.comments = self.comments
+        if hasattr(self, 'fileName'):
+            dsl.fileName = self.fileName
+        return dsl
+
+
+# the compiled templates of the strings of the output specifications by
+# their text, see compileTemplate
+_templates = {}
+_templateLock = threading.Lock()
+
+# the length of the longest compiled template, a longer text is not looked
+# up in _templates
+_maxTemplateLength = [0]
+
+# the regexes of the placeholders of a token by the token, see
+# _tokenPattern
+_tokenPatterns = {}
+
+
+class CompiledTemplate(object):
+
+    """
+    A template string which is split once into its text and placeholders.
+
+    The placeholders are found like string.Template does and substitute
+    replaces a token like Template.safe_substitute: '$$' becomes '$', the
+    other placeholders and a '$' which starts no placeholder are kept as
+    they are. A substitution joins the parts, the text is not scanned
+    again.
+    """
+
+    __slots__ = ('parts', 'positions', 'text')
+
+    def __init__(self, text):
+        """
+        Split a template string.
+
+        Arguments:
+        text -- the template string
+        """
+        parts = []
+        positions = {}
+        last = 0
+        for m in Template.pattern.finditer(text):
+            if m.start() > last:
+                parts.append(text[last:m.start()])
+            name = m.group('named') or m.group('braced')
+            if name is not None:
+                positions.setdefault(name, []).append(len(parts))
+                parts.append(m.group())
+            elif m.group('escaped') is not None:
+                parts.append('$')
+            else:
+                parts.append(m.group())
+            last = m.end()
+        if last < len(text):
+            parts.append(text[last:])
+        # the parts, with the placeholders as written in the text
+        self.parts = parts
+        # the indices of the placeholders in parts by their name
+        self.positions = dict((name, tuple(indices))
+                              for name, indices in positions.items())
+        # the result of a substitution of a token which does not occur
+        self.text = ''.join(parts)
+
+    def substitute(self, token, replacement):
+        """
+        Return the text with the placeholders of a token replaced.
+
+        Arguments:
+        token -- the name of the placeholder, e.g. 'ARG1'
+        replacement -- a string
+        """
+        indices = self.positions.get(token)
+        if indices is None:
+            return self.text
+        parts = self.parts[:]
+        for i in indices:
+            parts[i] = replacement
+        return ''.join(parts)
+
+
+def _tokenPattern(token):
+    """
+    Return a tuple of two regexes, one for the placeholders of a token and
+    one for its unbraced placeholders after a letter, a digit or '_'.
+
+    Arguments:
+    token -- the name of the placeholder, e.g. 'ARG1'
+    """
+    patterns = _tokenPatterns.get(token)
+    if patterns is None:
+        name = re.escape(token) + r'(?![_a-zA-Z0-9])'
+        patterns = _tokenPatterns.setdefault(token, (
+            re.compile(r'\$(?:' + name + r'|\{' + re.escape(token) + r'\})'),
+            re.compile(r'[_a-zA-Z0-9]\$' + name)))
+    return patterns
+
+
+def compileTemplate(text):
+    """
+    Return the shared CompiledTemplate of a template string.
+
+    Arguments:
+    text -- the template string
+    """
+    compiled = _templates.get(text)
+    if compiled is None:
+        with _templateLock:
+            compiled = _templates.setdefault(text, CompiledTemplate(text))
+            _maxTemplateLength[0] = max(_maxTemplateLength[0], len(text))
+    return compiled
+
+
 class ASTVisitor(object):
 
     """Default visitor class."""
 
-    def __init__(self, outputSpecification, cbPath):
+    def __init__(self, outputSpecification, cbPath, sourceMap=False):
         """
         Initialize the visitor.
 
@@ -528,11 +1414,23 @@ class ASTVisitor(object):
         outputSpecification -- an OutputSpecification object
         cbPath -- path to a callbacks.py module in python notification, i.e.
                   with delimiting dots rather than slashes
+        sourceMap -- build a sourcemap.SourceMap of the generated file, it is
+                     stored in the sourceMap attribute by visitDSLNode
         """
         self.out = outputSpecification
         self.cbPath = cbPath
         self.cbs = None
         self.warnings = set()
+        self.buildSourceMap = sourceMap
+        self.sourceMap = None
+        self.marked = []
+        # the visit methods by node class, see Node.accept
+        self.visitTable = visitTable(type(self))
+        # the templates of the specification are split once, see replaceToken
+        if outputSpecification is not None:
+            for value in vars(outputSpecification).values():
+                if isinstance(value, str) and '$' in value:
+                    compileTemplate(value)
 
         # import callback methods if callbacks.py exists
         if cbPath is not None:
@@ -810,6 +1708,11 @@ class ASTVisitor(object):
         """
         Return the translation of a TestNode.
 
+        The parts of the test are translated here, the text of the test is
+        built from them by translateTest.
+
+        Arguments:
+        node -- a TestNode object
         """
 
         # concatenate all comments
@@ -818,40 +1721,60 @@ class ASTVisitor(object):
         # build a list of inputs
         inputList = node.inputs.accept(self)
 
-        # concatenate input and output types to identify matching operations
-        inputTypes = ','.join(n.getType() for n in node.inputs.literals)
-
-        accurateTypes = None
-        tightestTypes = None
-        if node.accurateOutputs:
-            accurateTypes = ','.join(n.getType()
-                                     for n in node.accurateOutputs.literals)
-
-        if node.tightestOutputs:
-            tightestTypes = ','.join(n.getType()
-                                     for n in node.tightestOutputs.literals)
-
-        if accurateTypes and tightestTypes:
-            if accurateTypes != tightestTypes:
-                raise IOError('''types of accurate and tightest outputs may not
-                               differ''')
-        outputTypes = accurateTypes if accurateTypes else tightestTypes
-
         # the constant part of an operation name, e.g. 'arith_op_add'
         opPrefix = 'arith_op_' + node.opName.accept(self)
 
         # the full operation name, i.e. opPrefix followed by the types of
-        # the parameters enclosed by angle brackets
-        opName = opPrefix + '<<' + outputTypes + '>>' + '<' + inputTypes + '>'
+        # the parameters enclosed by angle brackets, see TestNode.annotate
+        try:
+            signature = node.signature
+        except AttributeError:
+            # a test which was not built by the parser
+            node.annotate()
+            signature = node.signature
+        opName = self.testOperation(opPrefix, signature)
+        # if no matching operation was found, return an empty line which
+        # will later on be ommitted in the generated file
+        if not opName:
+            return ""
+
+        tightestOutputList = accurateOutputList = None
+        if node.tightestOutputs is not None:
+            tightestOutputList = node.tightestOutputs.accept(self)
+        if node.accurateOutputs is not None:
+            accurateOutputList = node.accurateOutputs.accept(self)
+        return self.translateTest(commentText, inputList, opName,
+                                  tightestOutputList, accurateOutputList)
+
+    def testOperation(self, opPrefix, signature):
+        """
+        Return the key of the operation of a test in the output
+        specification or None if there is no matching operation.
+
+        Arguments:
+        opPrefix -- the constant part of the key, e.g. 'arith_op_add'
+        signature -- the signature of the test, see TestNode.annotate
+        """
+        opName = opPrefix + signature
 
         # if there is no exact match for the operation, try to find
         # a matching function which uses wildcards
         if not hasattr(self.out, opName):
             opName = self.findMatchingOp(opPrefix, opName)
-            # if still no matching operation was found, return an empty line
-            # which will later on be ommitted in the generated file
-            if not opName:
-                return ""
+        return opName
+
+    def translateTest(self, commentText, inputList, opName,
+                      tightestOutputList, accurateOutputList):
+        """
+        Return the translation of a test from the translations of its parts.
+
+        Arguments:
+        commentText -- the translated comments of the test
+        inputList -- the translated inputs as a list
+        opName -- the key of the operation, see testOperation
+        tightestOutputList -- the list of visitTightestOutputsNode or None
+        accurateOutputList -- the list of visitAccurateOutputsNode or None
+        """
 
         # get the translated value of the operation
         opText = getattr(self.out, opName)
@@ -873,8 +1796,8 @@ class ASTVisitor(object):
         #
 
         # only tightest outputs present -- generate assertEquals statements
-        if node.accurateOutputs is None:
-            outputList = node.tightestOutputs.accept(self)
+        if accurateOutputList is None:
+            outputList = tightestOutputList
             delim = self.out.lang_line_end_token
             for i in range(0, len(outputList)):
                 outp = outputList[i][0]
@@ -894,8 +1817,8 @@ class ASTVisitor(object):
                         assertList += [assertContent + delim]
 
         # only accurate outputs present -- generate assertTrue statements
-        elif node.tightestOutputs is None:
-            outputList = node.accurateOutputs.accept(self)
+        elif tightestOutputList is None:
+            outputList = accurateOutputList
             delim = self.out.lang_line_end_token
             subsetOp = getattr(self.out,
                                self.findMatchingOp('arith_op_subset',
@@ -927,8 +1850,6 @@ class ASTVisitor(object):
         # assertEqualsWarning(add([1,2], [3,4]), [0,7])
         #
         else:
-            tightestOutputList = node.tightestOutputs.accept(self)
-            accurateOutputList = node.accurateOutputs.accept(self)
             delim = self.out.lang_line_end_token
 
             # equals warning check
@@ -1022,23 +1943,49 @@ class ASTVisitor(object):
         Arguments:
         node -- a TestCaseNode object
         """
+        # the tests of generators are translated as they are built
+        return self.translateTestcase(node, ((n, n.accept(self))
+                                             for n in node.iterTests()))
+
+    def translateTestcase(self, node, tests):
+        """
+        Return the translation of a testcase from the translations of its
+        tests, see visitTestcaseNode.
+
+        Arguments:
+        node -- a TestCaseNode object
+        tests -- an iterable of the tuples (test, text) of the tests and
+                 their translations, a test is marked for the source map
+        """
 
         tmp = self.out.test_testcase_seq
         tmp = self.replaceTokenList(tmp, 'COMMENTS', [n.accept(self) for
                                                       n in node.comments])
         tmp = self.replaceToken(tmp, 'TC_NAME', node.name)
-        if self.out.lang_indent_tests:
-            rplList = [self.indent(n.accept(self).strip(),
-                                   self.out.lang_spaces_indent) for n in
-                       node.tests]
-        else:
-            rplList = [n.accept(self).strip() for n in node.tests]
-
-        rplList = list(filter(lambda x: not x.isspace(), rplList))
+        rplList = []
+        for n, text in tests:
+            text = text.strip()
+            if self.out.lang_indent_tests:
+                text = self.indent(text, self.out.lang_spaces_indent)
+            if text.isspace():
+                continue
+            if self.buildSourceMap:
+                text = self.mark(n, text)
+            rplList.append(text)
 
         tmp = self.replaceTokenList(tmp, 'TESTS', rplList)
         return tmp
 
+    def visitIncludeNode(self, node):
+        """
+        Raise an IOError, the include directives of an AST must be resolved
+        before it is translated, see dslparser.IncludeResolver.
+
+        Arguments:
+        node -- an IncludeNode object
+        """
+        raise IOError('Unresolved include of ' + node.path)
+
     def visitDSLNode(self, node):
         """
         Return the translation of a DSLNode.
@@ -1082,11 +2029,16 @@ class ASTVisitor(object):
 
         tmp = self.replaceToken(tmp, 'NAME',
                                 node.fileName.split('.')[0].title())
+        testcases = self.expandTemplates(node.testcases)
         if self.out.lang_indent_testcases:
             rplList = [self.indent(n.accept(self), self.out.lang_spaces_indent)
-                       for n in node.testcases]
+                       for n in testcases]
         else:
-            rplList = [n.accept(self).strip() for n in node.testcases]
+            rplList = [n.accept(self).strip() for n in testcases]
+
+        if self.buildSourceMap:
+            rplList = [self.mark(n, text) for n, text in
+                       zip(testcases, rplList)]
 
         # testcasesComment = self.out.lang_line_comment_token + \
         #                        "Testcases"
@@ -1094,8 +2046,99 @@ class ASTVisitor(object):
 
         tmp = self.replaceTokenList(tmp, 'TESTCASES', rplList, delim="\n\n")
 
+        if self.buildSourceMap:
+            tmp = self.unmark(tmp, node)
+
         return (tmp, self.warnings)
 
+    def expandTemplates(self, testcases):
+        """
+        Return the testcases with every TestcaseTemplateNode replaced by its
+        instances for the types of the output specification.
+
+        A type is supported if the arithmetic library defines the keys of all
+        literals of the instance, the other types are skipped with a warning.
+        The keys are checked on the template, so only the instances of the
+        supported types are built.
+
+        Arguments:
+        testcases -- a list of TestcaseNode objects
+        """
+        result = []
+        for testcase in testcases:
+            if not isinstance(testcase, TestcaseTemplateNode):
+                result.append(testcase)
+                continue
+            for dataType in testcase.types:
+                if all(hasattr(self.out, key)
+                       for key in _arithKeys(testcase, dataType)):
+                    result.append(testcase.instantiate(dataType))
+                else:
+                    self.warnings.add('WARNING: type ' + dataType +
+                                      ' of testcase ' + testcase.name.val +
+                                      ' is not supported, language ' +
+                                      self.out.lang_name)
+        return result
+
+    def mark(self, node, text):
+        """
+        Enclose the translation of a node in marks for the source map.
+
+        The marks are placed behind the indentation of the first line and
+        are removed again by unmark.
+
+        Arguments:
+        node -- a TestcaseNode or a TestNode object
+        text -- the translation of the node
+        """
+        i = len(self.marked)
+        self.marked.append(node)
+        body = text.lstrip(' ')
+        return '%s\x00%d\x00%s\x00/%d\x00' % (text[:len(text) - len(body)],
+                                               i, body, i)
+
+    def unmark(self, text, node):
+        """
+        Remove the marks of mark from the translation of a DSLNode.
+
+        Return the text without the marks and store the lines between the
+        marks in a sourcemap.SourceMap in the sourceMap attribute.
+
+        Arguments:
+        text -- the translation of the DSLNode
+        node -- the DSLNode object
+        """
+        self.sourceMap = sourcemap.SourceMap(
+            '.'.join(node.fileName.split('.')[:-1]) + self.out.lang_extension)
+        pieces = []
+        firstLines = {}
+        line = 1
+        pos = 0
+        fileName = node.fileName
+        for m in _markRegex.finditer(text):
+            line += text.count('\n', pos, m.start())
+            pieces.append(text[pos:m.start()])
+            pos = m.end()
+            i = int(m.group(2))
+            marked = self.marked[i]
+            if not m.group(1):
+                firstLines[i] = line
+                # the tests follow the start of their testcase
+                if isinstance(marked, TestcaseNode):
+                    fileName = marked.fileName or node.fileName
+                continue
+            if marked.position is None:
+                continue
+            if isinstance(marked, TestcaseNode):
+                self.sourceMap.addTestcase(firstLines[i], line, fileName,
+                                           marked.position, marked.name.val)
+            else:
+                self.sourceMap.addTest(firstLines[i], line, fileName,
+                                       marked.position)
+        pieces.append(text[pos:])
+        self.marked = []
+        return ''.join(pieces)
+
     def replaceToken(self, text, token, replacement):
         """
         Replace a token in a template string.
@@ -1109,12 +2152,21 @@ class ASTVisitor(object):
         token -- the string identifiying the token to be replaced
         replacement -- the replacement for the token
         """
-        tmp = Template(text)
-        if not isinstance(replacement, Node):
-            tmp = tmp.safe_substitute({token: replacement})
-        else:
-            tmp = tmp.safe_substitute({token: replacement.accept(self)})
-        return tmp
+        if isinstance(replacement, Node):
+            replacement = replacement.accept(self)
+        if len(text) <= _maxTemplateLength[0]:
+            compiled = _templates.get(text)
+            if compiled is not None:
+                return compiled.substitute(token, str(replacement))
+        # a text built from the templates of the output specification
+        if '$' not in text:
+            return text
+        if '$$' in text:
+            return Template(text).safe_substitute({token: replacement})
+        # without '$$' every '$' of a placeholder of the token starts it, so
+        # only these placeholders are replaced
+        replacement = str(replacement)
+        return _tokenPattern(token)[0].sub(lambda m: replacement, text)
 
     def replaceTokenList(self, text, token, repl_list, delim='\n'):
         """
@@ -1130,12 +2182,22 @@ class ASTVisitor(object):
         if len(repl_list) == 0:
             return self.replaceToken(text, token, '')
 
+        repl_list = [r.accept(self) if isinstance(r, Node) else r
+                     for r in repl_list]
+        # the placeholders are replaced by the joined list at once, if the
+        # replacements one by one give the same text: no replacement adds a
+        # '$' and the text has no '$$' and no placeholder of the token which
+        # might be read with the text around it after a replacement
+        if '$' not in delim and '$$' not in text and \
+                '${' + token + '}' not in text and \
+                not any('$' in str(r) for r in repl_list) and \
+                not _tokenPattern(token)[1].search(text):
+            return self.replaceToken(text, token,
+                                     delim.join(map(str, repl_list)))
+
         tmp = text
         for i in range(0, len(repl_list) - 1):
-            if not isinstance(repl_list[i], Node):
-                sub = repl_list[i] + delim + '$' + token
-            else:
-                sub = repl_list[i].accept(self) + delim + '$' + token
+            sub = repl_list[i] + delim + '$' + token
             tmp = self.replaceToken(tmp, token, sub)
         tmp = self.replaceToken(tmp, token, repl_list[-1])
         return str(tmp)